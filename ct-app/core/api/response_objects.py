@@ -16,16 +16,23 @@ from prometheus_client import Gauge, Histogram
 
 from ..components.balance import Balance
 from ..components.messages.message_format import MessageFormat
+from ..components.metrics import address_metrics
 from .channelstatus import ChannelStatus
 
-MESSAGES_RTT = Histogram(
+MESSAGES_RTT = address_metrics.register(
+    Histogram,
     "ct_messages_delays",
     "Messages delays",
     ["relayer"],
+    "relayer",
     buckets=[0.5, 0.75, 1, 2, 3, 4, 5],
 )
-MESSAGES_STATS = Gauge("ct_messages_stats", "", ["type", "relayer"])
-MESSAGE_SENDING_REQUEST = Gauge("ct_message_sending_request", "", ["relayer"])
+MESSAGES_STATS = address_metrics.register(
+    Gauge, "ct_messages_stats", "", ["type", "relayer"], "relayer"
+)
+MESSAGE_SENDING_REQUEST = address_metrics.register(
+    Gauge, "ct_message_sending_request", "", ["relayer"], "relayer"
+)
 
 logger = logging.getLogger(__name__)
 
@@ -291,7 +298,7 @@ class Session(JsonResponse):
             raise AttributeError(f"Socket is None for session on port {self.port}")
 
         if isinstance(message, MessageFormat):
-            MESSAGE_SENDING_REQUEST.labels(message.relayer).inc()
+            address_metrics.labels(MESSAGE_SENDING_REQUEST, relayer=message.relayer).inc()
 
         payload: bytes = message.bytes() if isinstance(message, MessageFormat) else message
 
@@ -306,7 +313,7 @@ class Session(JsonResponse):
             return 0
 
         if isinstance(message, MessageFormat):
-            MESSAGES_STATS.labels("sent", message.relayer).inc()
+            address_metrics.labels(MESSAGES_STATS, type="sent", relayer=message.relayer).inc()
 
         return data
 
@@ -398,8 +405,8 @@ class Session(JsonResponse):
                 continue
 
             rtt = (now_ms - message.timestamp) / 1000
-            MESSAGES_STATS.labels("received", message.relayer).inc()
-            MESSAGES_RTT.labels(message.relayer).observe(rtt)
+            address_metrics.labels(MESSAGES_STATS, type="received", relayer=message.relayer).inc()
+            address_metrics.labels(MESSAGES_RTT, relayer=message.relayer).observe(rtt)
 
         return recv_size
 
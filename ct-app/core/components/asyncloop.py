@@ -2,7 +2,7 @@ import asyncio
 import logging
 import threading
 from signal import SIGINT, SIGTERM
-from typing import Any, Callable, Iterable
+from typing import Any, Callable, Iterable, Optional
 
 from ..components.logs import configure_logging
 from .singleton import Singleton
@@ -76,7 +76,9 @@ class AsyncLoop(metaclass=Singleton):
             cls().add(task)
 
     @classmethod
-    def add(cls, callback: Callable, *args, publish_to_task_set: bool = True):
+    def add(
+        cls, callback: Callable, *args, publish_to_task_set: bool = True
+    ) -> Optional[asyncio.Future]:
         try:
             task = asyncio.ensure_future(callback(*args))
         except Exception as err:
@@ -87,7 +89,7 @@ class AsyncLoop(metaclass=Singleton):
                     "error": str(err),
                 },
             )
-            return
+            return None
 
         if publish_to_task_set:
             cls().tasks.add(task)
@@ -109,6 +111,8 @@ class AsyncLoop(metaclass=Singleton):
 
             task.add_done_callback(_log_task_result)
 
+        return task
+
     @classmethod
     def run_in_thread(cls, callback: Callable, *args):
         def sync_wrapper(callback, *args):
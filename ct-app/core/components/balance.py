@@ -1,50 +1,164 @@
-from decimal import Decimal, InvalidOperation
+"""
+Token amounts with their unit.
+
+Amounts are stored as an integer number of wei (1e-18 of the unit), so that parsing,
+arithmetic and comparisons are done on Python ints instead of re-parsing strings. The
+`Decimal` value and the string representation are only computed when requested, and then
+cached. Instances are immutable, hence shared freely (copies return the same object).
+
+Inputs with more than 18 decimals are rounded half-even to the nearest wei.
+"""
+
+import sys
+from decimal import ROUND_HALF_EVEN, Context, Decimal, InvalidOperation
 from typing import Optional
 
 WEI_TO_READABLE = Decimal("1000000000000000000")
 
+WEI_DECIMALS = 18
+WEI_PER_UNIT = 10**WEI_DECIMALS
+
+# equality is checked on amounts rounded to 1e-7 units
+EQUALITY_QUANTUM = 10 ** (WEI_DECIMALS - 7)
+
+_CONTEXT = Context(prec=100, rounding=ROUND_HALF_EVEN)
+
+
+def _round_half_even(numerator: int, denominator: int) -> int:
+    """
+    Integer division rounded half-even, the default rounding of `Decimal`.
+    """
+    if denominator < 0:
+        numerator, denominator = -numerator, -denominator
+
+    quotient, remainder = divmod(numerator, denominator)
+    doubled = 2 * remainder
+
+    if doubled > denominator or (doubled == denominator and quotient % 2):
+        quotient += 1
+    return quotient
+
 
 class Balance:
+    __slots__ = ("_wei", "_unit", "_value", "_str")
+
+    # slots are written with `object.__setattr__`, as `__setattr__` is disabled; `_value` and
+    # `_str` are only set once computed
+    _wei: int
+    _unit: str
+    _value: Decimal
+    _str: str
+
     def __init__(self, value: str):
         if isinstance(value, Balance):
-            value = value._value
+            object.__setattr__(self, "_wei", value._wei)
+            object.__setattr__(self, "_unit", value._unit)
+            return
 
         if not isinstance(value, str):
             raise TypeError(f"Balance value must be a string, got {type(value).__name__} ({value})")
 
-        self._value: str = value
+        wei, unit = self._parse(value)
+        object.__setattr__(self, "_wei", wei)
+        object.__setattr__(self, "_unit", unit)
 
-        if self.unit and self.unit.split()[0] == "wei":
-            converted_value = Decimal(self.value) / WEI_TO_READABLE
-            self._value = f"{converted_value} {self.unit.split(maxsplit=1)[1]}"
+    @classmethod
+    def _from_wei(cls, wei: int, unit: str) -> "Balance":
+        """
+        Build a balance from an amount in wei, skipping the string parsing.
+        """
+        balance = cls.__new__(cls)
+        object.__setattr__(balance, "_wei", wei)
+        object.__setattr__(balance, "_unit", unit)
+        return balance
 
-        self.balance_format_check()
+    @classmethod
+    def _from_decimal(cls, value: Decimal, unit: str) -> "Balance":
+        return cls._from_wei(cls._to_wei(value, WEI_DECIMALS), unit)
 
-    def balance_format_check(self):
-        if len(self._value.split()) > 3 or self.unit is None:
-            raise TypeError(f"Invalid balance format: {self._value}")
+    @staticmethod
+    def _to_wei(value: Decimal, decimals: int) -> int:
+        if not value.is_finite():
+            raise TypeError(f"Invalid balance value: {value}")
+        return int(value.scaleb(decimals, _CONTEXT).to_integral_value(ROUND_HALF_EVEN, _CONTEXT))
+
+    @classmethod
+    def _parse(cls, value: str) -> tuple[int, str]:
+        tokens = value.split()
+
+        if len(tokens) == 2:
+            amount, unit = tokens
+            decimals = WEI_DECIMALS
+        elif len(tokens) == 3 and tokens[1] == "wei":
+            amount, _, unit = tokens
+            decimals = 0
+        elif len(tokens) == 3:
+            amount, unit = value.split(maxsplit=1)
+            decimals = WEI_DECIMALS
+        else:
+            raise TypeError(f"Invalid balance format: {value}")
+
+        try:
+            wei = cls._parse_amount(amount, decimals)
+        except ValueError:
+            raise TypeError(f"Invalid balance value: {value}")
+
+        return wei, sys.intern(unit)
+
+    @classmethod
+    def _parse_amount(cls, amount: str, decimals: int) -> int:
+        """
+        Convert a decimal string to an integer amount with the given number of decimals.
+        Plain decimal notation is parsed with ints only, anything else goes through `Decimal`.
+        """
+        whole, _, fraction = amount.partition(".")
+
+        digits = whole[1:] if whole[:1] in ("-", "+") else whole
+
+        if digits.isdigit() and len(fraction) <= decimals and (not fraction or fraction.isdigit()):
+            scaled = int(digits) * 10**decimals + int(fraction.ljust(decimals, "0") or 0)
+            return -scaled if whole.startswith("-") else scaled
 
         try:
-            _ = self.value
-        except TypeError:
-            raise TypeError(f"Invalid balance value: {self._value}")
+            return cls._to_wei(Decimal(amount), decimals)
+        except (InvalidOperation, TypeError):
+            raise ValueError(f"Invalid amount: {amount}")
 
+    def balance_format_check(self):
+        # the format is checked when the balance is created, instances are immutable
         return True
 
+    @property
+    def wei(self) -> int:
+        return self._wei
+
     @property
     def as_str(self) -> str:
-        return self._value
+        try:
+            return self._str
+        except AttributeError:
+            object.__setattr__(self, "_str", f"{self._amount_str()} {self._unit}")
+            return self._str
 
     @property
     def value(self) -> Decimal:
         try:
-            return Decimal(self._value.split()[0])
-        except InvalidOperation:
-            raise TypeError(f"Invalid balance value: {self._value}")
+            return self._value
+        except AttributeError:
+            object.__setattr__(self, "_value", Decimal(self._amount_str()))
+            return self._value
 
     @property
     def unit(self) -> Optional[str]:
-        return self._value.split(maxsplit=1)[1] if " " in self._value else None
+        return self._unit
+
+    def _amount_str(self) -> str:
+        sign = "-" if self._wei < 0 else ""
+        whole, fraction = divmod(abs(self._wei), WEI_PER_UNIT)
+
+        if not fraction:
+            return f"{sign}{whole}"
+        return f"{sign}{whole}.{str(fraction).zfill(WEI_DECIMALS).rstrip('0')}"
 
     @classmethod
     def zero(cls, unit: str):
@@ -57,36 +171,65 @@ class Balance:
 
         return cls(f"{value} {unit}")
 
+    @classmethod
+    def from_wei(cls, wei: int, unit: str):
+        return cls._from_wei(wei, unit)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{self.__class__.__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{self.__class__.__name__} is immutable")
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (self.__class__._from_wei, (self._wei, self._unit))
+
     def __eq__(self, other):
         if not isinstance(other, Balance):
             return False
 
-        return (
-            self.value.quantize(Decimal("1e-7")) == other.value.quantize(Decimal("1e-7"))
-            and self.unit == other.unit
+        if self._unit != other._unit:
+            return False
+
+        difference = self._wei - other._wei
+        if not difference:
+            return True
+        if abs(difference) > EQUALITY_QUANTUM:
+            return False
+
+        return _round_half_even(self._wei, EQUALITY_QUANTUM) == _round_half_even(
+            other._wei, EQUALITY_QUANTUM
         )
 
+    __hash__ = None  # type: ignore[assignment]
+
     def __lt__(self, other):
         if not isinstance(other, Balance):
             raise TypeError("Comparison must be with another Balance object")
 
-        if self.unit != other.unit:
+        if self._unit != other._unit:
             raise ValueError(
                 f"Cannot compare balances with different units: {self.unit} and {other.unit}"
             )
 
-        return self.value < other.value
+        return self._wei < other._wei
 
     def __le__(self, other):
         if not isinstance(other, Balance):
             raise TypeError("Comparison must be with another Balance object")
 
-        if self.unit != other.unit:
+        if self._unit != other._unit:
             raise ValueError(
                 f"Cannot compare balances with different units: {self.unit} and {other.unit}"
             )
 
-        return self.value <= other.value
+        return self._wei <= other._wei
 
     def __add__(self, other):
         if self.unit != other.unit:
@@ -94,7 +237,7 @@ class Balance:
                 f"Cannot add balances with different units: {self.unit} and {other.unit}"
             )
 
-        return Balance(f"{self.value + other.value} {self.unit}")
+        return self._from_wei(self._wei + other._wei, self._unit)
 
     def __sub__(self, other):
         if self.unit != other.unit:
@@ -102,7 +245,7 @@ class Balance:
                 f"Cannot subtract balances with different units: {self.unit} and {other.unit}"
             )
 
-        return Balance(f"{self.value - other.value} {self.unit}")
+        return self._from_wei(self._wei - other._wei, self._unit)
 
     def __truediv__(self, other):
         if isinstance(other, Balance):
@@ -112,38 +255,40 @@ class Balance:
                 )
             return self.value / other.value
         else:
-            return Balance(f"{self.value / Decimal(other)} {self.unit}")
+            return self.__div__(other)
 
     def __div__(self, other):
-        return Balance(f"{self.value / Decimal(other)} {self.unit}")
+        if type(other) is int:
+            return self._from_wei(_round_half_even(self._wei, other), self._unit)
+        return self._from_decimal(self.value / Decimal(other), self._unit)
 
     def __rtruediv__(self, other):
-        return Balance(f"{Decimal(other) / self.value} {self.unit}")
+        return self._from_decimal(Decimal(other) / self.value, self._unit)
 
     def __mul__(self, other):
         if isinstance(other, Balance):
             raise TypeError("Cannot multiply two Balance objects directly")
-        else:
-            return Balance(f"{self.value * Decimal(other)} {self.unit}")
+        if type(other) is int:
+            return self._from_wei(self._wei * other, self._unit)
+        return self._from_decimal(self.value * Decimal(other), self._unit)
 
     def __rmul__(self, other):
-        if isinstance(other, Balance):
-            raise TypeError("Cannot multiply two Balance objects directly")
-        else:
-            return Balance(f"{self.value * Decimal(other)} {self.unit}")
+        return self.__mul__(other)
 
     def __pow__(self, power):
         if not isinstance(power, (int, float, Decimal)):
             raise TypeError("Power must be an integer or float")
         if isinstance(power, Decimal):
-            return Balance(f"{self.value ** power} {self.unit}")
+            return self._from_decimal(self.value**power, self._unit)
         else:
-            return Balance(f"{self.value ** Decimal(power)} {self.unit}")
+            return self._from_decimal(self.value ** Decimal(power), self._unit)
 
     def __round__(self, ndigits: int = 0):
-        quantized_value = self.value.quantize(Decimal(f"1e-{ndigits}"))
-        return Balance(f"{quantized_value} {self.unit}")
+        if ndigits >= WEI_DECIMALS:
+            return self
+
+        quantum = 10 ** (WEI_DECIMALS - ndigits)
+        return self._from_wei(_round_half_even(self._wei, quantum) * quantum, self._unit)
 
     def __repr__(self):
-        key_pair_string: str = ", ".join([f"{key}={value}" for key, value in vars(self).items()])
-        return f"{self.__class__.__name__}({key_pair_string})"
+        return f"{self.__class__.__name__}({self.as_str})"
@@ -67,12 +67,13 @@ class ExplicitParams:
             raise AttributeError(f"{cls_name} has no attribute '{attribute}'")
 
         if value := os.getenv(env_var):
-            setattr(self, attribute, value)
+            field_type = {f.name: f.type for f in fields(self)}.get(attribute, str)
+            setattr(self, attribute, field_type(value))
             logger.debug(f"{env_var} key loaded to {cls_name}.{attribute}")
 
             return True
         else:
-            if getattr(self, attribute) == "None":
+            if getattr(self, attribute) in ("None", []):
                 raise AttributeError(f"{cls_name}.{attribute} not set and {env_var} key not found.")
             else:
                 logger.warning(
@@ -0,0 +1,13 @@
+from dataclasses import dataclass
+
+from .base_classes import ExplicitParams
+
+
+@dataclass(init=False)
+class ConnectionParams(ExplicitParams):
+    limit: int
+    limit_per_host: int
+    dns_cache_ttl: int
+    keepalive_timeout: float
+    timeout: float
+    connect_timeout: float
@@ -1,18 +1,99 @@
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 from decimal import Decimal
-from math import log, prod
+from functools import lru_cache
+from math import exp, expm1, log, log1p, prod, sqrt
 from typing import Optional
 
+import numpy as np
+
 from ...api.response_objects import TicketPrice
 from ..balance import Balance
 from ..logs import configure_logging
 from .base_classes import ExplicitParams
+from .equation import Equation, compile_equation
 
 configure_logging()
 logger = logging.getLogger(__name__)
 
 
+# maximum interpolation error of the bucket APR tables, in APR percentage points
+APR_TABLE_TOLERANCE = 1e-9
+# the tables cover x in [upperbound * APR_TABLE_RANGE, upperbound], exact evaluation below
+APR_TABLE_RANGE = 1e-9
+
+
+def _as_float(value) -> float:
+    return float(value.value if isinstance(value, Balance) else value)
+
+
+class AprTable:
+    """
+    Piecewise-linear interpolation table of a bucket APR curve.
+
+    The curve is sampled in u = log(upperbound / x), where it reads
+    f(u) = flatness * log(exp(skewness * u) - 1) + offset. f is concave and its curvature
+    |f''(u)| = flatness * skewness^2 * e^(su) / (e^(su) - 1)^2 decreases with u, so a step
+    h = sqrt(8 * tolerance / |f''(u)|) taken from u bounds the interpolation error of the
+    whole interval by `tolerance`. Sampling starts where the APR reaches zero, as it is
+    clamped below.
+    """
+
+    def __init__(self, flatness: float, skewness: float, upperbound: float, offset: float):
+        if flatness <= 0 or skewness <= 0 or upperbound <= 0:
+            raise ValueError("APR tables require positive flatness, skewness and upperbound")
+
+        self.flatness = flatness
+        self.skewness = skewness
+        self.upperbound = upperbound
+        self.offset = offset
+        self.error_bound = APR_TABLE_TOLERANCE
+
+        u_max = -log(APR_TABLE_RANGE)
+        u = log1p(exp(-offset / flatness)) / skewness  # f(u) == 0
+
+        us = [u]
+        while u < u_max:
+            v = exp(skewness * u)
+            curvature = flatness * skewness**2 * v / (v - 1) ** 2
+            u = min(u + sqrt(8 * self.error_bound / curvature), u_max)
+            us.append(u)
+
+        self.us = np.array(us)
+        self.aprs = np.maximum(flatness * np.log(np.expm1(skewness * self.us)) + offset, 0)
+
+    def _exact(self, u: float) -> float:
+        return max(self.flatness * log(expm1(self.skewness * u)) + self.offset, 0.0)
+
+    def apr(self, x: float) -> float:
+        """
+        Float64 counterpart of `BucketParams.apr`, accurate to `error_bound`.
+        :raises ValueError: Outside of the domain of the curve, as `BucketParams.apr`.
+        """
+        if x <= 0 or x >= self.upperbound:
+            raise ValueError(f"Math domain error: {x=}")
+
+        u = log(self.upperbound / x)
+        if u > self.us[-1]:
+            return self._exact(u)
+
+        return float(np.interp(u, self.us, self.aprs, left=0.0))
+
+    def __len__(self) -> int:
+        return len(self.us)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(size={len(self)}, error_bound={self.error_bound})"
+
+
+@lru_cache(maxsize=None)
+def apr_table(flatness: float, skewness: float, upperbound: float, offset: float) -> AprTable:
+    """
+    Get the APR table of a bucket. Tables are only built again when the bucket changes.
+    """
+    return AprTable(flatness, skewness, upperbound, offset)
+
+
 @dataclass(init=False)
 class LegacyCoefficientsParams(ExplicitParams):
     a: Decimal
@@ -21,11 +102,30 @@ class LegacyCoefficientsParams(ExplicitParams):
     upperbound: Balance
 
 
+LEGACY_EQUATION_PARAMETERS = ("x", *(f.name for f in fields(LegacyCoefficientsParams)))
+
+
 @dataclass(init=False)
 class LegacyEquationParams(ExplicitParams):
     formula: str
     condition: str
 
+    def __init__(self, data: Optional[dict] = None):
+        super().__init__(data)
+
+        # compile at config load, so that invalid equations are rejected early
+        for name in ("formula", "condition"):
+            if hasattr(self, name):
+                compile_equation(getattr(self, name), LEGACY_EQUATION_PARAMETERS)
+
+    @property
+    def compiled_formula(self) -> Equation:
+        return compile_equation(self.formula, LEGACY_EQUATION_PARAMETERS)
+
+    @property
+    def compiled_condition(self) -> Equation:
+        return compile_equation(self.condition, LEGACY_EQUATION_PARAMETERS)
+
 
 @dataclass(init=False)
 class LegacyEquationsParams(ExplicitParams):
@@ -40,18 +140,25 @@ class LegacyParams(ExplicitParams):
     coefficients: LegacyCoefficientsParams
     equations: LegacyEquationsParams
 
-    def transformed_stake(self, stake: Balance) -> Balance:
-        # convert parameters attribute to dictionary
-        kwargs = dict(vars(self.coefficients).items())
-        kwargs.update({"x": stake})
+    def transformed_stake(self, stake: Balance, upperbound: Optional[Balance] = None) -> Balance:
+        """
+        Apply the first equation whose condition is met to the stake.
+        :param stake: The stake to transform.
+        :param upperbound: Overrides the upperbound coefficient, e.g. to account for rewards.
+        """
+        kwargs = {
+            "x": stake,
+            "a": self.coefficients.a,
+            "b": self.coefficients.b,
+            "lowerbound": self.coefficients.lowerbound,
+            "upperbound": upperbound if upperbound is not None else self.coefficients.upperbound,
+        }
 
-        for func in vars(self.equations).values():
-            if eval(func.condition, kwargs):
-                break
-        else:
-            return Balance.zero(("wxHOPR"))
+        for func in (self.equations.fx, self.equations.gx):
+            if func.compiled_condition.scalar(**kwargs):
+                return func.compiled_formula.scalar(**kwargs)
 
-        return eval(func.formula, kwargs)
+        return Balance.zero("wxHOPR")
 
     def yearly_message_count(
         self,
@@ -62,13 +169,56 @@ class LegacyParams(ExplicitParams):
         """
         Calculate the yearly message count a peer should receive based on the stake.
         """
-
-        self.coefficients.upperbound += redeemed_rewards or Balance.zero(("wxHOPR"))
-        rewards = self.apr * self.transformed_stake(stake) / 100
-        self.coefficients.upperbound -= redeemed_rewards or Balance.zero(("wxHOPR"))
+        upperbound = self.coefficients.upperbound + (redeemed_rewards or Balance.zero("wxHOPR"))
+        rewards = self.apr * self.transformed_stake(stake, upperbound) / 100
 
         return float(rewards / ticket_price.value * self.proportion)
 
+    def transformed_stakes(self, stakes: np.ndarray, upperbounds: np.ndarray) -> np.ndarray:
+        """
+        Float64 counterpart of `transformed_stake`, evaluated on all the stakes at once.
+        """
+        kwargs = {
+            "x": stakes,
+            "a": _as_float(self.coefficients.a),
+            "b": _as_float(self.coefficients.b),
+            "lowerbound": _as_float(self.coefficients.lowerbound),
+            "upperbound": upperbounds,
+        }
+
+        result = np.zeros_like(stakes)
+        pending = np.ones_like(stakes, dtype=bool)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            for func in (self.equations.fx, self.equations.gx):
+                condition = func.compiled_condition.array(**kwargs) & pending
+                if not condition.any():
+                    continue
+
+                values = np.broadcast_to(func.compiled_formula.array(**kwargs), stakes.shape)
+                result[condition] = values[condition]
+                pending &= ~condition
+
+        return result
+
+    def yearly_message_counts(
+        self,
+        stakes: np.ndarray,
+        ticket_price: TicketPrice,
+        redeemed_rewards: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Calculate the yearly message count of multiple peers at once, based on their stakes.
+        Float64 counterpart of `yearly_message_count`.
+        """
+        if redeemed_rewards is None:
+            redeemed_rewards = np.zeros_like(stakes)
+
+        upperbounds = _as_float(self.coefficients.upperbound) + redeemed_rewards
+        rewards = _as_float(self.apr) * self.transformed_stakes(stakes, upperbounds) / 100
+
+        return rewards / _as_float(ticket_price.value) * _as_float(self.proportion)
+
 
 @dataclass(init=False)
 class BucketParams(ExplicitParams):
@@ -95,6 +245,12 @@ class BucketParams(ExplicitParams):
 
         return max(apr, Decimal(0))
 
+    @property
+    def table(self) -> AprTable:
+        return apr_table(
+            float(self.flatness), float(self.skewness), float(self.upperbound), float(self.offset)
+        )
+
 
 @dataclass(init=False)
 class BucketsParams(ExplicitParams):
@@ -157,14 +313,67 @@ class SigmoidParams(ExplicitParams):
 
         return float(rewards / ticket_price.value * self.proportion)
 
+    def network_apr(self, xs: list[Decimal]) -> float:
+        """
+        Float64 counterpart of `apr`, evaluated on the precomputed bucket tables. The APR only
+        depends on network-wide inputs, so it is computed once per economic model run.
+        """
+        try:
+            apr = prod(b.table.apr(float(x)) for b, x in zip(self.buckets.values, xs)) ** (
+                1 / self.buckets.count
+            ) + float(self.offset)
+        except ValueError as err:
+            logger.error("Value error in APR calculation", {"error": str(err)})
+            apr = 0.0
+
+        if self.max_apr is not None:
+            apr = min(apr, float(self.max_apr))
+
+        return apr
+
+    def yearly_message_counts(
+        self, stakes: np.ndarray, ticket_price: TicketPrice, apr: float
+    ) -> np.ndarray:
+        """
+        Calculate the yearly message count of multiple peers at once, based on their stakes.
+        Float64 counterpart of `yearly_message_count`, given the APR from `network_apr`.
+        """
+        return apr * stakes / 100 / _as_float(ticket_price.value) * _as_float(self.proportion)
+
 
 @dataclass(init=False)
 class EconomicModelParams(ExplicitParams):
     min_safe_allowance: Balance
     nft_threshold: Balance
+    debounce_seconds: float
+    max_staleness_seconds: float
     legacy: LegacyParams
     sigmoid: SigmoidParams
 
     @property
     def models(self):
         return {v.__class__: k for k, v in vars(self).items() if isinstance(v, ExplicitParams)}
+
+    def yearly_message_counts(
+        self,
+        stakes: np.ndarray,
+        ticket_price: TicketPrice,
+        redeemed_rewards: np.ndarray,
+        sigmoid_apr: float,
+    ) -> dict[str, np.ndarray]:
+        """
+        Calculate the yearly message count of multiple peers at once, for each model.
+        :param stakes: The split stakes of the peers, in wxHOPR (float64).
+        :param ticket_price: The current ticket price.
+        :param redeemed_rewards: The redeemed rewards of the peers, in wxHOPR (float64).
+        :param sigmoid_apr: The network-wide APR of the sigmoid model, from `network_apr`.
+        :returns: The message counts per peer, indexed by model name.
+        """
+        model_input = {LegacyParams: redeemed_rewards, SigmoidParams: sigmoid_apr}
+
+        return {
+            name: getattr(self, name).yearly_message_counts(
+                stakes, ticket_price, model_input[model]
+            )
+            for model, name in self.models.items()
+        }
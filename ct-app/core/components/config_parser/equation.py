@@ -0,0 +1,137 @@
+import ast
+from copy import deepcopy
+from functools import lru_cache
+from typing import Callable
+
+ALLOWED_NODES = (
+    ast.Expression,
+    ast.BinOp,
+    ast.UnaryOp,
+    ast.BoolOp,
+    ast.Compare,
+    ast.Name,
+    ast.Load,
+    ast.Constant,
+    ast.Add,
+    ast.Sub,
+    ast.Mult,
+    ast.Div,
+    ast.Pow,
+    ast.USub,
+    ast.UAdd,
+    ast.Not,
+    ast.And,
+    ast.Or,
+    ast.Eq,
+    ast.NotEq,
+    ast.Lt,
+    ast.LtE,
+    ast.Gt,
+    ast.GtE,
+)
+
+
+class _ArrayExpressionTransformer(ast.NodeTransformer):
+    """
+    Rewrites boolean logic into element-wise operators, so that an equation written for
+    scalars (e.g. `lowerbound <= x <= upperbound`) can be evaluated on NumPy arrays.
+    """
+
+    def visit_Compare(self, node: ast.Compare):
+        self.generic_visit(node)
+        if len(node.ops) == 1:
+            return node
+
+        operands = [node.left, *node.comparators]
+        comparisons = [
+            ast.Compare(left=left, ops=[op], comparators=[right])
+            for left, op, right in zip(operands, node.ops, operands[1:])
+        ]
+        return self._chain(comparisons, ast.BitAnd())
+
+    def visit_BoolOp(self, node: ast.BoolOp):
+        self.generic_visit(node)
+        operator = ast.BitAnd() if isinstance(node.op, ast.And) else ast.BitOr()
+        return self._chain(node.values, operator)
+
+    def visit_UnaryOp(self, node: ast.UnaryOp):
+        self.generic_visit(node)
+        if isinstance(node.op, ast.Not):
+            return ast.UnaryOp(op=ast.Invert(), operand=node.operand)
+        return node
+
+    @staticmethod
+    def _chain(values: list, operator: ast.operator) -> ast.expr:
+        result = values[0]
+        for value in values[1:]:
+            result = ast.BinOp(left=result, op=operator, right=value)
+        return result
+
+
+class Equation:
+    """
+    Arithmetic expression from the config file, validated against a whitelist of AST nodes
+    and compiled once into functions of explicit parameters.
+    """
+
+    def __init__(self, source: str, parameters: tuple[str, ...]):
+        """
+        Parse, validate and compile the expression.
+        :param source: The expression, e.g. `a * x`.
+        :param parameters: The names the expression is allowed to use.
+        :raises ValueError: If the expression is invalid or uses unsupported syntax or names.
+        """
+        self.source = source
+        self.parameters = parameters
+
+        try:
+            tree = ast.parse(source, mode="eval")
+        except SyntaxError as err:
+            raise ValueError(f"Invalid equation '{source}': {err.msg}") from err
+
+        self._validate(tree)
+
+        self.scalar: Callable = self._compile(tree)
+        self.array: Callable = self._compile(_ArrayExpressionTransformer().visit(deepcopy(tree)))
+
+    def _validate(self, tree: ast.Expression):
+        for node in ast.walk(tree):
+            if not isinstance(node, ALLOWED_NODES):
+                raise ValueError(
+                    f"Unsupported syntax in equation '{self.source}': {node.__class__.__name__}"
+                )
+            if isinstance(node, ast.Name) and node.id not in self.parameters:
+                raise ValueError(f"Unknown name in equation '{self.source}': {node.id}")
+            if isinstance(node, ast.Constant) and type(node.value) not in (int, float):
+                raise ValueError(
+                    f"Unsupported constant in equation '{self.source}': {node.value!r}"
+                )
+
+    def _compile(self, tree: ast.Expression) -> Callable:
+        function = ast.Expression(
+            body=ast.Lambda(
+                args=ast.arguments(
+                    posonlyargs=[],
+                    args=[ast.arg(arg=name) for name in self.parameters],
+                    kwonlyargs=[],
+                    kw_defaults=[],
+                    defaults=[],
+                ),
+                body=tree.body,
+            )
+        )
+        code = compile(ast.fix_missing_locations(function), f"<equation: {self.source}>", "eval")
+
+        return eval(code, {"__builtins__": {}})
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.source!r})"
+
+
+@lru_cache(maxsize=None)
+def compile_equation(source: str, parameters: tuple[str, ...]) -> Equation:
+    """
+    Get the compiled equation for a source string. Equations are only compiled again when
+    their source or parameters change.
+    """
+    return Equation(source, parameters)
@@ -0,0 +1,9 @@
+from dataclasses import dataclass
+
+from .base_classes import ExplicitParams
+
+
+@dataclass(init=False)
+class MetricsParams(ExplicitParams):
+    mode: str
+    max_series: int
@@ -5,6 +5,7 @@ from .channel import ChannelParams
 from .economic_model import EconomicModelParams
 from .flags import FlagParams
 from .investors import InvestorsParams
+from .metrics import MetricsParams
 from .nft_holders import NFTHoldersParams
 from .peer import PeerParams
 from .rpc import RPCParams
@@ -22,5 +23,6 @@ class Parameters(ExplicitParams):
     sessions: SessionsParams
     investors: InvestorsParams
     nft_holders: NFTHoldersParams
+    metrics: MetricsParams
     rpc: RPCParams
     subgraph: SubgraphParams
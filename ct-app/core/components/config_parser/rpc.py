@@ -1,9 +1,44 @@
 from dataclasses import dataclass
 
 from .base_classes import ExplicitParams
+from .connection import ConnectionParams
+
+
+class URLList(list):
+    """
+    URLs of an endpoint, from a list or from a comma-separated string (as set from an
+    environment variable).
+    """
+
+    def __init__(self, value=None):
+        if value is None:
+            value = []
+        if isinstance(value, str):
+            value = [url.strip() for url in value.split(",") if url.strip()]
+        super().__init__(value)
+
+
+@dataclass(init=False)
+class RetryParams(ExplicitParams):
+    max_attempts: int
+    backoff_base: float
+    backoff_max: float
+    failure_threshold: int
+    reset_timeout: float
+
+
+@dataclass(init=False)
+class BlockWindowParams(ExplicitParams):
+    gnosis: int
+    mainnet: int
 
 
 @dataclass(init=False)
 class RPCParams(ExplicitParams):
-    gnosis: str
-    mainnet: str
+    gnosis: URLList
+    mainnet: URLList
+    connection: ConnectionParams
+    retry: RetryParams
+    max_batch_size: int
+    multicall: bool
+    cache_block_window: BlockWindowParams
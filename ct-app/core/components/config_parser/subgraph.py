@@ -1,6 +1,7 @@
 from dataclasses import dataclass
 
 from .base_classes import ExplicitParams
+from .connection import ConnectionParams
 
 
 @dataclass(init=False)
@@ -14,6 +15,13 @@ class SubgraphParams(ExplicitParams):
     type: str
     user_id: str
     api_key: str
+    connection: ConnectionParams
+    prefetch_ranges: int
+    full_sync_interval: float
+    cache_dir: str
+    cache_ttl: float
+    cache_max_stale: float
+    batched: bool
 
     safes_balance: SubgraphEndpointParams
     rewards: SubgraphEndpointParams
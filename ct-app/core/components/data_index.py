@@ -0,0 +1,116 @@
+"""
+Data index - lookups between the subgraph and RPC entries used by the economic model.
+
+The index maps node addresses to their registered node (and safe), safes to the allocations and
+EOA balances of their owners, and safes to the number of their peers. It is rebuilt only when
+one of its sources is replaced by a refresh (keepalives assign new lists), so every join of the
+economic model reuses the same maps instead of building its own on each run.
+"""
+
+from typing import Optional
+
+from ..rpc.entries import Allocation, ExternalBalance
+from ..subgraph.entries import Node
+from .balance import Balance
+from .utils import Utils
+
+
+class DataIndex:
+    """
+    Indexes of the registered nodes, allocations and EOA balances.
+
+    Thread Safety:
+        Safe for asyncio single-threaded environment. All operations are synchronous.
+    """
+
+    def __init__(self):
+        self._nodes: Optional[list[Node]] = None
+        self._allocations: Optional[list[Allocation]] = None
+        self._eoa_balances: Optional[list[ExternalBalance]] = None
+
+        self.node_by_address: dict[str, Node] = {}
+        self.allocations_by_safe: dict[str, list[Allocation]] = {}
+        self.eoa_balances_by_safe: dict[str, list[ExternalBalance]] = {}
+        # peers of each safe, counted by `Utils.mergeDataSources` on each run
+        self.node_count_by_safe: dict[str, int] = {}
+
+        self._additional_balances: dict[str, Balance] = {}
+
+    def sync(
+        self,
+        nodes: list[Node],
+        allocations: list[Allocation],
+        eoa_balances: list[ExternalBalance],
+    ) -> bool:
+        """
+        Rebuild the indexes whose source changed since the last call. Sources are compared by
+        identity, as they are replaced as a whole when refreshed.
+        :returns: Whether the index was rebuilt.
+        """
+        nodes_changed = nodes is not self._nodes
+        allocations_changed = nodes_changed or allocations is not self._allocations
+        eoa_balances_changed = nodes_changed or eoa_balances is not self._eoa_balances
+
+        if not (allocations_changed or eoa_balances_changed):
+            return False
+
+        if nodes_changed:
+            self._nodes = nodes
+            self.node_by_address = {
+                node.address.lower(): node for node in nodes if node and node.address
+            }
+
+        if allocations_changed:
+            self._allocations = allocations
+            self.allocations_by_safe = self._link(allocations, nodes)
+
+        if eoa_balances_changed:
+            self._eoa_balances = eoa_balances
+            self.eoa_balances_by_safe = self._link(eoa_balances, nodes)
+
+        self._additional_balances.clear()
+        return True
+
+    @staticmethod
+    def _link(entities: list, nodes: list[Node]) -> dict[str, list]:
+        """
+        Link the entities to the safes they own, and index them by safe address.
+        """
+        for entity in entities:
+            entity.linked_safes = set()
+        Utils.associateEntitiesToNodes(entities, nodes)
+
+        entities_by_safe: dict[str, list] = {}
+        for entity in entities:
+            for safe_address in entity.linked_safes:
+                entities_by_safe.setdefault(safe_address, []).append(entity)
+
+        return entities_by_safe
+
+    def node(self, address: str) -> Optional[Node]:
+        return self.node_by_address.get(address.lower())
+
+    def additional_balance(self, safe_address: str) -> Balance:
+        """
+        Get the balance from allocations and EOA balances attributed to a safe. Entities linked
+        to several safes are split equally between them.
+        """
+        if safe_address not in self._additional_balances:
+            additional_balance = Balance.zero("wxHOPR")
+
+            for allocation in self.allocations_by_safe.get(safe_address, []):
+                additional_balance += allocation.unclaimed_amount / allocation.num_linked_safes
+
+            for eoa_balance in self.eoa_balances_by_safe.get(safe_address, []):
+                additional_balance += eoa_balance.amount / eoa_balance.num_linked_safes
+
+            self._additional_balances[safe_address] = additional_balance
+
+        return self._additional_balances[safe_address]
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}(nodes={len(self.node_by_address)}, "
+            f"allocations={len(self._allocations or [])}, "
+            f"eoa_balances={len(self._eoa_balances or [])})"
+        )
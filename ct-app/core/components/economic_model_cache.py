@@ -0,0 +1,70 @@
+"""
+Economic model cache - message counts of the previous economic model runs, per peer.
+
+Each entry is stored along with a fingerprint of the inputs it was computed from (stake
+components, redeemed rewards, ticket price and the network-wide terms of the model). On the
+next run, only the peers whose fingerprint changed are recomputed, and only their metrics are
+updated. When nothing changed, the economic model is not evaluated at all.
+"""
+
+from typing import Hashable, Iterable
+
+
+class EconomicModelCache:
+    """
+    Per-peer message counts, keyed by peer address, with the fingerprint of their inputs.
+
+    Thread Safety:
+        Safe for asyncio single-threaded environment. All operations are synchronous.
+    """
+
+    def __init__(self):
+        self._fingerprints: dict[str, Hashable] = {}
+        self._counts: dict[str, dict[str, float]] = {}
+
+    def changed(self, fingerprints: dict[str, Hashable]) -> list[str]:
+        """
+        Get the addresses whose fingerprint differs from the cached one, or that are not cached.
+        """
+        return [
+            address
+            for address, fingerprint in fingerprints.items()
+            if self._fingerprints.get(address) != fingerprint
+        ]
+
+    def store(self, address: str, fingerprint: Hashable, counts: dict[str, float]) -> None:
+        """
+        Record the message counts per model of an address and the inputs they derive from.
+        """
+        self._fingerprints[address] = fingerprint
+        self._counts[address] = counts
+
+    def counts(self, address: str) -> dict[str, float]:
+        return self._counts[address]
+
+    def retain(self, addresses: Iterable[str]) -> list[str]:
+        """
+        Drop every entry whose address is not in `addresses`.
+        :returns: The dropped addresses.
+        """
+        kept = set(addresses)
+        dropped = [address for address in self._fingerprints if address not in kept]
+
+        for address in dropped:
+            del self._fingerprints[address]
+            del self._counts[address]
+
+        return dropped
+
+    def clear(self) -> None:
+        self._fingerprints.clear()
+        self._counts.clear()
+
+    def __contains__(self, address: object) -> bool:
+        return address in self._fingerprints
+
+    def __len__(self) -> int:
+        return len(self._fingerprints)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(size={len(self)})"
@@ -0,0 +1,119 @@
+"""
+Eligibility filter - the rules a peer has to pass to be rewarded by the economic model.
+
+The rules are compiled once per economic model run: the address lists become sets, so each
+rule is an O(1) check, and the split stake of a peer is computed once for all the stake-based
+rules. The filter records which rule rejected each peer, and publishes the per-rule counts.
+"""
+
+from collections import Counter
+from typing import Iterable, Optional
+
+from prometheus_client import Gauge
+
+from .balance import Balance
+
+REJECTIONS = Gauge("ct_eligibility_rejections", "Peers rejected per eligibility rule", ["rule"])
+
+# rules in evaluation order, a peer is rejected by the first one it fails
+RULES = (
+    "inactive",
+    "excluded",
+    "ct_node",
+    "missing_data",
+    "allowance",
+    "nft_threshold",
+    "min_stake",
+)
+
+
+class EligibilityFilter:
+    """
+    Set-based eligibility rules, compiled from the economic model parameters.
+    """
+
+    def __init__(
+        self,
+        min_allowance: Balance,
+        min_stake: Balance,
+        nft_holders: Iterable[str],
+        nft_threshold: Optional[Balance],
+        ct_nodes: Iterable[str],
+        exclusion_list: Iterable[str],
+    ):
+        """
+        Compile the rules.
+
+        Args:
+            min_allowance: Minimum allowance of the safe.
+            min_stake: Minimum split stake of the peer.
+            nft_holders: Safe addresses holding the NFT, exempted from the NFT threshold.
+            nft_threshold: Minimum split stake of peers not holding the NFT. None disables it.
+            ct_nodes: Addresses of the CT nodes, never rewarded.
+            exclusion_list: Addresses excluded from the rewards.
+        """
+        self.min_allowance = min_allowance
+        self.min_stake = min_stake
+        self.nft_holders = frozenset(nft_holders)
+        self.nft_threshold = nft_threshold
+        self.ct_nodes = frozenset(ct_nodes)
+        self.exclusion_list = frozenset(exclusion_list)
+
+        self.rejections: Counter[str] = Counter()
+
+    def rejection(self, peer) -> Optional[str]:
+        """
+        Get the first rule the peer fails.
+        :returns: The rule name, or None if the peer is eligible.
+        """
+        address = peer.address.native
+        if address in self.exclusion_list:
+            return "excluded"
+
+        if address in self.ct_nodes:
+            return "ct_node"
+
+        if peer.safe is None or peer.channel_balance is None:
+            return "missing_data"
+
+        if peer.safe.allowance < self.min_allowance:
+            return "allowance"
+
+        split_stake = peer.split_stake
+
+        if (
+            self.nft_threshold is not None
+            and peer.safe.address not in self.nft_holders
+            and split_stake < self.nft_threshold
+        ):
+            return "nft_threshold"
+
+        if split_stake < self.min_stake:
+            return "min_stake"
+
+        return None
+
+    def apply(self, peers: Iterable) -> list:
+        """
+        Filter the peers, counting the rejections per rule. Peers that are not active (not
+        visible anymore, or without channel) are not evaluated.
+        :returns: The eligible peers.
+        """
+        self.rejections = Counter()
+        eligible = []
+
+        for peer in peers:
+            rule = "inactive" if peer.yearly_message_count is None else self.rejection(peer)
+            if rule:
+                self.rejections[rule] += 1
+            else:
+                eligible.append(peer)
+
+        return eligible
+
+    def publish(self) -> None:
+        """
+        Export the rejection counts of the last `apply` call.
+        """
+        for rule in RULES:
+            REJECTIONS.labels(rule).set(self.rejections[rule])
@@ -0,0 +1,92 @@
+"""
+Pooled HTTP session - one long-lived aiohttp session shared by the providers of an endpoint
+family.
+
+Opening a session per request costs a TCP and TLS handshake each time. The pooled session keeps
+its connections alive between requests, caches DNS resolutions, bounds the number of open
+connections and applies explicit timeouts. It is created on first use, from the running event
+loop, and must be closed by its owner.
+"""
+
+from typing import Optional
+
+import aiohttp
+
+
+class PooledSession:
+    """
+    Lazily created aiohttp session with a pooled connector.
+
+    Thread Safety:
+        Safe for asyncio single-threaded environment. All operations are synchronous, except
+        `close`.
+    """
+
+    def __init__(
+        self,
+        limit: int = 20,
+        limit_per_host: int = 10,
+        dns_cache_ttl: int = 300,
+        keepalive_timeout: float = 30.0,
+        timeout: float = 30.0,
+        connect_timeout: float = 10.0,
+    ):
+        """
+        Args:
+            limit: Maximum number of open connections.
+            limit_per_host: Maximum number of open connections to a same host.
+            dns_cache_ttl: Seconds DNS resolutions are cached for.
+            keepalive_timeout: Seconds an idle connection is kept open.
+            timeout: Maximum seconds for a whole request.
+            connect_timeout: Maximum seconds to get a connection from the pool, connecting
+                included.
+        """
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    @classmethod
+    def fromParams(cls, params):
+        """
+        Create a pooled session from connection parameters (`ConnectionParams`).
+        """
+        return cls(**params.as_dict())
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """
+        The underlying session, created (again) if not open.
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_cache_ttl,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout, connect=self.connect_timeout),
+            )
+
+        return self._session
+
+    @property
+    def closed(self) -> bool:
+        return self._session is None or self._session.closed
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}(limit={self.limit}, "
+            f"limit_per_host={self.limit_per_host}, closed={self.closed})"
+        )
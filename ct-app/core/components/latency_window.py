@@ -0,0 +1,49 @@
+"""
+Latency window - recent request latencies of an endpoint, to rank endpoints and to decide when
+a request is slow enough to be hedged.
+"""
+
+from collections import deque
+from typing import Optional
+
+
+class LatencyWindow:
+    """
+    Last `size` latencies of an endpoint, in seconds.
+
+    Thread Safety:
+        Safe for asyncio single-threaded environment. All operations are synchronous.
+    """
+
+    def __init__(self, size: int = 100, min_samples: int = 10):
+        """
+        Args:
+            size: Number of latencies kept.
+            min_samples: Number of latencies needed before quantiles are computed.
+        """
+        self.min_samples = min_samples
+        self._samples: deque[float] = deque(maxlen=size)
+
+    def add(self, latency: float) -> None:
+        self._samples.append(latency)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Get a quantile of the latencies (nearest rank).
+        :returns: The quantile, or None if there are not enough latencies.
+        """
+        if len(self._samples) < self.min_samples:
+            return None
+
+        ordered = sorted(self._samples)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+    @property
+    def p95(self) -> Optional[float]:
+        return self.quantile(0.95)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(samples={len(self)}, p95={self.p95})"
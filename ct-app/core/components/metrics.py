@@ -0,0 +1,287 @@
+"""
+Address metrics - bounded label sets for the metric families labelled per peer or safe address.
+
+Without bounds, each address ever seen adds a series to these families, and the series are
+never removed. Families are registered here with the name of their address label, and their
+series are created through this module, which tracks them per address:
+
+- in `full` mode, every address gets its own series (as before).
+- in `bounded` mode, at most `max_series` addresses per family get their own series, the others
+  are merged into an `other` series.
+- in `aggregate` mode, every address is merged into the `other` series.
+
+Snapshot families (values recomputed as a whole, e.g. stakes) are published with `publish`: the
+largest values keep their own series, the rest is summed into `other` (only for additive families,
+e.g. not for delays), and the series of the addresses absent from the snapshot are removed. Labels
+linked to the address (e.g. the safe of a peer) are part of the snapshot, so the series of a peer
+that moved are replaced. In `bounded` and `aggregate` modes, snapshots are also exported as gauge
+histograms without address label (`<name>_distribution`).
+
+Incremental families (counters and histograms updated per event, e.g. per relayer) get their
+series from `labels`: addresses are admitted on first use until the family is full. `evict`
+removes the series of addresses that are gone, freeing their slot.
+"""
+
+import heapq
+from bisect import bisect_left
+from typing import Iterable, Optional, Sequence
+
+from prometheus_client import REGISTRY
+from prometheus_client.metrics_core import GaugeHistogramMetricFamily
+from prometheus_client.utils import floatToGoString
+
+OTHER = "other"
+MODES = ("full", "bounded", "aggregate")
+
+
+class Distribution:
+    """
+    Gauge histogram of the last snapshot of a family, without address label.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: list[str], buckets: list):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = sorted(float(bound) for bound in buckets)
+
+        self._samples: dict[tuple, tuple[list[int], float]] = {}
+
+    def set(self, values: Iterable[float], labels: tuple) -> None:
+        counts = [0] * (len(self.buckets) + 1)
+        total = 0.0
+        for value in values:
+            counts[bisect_left(self.buckets, value)] += 1
+            total += value
+
+        self._samples[labels] = (counts, total)
+
+    def clear(self) -> None:
+        self._samples.clear()
+
+    def collect(self):
+        family = GaugeHistogramMetricFamily(self.name, self.documentation, labels=self.labelnames)
+        bounds = [floatToGoString(bound) for bound in self.buckets] + ["+Inf"]
+
+        for labels, (counts, total) in self._samples.items():
+            cumulative, buckets = 0, []
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                buckets.append((bound, cumulative))
+            family.add_metric(list(labels), buckets, total)
+
+        yield family
+
+
+class Family:
+    """
+    Series of a metric family, per address.
+    """
+
+    def __init__(
+        self,
+        metric,
+        labelnames: Sequence[str],
+        address_label: str,
+        linked_labels: Sequence[str],
+        additive: bool,
+        distribution: Optional[Distribution],
+    ):
+        self.metric = metric
+        self.labelnames = tuple(labelnames)
+        self.address_label = address_label
+        self.linked_labels = tuple(linked_labels)
+        self.additive = additive
+        self.distribution = distribution
+
+        # address -> label values of the series created for it
+        self.series: dict[str, set[tuple]] = {}
+        # fixed label values -> address -> label values and value last published
+        self.published: dict[tuple, dict[str, tuple[tuple, float]]] = {}
+
+    @property
+    def fixed_labels(self) -> list[str]:
+        return [
+            name
+            for name in self.labelnames
+            if name != self.address_label and name not in self.linked_labels
+        ]
+
+    def key(self, labels: dict[str, str], address: str, linked: dict[str, str]) -> tuple:
+        values = {**labels, **linked, self.address_label: address}
+        return tuple(values[name] for name in self.labelnames)
+
+    def fixed(self, labels: dict[str, str]) -> tuple:
+        return tuple(labels[name] for name in self.fixed_labels)
+
+    def track(self, address: str, key: tuple) -> None:
+        self.series.setdefault(address, set()).add(key)
+
+    def remove(self, address: str, key: tuple) -> None:
+        try:
+            self.metric.remove(*key)
+        except KeyError:
+            pass
+
+        keys = self.series.get(address)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.series[address]
+
+    @property
+    def size(self) -> int:
+        return len(self.series) - (OTHER in self.series)
+
+
+class AddressMetrics:
+    """
+    Registry of the metric families labelled per address.
+
+    Thread Safety:
+        Safe for asyncio single-threaded environment. All operations are synchronous.
+    """
+
+    def __init__(self, mode: str = "full", max_series: int = 0):
+        # id of the metric -> family
+        self._families: dict[int, Family] = {}
+        self.configure(mode, max_series)
+
+    def configure(self, mode: str, max_series: int) -> None:
+        """
+        Set the metrics mode. Series created before keep their labels until evicted.
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown metrics mode '{mode}', expected one of {MODES}")
+
+        self.mode = mode
+        self.max_series = max_series
+
+        if mode == "full":
+            for family in self._families.values():
+                if family.distribution is not None:
+                    family.distribution.clear()
+
+    @property
+    def limit(self) -> Optional[int]:
+        """
+        Maximum number of addresses with their own series per family, None if unbounded.
+        """
+        if self.mode == "full":
+            return None
+        if self.mode == "aggregate":
+            return 0
+        return self.max_series
+
+    def register(
+        self,
+        metric_type,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str],
+        address_label: str,
+        linked_labels: Sequence[str] = (),
+        additive: bool = True,
+        distribution: Optional[list] = None,
+        **kwargs,
+    ):
+        """
+        Create and register a family labelled per address.
+        :param metric_type: The prometheus metric class, created with `kwargs`.
+        :param linked_labels: Labels whose values follow the address, e.g. the safe of a peer.
+        :param additive: Whether values of different addresses can be summed into `other`.
+        :param distribution: Buckets of the gauge histogram exporting snapshots of the family in
+        `bounded` and `aggregate` modes.
+        :returns: The metric, to register it where it is defined.
+        """
+        metric = metric_type(name, documentation, labelnames, **kwargs)
+
+        family = Family(metric, labelnames, address_label, linked_labels, additive, None)
+        if distribution is not None:
+            family.distribution = Distribution(
+                f"{name}_distribution",
+                f"Distribution of {name}",
+                family.fixed_labels,
+                distribution,
+            )
+            REGISTRY.register(family.distribution)
+
+        self._families[id(metric)] = family
+        return metric
+
+    def labels(self, metric, **labels: str):
+        """
+        Get the child of an incremental family, admitting its address if the family has room.
+        """
+        family = self._families[id(metric)]
+        address = labels[family.address_label]
+
+        if address not in family.series and self.limit is not None and family.size >= self.limit:
+            address = OTHER
+
+        key = family.key(labels, address, {})
+        family.track(address, key)
+
+        return metric.labels(*key)
+
+    def publish(
+        self,
+        metric,
+        values: dict[str, float],
+        linked: Optional[dict[str, dict[str, str]]] = None,
+        **labels: str,
+    ) -> None:
+        """
+        Publish a snapshot of a family: the values per address, with the linked labels of each
+        address and the other labels fixed. Series of the previous snapshot that are not kept
+        as is are removed.
+        """
+        family = self._families[id(metric)]
+        linked = linked or {}
+
+        series = values
+        if self.limit is not None and len(values) > self.limit:
+            kept = heapq.nlargest(self.limit, values, key=values.__getitem__)
+            series = {address: values[address] for address in kept}
+            if family.additive:
+                series[OTHER] = sum(values.values()) - sum(series.values())
+                linked = {**linked, OTHER: {name: OTHER for name in family.linked_labels}}
+
+        fixed = family.fixed(labels)
+        previous = family.published.get(fixed, {})
+        keys = {address: family.key(labels, address, linked.get(address, {})) for address in series}
+
+        for address, (key, _) in previous.items():
+            if keys.get(address) != key:
+                family.remove(address, key)
+
+        for address, value in series.items():
+            key = keys[address]
+            if previous.get(address) == (key, value):
+                continue
+
+            metric.labels(*key).set(value)
+            family.track(address, key)
+
+        family.published[fixed] = {
+            address: (keys[address], value) for address, value in series.items()
+        }
+
+        if family.distribution is not None and self.mode != "full":
+            family.distribution.set(values.values(), fixed)
+
+    def evict(self, addresses: Iterable[str]) -> None:
+        """
+        Remove every series of the given addresses, in all families.
+        """
+        addresses = list(addresses)
+        for family in self._families.values():
+            for address in addresses:
+                for key in list(family.series.get(address, ())):
+                    family.remove(address, key)
+
+                for published in family.published.values():
+                    published.pop(address, None)
+
+
+address_metrics = AddressMetrics()
@@ -0,0 +1,99 @@
+"""
+Model trigger - dirty flags between the data keepalives and the economic model.
+
+Each data keepalive marks its source when the data it fetched differs from the previous
+snapshot, and never when the fetch failed. The economic model only runs when some source is
+pending, once the sources went quiet for the debounce period, so that refreshes landing together
+(e.g. the subgraph and RPC keepalives sharing a period) are applied as one coherent set. To avoid
+starving the model when marks keep coming, a run is forced once the oldest pending mark reaches the
+maximum staleness.
+"""
+
+import time
+from typing import Any, Optional
+
+
+class ModelTrigger:
+    """
+    Pending input sources of the economic model, with debounce and staleness bounds.
+
+    Thread Safety:
+        Safe for asyncio single-threaded environment. All operations are synchronous.
+    """
+
+    def __init__(self, debounce: float = 0.0, max_staleness: float = 0.0):
+        """
+        Initialize the trigger. The first check is always due, so the model runs on startup.
+
+        Args:
+            debounce: Seconds without new marks before the model runs.
+            max_staleness: Maximum seconds between the first pending mark and the run.
+        """
+        self.debounce = debounce
+        self.max_staleness = max_staleness
+
+        self._pending: set[str] = set()
+        self._first_mark: Optional[float] = None
+        self._last_mark: Optional[float] = None
+        self._initial = True
+
+    def mark(self, source: str) -> None:
+        """
+        Record that a source has new data.
+        """
+        now = time.monotonic()
+
+        self._pending.add(source)
+        self._last_mark = now
+        if self._first_mark is None:
+            self._first_mark = now
+
+    def mark_if_changed(self, source: str, previous: Any, current: Any) -> bool:
+        """
+        Record that a source has new data, if it differs from its previous snapshot.
+        :returns: Whether the data changed.
+        """
+        if current == previous:
+            return False
+
+        self.mark(source)
+        return True
+
+    @property
+    def pending(self) -> frozenset[str]:
+        return frozenset(self._pending)
+
+    def due(self) -> bool:
+        """
+        Check whether the model should run now.
+        """
+        if self._initial:
+            return True
+
+        if not self._pending:
+            return False
+
+        now = time.monotonic()
+        return (
+            now - self._last_mark >= self.debounce or now - self._first_mark >= self.max_staleness
+        )
+
+    def consume(self) -> frozenset[str]:
+        """
+        Clear the pending sources, before running the model.
+        :returns: The sources that were pending.
+        """
+        pending = self.pending
+
+        self._pending.clear()
+        self._first_mark = None
+        self._last_mark = None
+        self._initial = False
+
+        return pending
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}(pending={sorted(self._pending)}, "
+            f"debounce={self.debounce}, max_staleness={self.max_staleness})"
+        )
@@ -8,9 +8,12 @@ from ..api.response_objects import Channel, Session, SessionFailure
 from ..components.messages.message_format import MessageFormat
 from .balance import Balance
 from .logs import configure_logging
+from .metrics import address_metrics
 
 CHANNELS_OPS = Gauge("ct_channel_operation", "Channel operation", ["op", "success"])
-SESSION_OPS = Gauge("ct_session_operation", "Session operation", ["relayer", "op", "success"])
+SESSION_OPS = address_metrics.register(
+    Gauge, "ct_session_operation", "Session operation", ["relayer", "op", "success"], "relayer"
+)
 
 
 configure_logging()
@@ -102,11 +105,15 @@ class NodeHelper:
         match session:
             case Session():
                 logger.info("Opened session", {**logs_params, **session.as_dict})
-                SESSION_OPS.labels(relayer, "opened", "yes").inc()
+                address_metrics.labels(
+                    SESSION_OPS, relayer=relayer, op="opened", success="yes"
+                ).inc()
                 return session
             case SessionFailure():
                 logger.warning("Failed to open a session", {**logs_params, **session.as_dict})
-                SESSION_OPS.labels(relayer, "opened", "no").inc()
+                address_metrics.labels(
+                    SESSION_OPS, relayer=relayer, op="opened", success="no"
+                ).inc()
                 return None
 
     @classmethod
@@ -166,7 +173,9 @@ class NodeHelper:
             logger.warning("Failed to close the session", logs_params)
 
         if relayer:
-            SESSION_OPS.labels(relayer, "closed", "yes" if ok else "no").inc()
+            address_metrics.labels(
+                SESSION_OPS, relayer=relayer, op="closed", success="yes" if ok else "no"
+            ).inc()
 
         return ok
 
@@ -2,21 +2,15 @@ import asyncio
 import random
 from typing import Optional
 
-from prometheus_client import Gauge
-
-from ..subgraph.entries.safe import Safe
+from ..subgraph.entries.safe import SafeView
 from .address import Address
 from .asyncloop import AsyncLoop
 from .balance import Balance
 from .config_parser.parameters import Parameters
 from .decorators import keepalive
+from .eligibility import EligibilityFilter
 from .messages import MessageFormat, MessageQueue
 
-CHANNEL_STAKE = Gauge("ct_peer_channels_balance", "Balance in outgoing channels", ["address"])
-DELAY = Gauge("ct_peer_delay", "Delay between two messages", ["address"])
-NODES_LINKED_TO_SAFE_COUNT = Gauge(
-    "ct_peer_safe_count", "Number of nodes linked to the safes", ["address", "safe"]
-)
 SECONDS_IN_A_NON_LEAP_YEAR = 365 * 24 * 60 * 60
 
 
@@ -24,6 +18,8 @@ class Peer:
     """
     Representation of a peer in the network. A peer is a node that is part of the network and not
     hosted by HOPR.
+
+    Properties are pure, the peer metrics are published once per economic model run.
     """
 
     def __init__(self, address: str):
@@ -34,26 +30,15 @@ class Peer:
         """
         self.address = Address(address)
 
-        self.safe: Optional[Safe] = None
+        self.safe: Optional[SafeView] = None
         self._safe_address_count: Optional[int] = None
-        self._channel_balance: Optional[Balance] = None
+        self.channel_balance: Optional[Balance] = None
 
         self.yearly_message_count: Optional[int] = 0
 
         self.params: Optional[Parameters] = None
         self.running: bool = False
 
-    @property
-    def channel_balance(self) -> Balance:
-        return self._channel_balance
-
-    @channel_balance.setter
-    def channel_balance(self, value: Balance):
-        self._channel_balance = value
-        CHANNEL_STAKE.labels(self.address.native).set(
-            float(value.value if value is not None else 0)
-        )
-
     @property
     def node_address(self) -> str:
         return self.address.native
@@ -68,7 +53,6 @@ class Peer:
     @safe_address_count.setter
     def safe_address_count(self, value: int):
         self._safe_address_count = value
-        NODES_LINKED_TO_SAFE_COUNT.labels(self.address.native, self.safe.address).set(value)
 
     @property
     def split_stake(self) -> Balance:
@@ -85,15 +69,11 @@ class Peer:
 
     @property
     def message_delay(self) -> Optional[float]:
-        value = None
-        if self.yearly_message_count is not None and self.yearly_message_count > 0:
-            value = (
-                SECONDS_IN_A_NON_LEAP_YEAR / self.yearly_message_count * 2
-            )  # to account for the loopback session behavior
-
-        DELAY.labels(self.address.native).set(value if value is not None else 0)
+        if self.yearly_message_count is None or self.yearly_message_count <= 0:
+            return None
 
-        return value
+        # to account for the loopback session behavior
+        return SECONDS_IN_A_NON_LEAP_YEAR / self.yearly_message_count * 2
 
     def is_eligible(
         self,
@@ -104,29 +84,10 @@ class Peer:
         ct_nodes: list[str],
         exclusion_list: list[str],
     ) -> bool:
-        try:
-            if self.address.native in exclusion_list:
-                return False
-
-            if self.address.native in ct_nodes:
-                return False
-
-            if self.safe.allowance < min_allowance:
-                return False
-
-            if (
-                self.safe.address not in nft_holders
-                and nft_threshold
-                and self.split_stake < nft_threshold
-            ):
-                return False
-
-            if self.split_stake < min_stake:
-                return False
-        except Exception:
-            return False
-
-        return True
+        eligibility = EligibilityFilter(
+            min_allowance, min_stake, nft_holders, nft_threshold, ct_nodes, exclusion_list
+        )
+        return eligibility.rejection(self) is None
 
     @keepalive
     async def message_relay_request(self):
@@ -0,0 +1,135 @@
+"""
+Peer history - timestamps of the peers seen by the node, indexed by time.
+
+The history behaves like a `dict[str, datetime]` (address -> last recorded timestamp), but
+also keeps a min-heap ordered by timestamp. This allows the channel maintenance to find the
+aged entries in O(k log n) instead of scanning every open channel, and to drop entries that
+are no longer relevant so memory stays flat on long-running nodes with high peer churn.
+
+Heap entries are invalidated lazily: when an address is updated or removed, its previous
+heap entry is left in place and skipped when reached. The heap is rebuilt from the dict
+whenever stale entries outnumber the live ones.
+"""
+
+import heapq
+from datetime import datetime
+from typing import Iterable, Iterator, Mapping, Optional
+
+DEFAULT_MAX_SIZE = 100_000
+
+
+class PeerHistory:
+    """
+    Bounded, time-ordered mapping of peer addresses to timestamps.
+
+    Thread Safety:
+        Safe for asyncio single-threaded environment. All operations are synchronous.
+    """
+
+    def __init__(self, max_size: Optional[int] = DEFAULT_MAX_SIZE):
+        """
+        Initialize the history.
+
+        Args:
+            max_size: Maximum number of addresses kept. When exceeded, the oldest entries are
+                evicted first. None disables the bound.
+        """
+        self.max_size = max_size
+
+        self._timestamps: dict[str, datetime] = {}
+        self._heap: list[tuple[datetime, str]] = []
+
+    def get(self, address: str, default: Optional[datetime] = None) -> Optional[datetime]:
+        return self._timestamps.get(address, default)
+
+    def update(self, items: Mapping[str, datetime]) -> None:
+        """
+        Record the timestamps of multiple addresses, overriding existing ones.
+        """
+        for address, timestamp in items.items():
+            self._set(address, timestamp)
+
+        self._enforce_max_size()
+        self._compact()
+
+    def remove(self, addresses: Iterable[str]) -> None:
+        """
+        Remove addresses from the history. Unknown addresses are ignored.
+        """
+        for address in addresses:
+            self._timestamps.pop(address, None)
+
+        self._compact()
+
+    def older_than(self, cutoff: datetime) -> list[str]:
+        """
+        Get the addresses whose timestamp is lower or equal to the cutoff, oldest first.
+
+        Only the aged entries are visited: O(k log n) for k results in a history of size n.
+        """
+        aged: dict[str, None] = {}
+        kept: list[tuple[datetime, str]] = []
+
+        while self._heap and self._heap[0][0] <= cutoff:
+            entry = heapq.heappop(self._heap)
+            timestamp, address = entry
+
+            # stale entry, the address was updated or removed since this entry was pushed
+            if self._timestamps.get(address) != timestamp:
+                continue
+            kept.append(entry)
+            aged[address] = None
+
+        for entry in kept:
+            heapq.heappush(self._heap, entry)
+
+        return list(aged)
+
+    def _set(self, address: str, timestamp: datetime) -> None:
+        if self._timestamps.get(address) == timestamp:
+            return
+
+        self._timestamps[address] = timestamp
+        heapq.heappush(self._heap, (timestamp, address))
+
+    def _enforce_max_size(self) -> None:
+        if self.max_size is None:
+            return
+
+        while len(self._timestamps) > self.max_size and self._heap:
+            timestamp, address = heapq.heappop(self._heap)
+            if self._timestamps.get(address) == timestamp:
+                del self._timestamps[address]
+
+    def _compact(self) -> None:
+        """
+        Rebuild the heap from the live entries if it is mostly made of stale entries.
+        """
+        if len(self._heap) <= 2 * len(self._timestamps) + 64:
+            return
+
+        self._heap = [(timestamp, address) for address, timestamp in self._timestamps.items()]
+        heapq.heapify(self._heap)
+
+    def __getitem__(self, address: str) -> datetime:
+        return self._timestamps[address]
+
+    def __setitem__(self, address: str, timestamp: datetime) -> None:
+        self.update({address: timestamp})
+
+    def __contains__(self, address: object) -> bool:
+        return address in self._timestamps
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._timestamps)
+
+    def __len__(self) -> int:
+        return len(self._timestamps)
+
+    def __eq__(self, other):
+        if isinstance(other, PeerHistory):
+            return self._timestamps == other._timestamps
+        return self._timestamps == other
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(size={len(self)}, max_size={self.max_size})"
@@ -1,10 +1,15 @@
 import ast
 import logging
 import os
-from copy import deepcopy
+from typing import TYPE_CHECKING, Any
 
 from ..components.balance import Balance
 from ..components.logs import configure_logging
+from ..subgraph.entries.safe import SafeOverlay
+
+if TYPE_CHECKING:
+    from .data_index import DataIndex
+    from .peer import Peer
 
 configure_logging()
 logger = logging.getLogger(__name__)
@@ -15,103 +20,71 @@ class Utils:
     async def mergeDataSources(
         cls,
         outgoing_channel_balance: dict[str, Balance],
-        peers: list,
-        nodes: list,
-        allocations: list,
-        eoa_balances: dict,
-    ):
-        # Pre-index nodes by address for O(1) lookup
-        nodes_by_address = {}
-        for node in nodes:
-            if node and hasattr(node, "address") and node.address:
-                nodes_by_address[node.address.lower()] = node
-
-        # Pre-index allocations by safe address for O(1) lookup
-        allocations_by_safe: dict[str, list] = {}
-        for allocation in allocations:
-            if hasattr(allocation, "linked_safes"):
-                for safe_addr in allocation.linked_safes:
-                    if safe_addr not in allocations_by_safe:
-                        allocations_by_safe[safe_addr] = []
-                    allocations_by_safe[safe_addr].append(allocation)
-
-        # Pre-index eoa_balances by safe address for O(1) lookup
-        eoa_balances_by_safe: dict[str, list] = {}
-        for eoa_balance in eoa_balances:
-            if hasattr(eoa_balance, "linked_safes"):
-                for safe_addr in eoa_balance.linked_safes:
-                    if safe_addr not in eoa_balances_by_safe:
-                        eoa_balances_by_safe[safe_addr] = []
-                    eoa_balances_by_safe[safe_addr].append(eoa_balance)
-
-        # Now process peers with O(1) lookups
+        peers: list["Peer"],
+        index: "DataIndex",
+    ) -> None:
+        """
+        Attach to each peer its safe and channel balance, looking up the registered nodes and
+        the additional balances in the data index. The peers of each safe are counted in the
+        index along the way, see `allowManyNodePerSafe`.
+        """
+        node_count_by_safe: dict[str, int] = {}
+        index.node_count_by_safe = node_count_by_safe
+
         for peer in peers:
             balance = outgoing_channel_balance.get(peer.address.native, None)
 
-            node = (
-                nodes_by_address.get(peer.node_address.lower(), None)
-                if hasattr(peer, "node_address")
-                else None
-            )
+            node = index.node(peer.node_address) if hasattr(peer, "node_address") else None
 
-            if node is None or not hasattr(node, "safe"):
-                continue
+            if node is not None and hasattr(node, "safe"):
+                # the shared safe snapshot is never copied, only the overlay is renewed on change
+                additional_balance = index.additional_balance(node.safe.address)
+                if not (
+                    isinstance(peer.safe, SafeOverlay)
+                    and peer.safe.snapshot is node.safe
+                    and peer.safe.additional_balance.wei == additional_balance.wei
+                ):
+                    peer.safe = SafeOverlay(node.safe, additional_balance)
 
-            peer.safe = deepcopy(node.safe)
-            peer.safe.additional_balance = Balance.zero("wxHOPR")
+                if balance is not None:
+                    peer.channel_balance = balance
+                else:
+                    peer.yearly_message_count = None
 
-            # O(1) allocation lookup
-            safe_allocations = allocations_by_safe.get(peer.safe.address, [])
-            for allocation in safe_allocations:
-                peer.safe.additional_balance += (
-                    allocation.unclaimed_amount / allocation.num_linked_safes
-                )
-
-            # O(1) eoa_balance lookup
-            safe_eoa_balances = eoa_balances_by_safe.get(peer.safe.address, [])
-            for eoa_balance in safe_eoa_balances:
-                peer.safe.additional_balance += eoa_balance.amount / eoa_balance.num_linked_safes
-
-            if balance is not None:
-                peer.channel_balance = balance
-            else:
-                peer.yearly_message_count = None
+            if peer.safe:
+                address = peer.safe.address
+                node_count_by_safe[address] = node_count_by_safe.get(address, 0) + 1
 
     @classmethod
     def associateEntitiesToNodes(cls, entities, nodes):
-        entity_addresses = [e.address for e in entities]
+        """
+        Link the entities (allocations, EOA balances) to the safes owned by their address. Only
+        the first entity of an address is linked.
+        """
+        entity_by_owner: dict[str, Any] = {}
+        for entity in entities:
+            entity_by_owner.setdefault(entity.address, entity)
+
         for n in nodes:
             if not n.safe:
                 continue
             for owner in n.safe.owners:
-                try:
-                    index = entity_addresses.index(owner)
-                except ValueError:
-                    continue
-
-                entities[index].linked_safes.add(n.safe.address)
+                if owner in entity_by_owner:
+                    entity_by_owner[owner].linked_safes.add(n.safe.address)
 
     @classmethod
-    def allowManyNodePerSafe(cls, peers: list):
+    def allowManyNodePerSafe(cls, peers: list, index: "DataIndex"):
         """
         Split the stake managed by a safe address equaly between the nodes
         that the safe manages.
         :param peer: list of peers
+        :param index: The data index, with the peers of each safe counted by `mergeDataSources`.
         :returns: nothing.
         """
-        safe_counts = {peer.safe.address: 0 for peer in peers if peer.safe}
-
-        # Calculate the number of safe_addresses related to a node address
-        for peer in peers:
-            if not peer.safe:
-                continue
-            safe_counts[peer.safe.address] += 1
-
-        # Update the input_dict with the calculated splitted_stake
         for peer in peers:
             if not peer.safe:
                 continue
-            peer.safe_address_count = safe_counts[peer.safe.address]
+            peer.safe_address_count = index.node_count_by_safe.get(peer.safe.address, 1)
 
     @classmethod
     async def balanceInChannels(cls, channels: list) -> dict[str, Balance]:
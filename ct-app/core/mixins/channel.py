@@ -1,5 +1,5 @@
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Optional
 
 from prometheus_client import Gauge
@@ -10,7 +10,7 @@ from ..components.decorators import connectguard, keepalive, master
 from ..components.logs import configure_logging
 from ..components.node_helper import NodeHelper
 from ..components.utils import Utils
-from .protocols import HasAPI, HasChannels, HasParams, HasPeers
+from .protocols import HasAPI, HasChannels, HasModelTrigger, HasParams, HasPeers
 
 CHANNELS = Gauge("ct_channels", "Node channels", ["direction"])
 CHANNEL_FUNDS = Gauge("ct_channel_funds", "Total funds in out. channels")
@@ -20,7 +20,7 @@ configure_logging()
 logger = logging.getLogger(__name__)
 
 
-class ChannelMixin(HasAPI, HasChannels, HasParams, HasPeers):
+class ChannelMixin(HasAPI, HasChannels, HasModelTrigger, HasParams, HasPeers):
     @property
     def outgoing_open_channels(self) -> list:
         """Cached list of open outgoing channels."""
@@ -128,7 +128,9 @@ class ChannelMixin(HasAPI, HasChannels, HasParams, HasPeers):
             {"incoming": incoming_count, "outgoing": outgoing_count},
         )
 
-        self.topology_data = await Utils.balanceInChannels(channels.all)
+        topology = await Utils.balanceInChannels(channels.all)
+        if self.model_trigger.mark_if_changed("retrieve_channels", self.topology_data, topology):
+            self.topology_data = topology
         logger.info("Fetched all topology links", {"count": len(self.topology_data)})
         TOPOLOGY_SIZE.set(len(self.topology_data))
 
@@ -164,29 +166,30 @@ class ChannelMixin(HasAPI, HasChannels, HasParams, HasPeers):
     async def close_old_channels(self):
         """
         Close channels that have been open for too long.
+        Aged entries are read from the time-ordered peer history, and entries aged without an
+        open channel are dropped from the history.
         """
         if self.channels is None:
             return
 
-        peer_history: dict[str, datetime] = self.peer_history
-        to_peer_history = dict[str, datetime]()
-        channels_to_close: list[str] = []
+        now = datetime.now()
+        cutoff = now - timedelta(seconds=self.params.channel.max_age_seconds)
 
         address_to_channel = self.address_to_open_channel  # Use cached property
 
-        for address, channel in address_to_channel.items():
-            timestamp = peer_history.get(address, None)
-
-            if timestamp is None:
-                to_peer_history[address] = datetime.now()
-                continue
-
-            if (datetime.now() - timestamp).total_seconds() < self.params.channel.max_age_seconds:
-                continue
-
-            channels_to_close.append(channel)
+        self.peer_history.update(
+            {address: now for address in address_to_channel if address not in self.peer_history}
+        )
 
-        self.peer_history.update(to_peer_history)
+        aged_addresses = self.peer_history.older_than(cutoff)
+        channels_to_close = [
+            address_to_channel[address]
+            for address in aged_addresses
+            if address in address_to_channel
+        ]
+        self.peer_history.remove(
+            address for address in aged_addresses if address not in address_to_channel
+        )
 
         logger.debug(
             "Starting closure of dangling channels open with peer visible for too long",
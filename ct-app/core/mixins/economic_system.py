@@ -1,15 +1,18 @@
 import logging
 from decimal import Decimal
 
+import numpy as np
 from prometheus_client import Gauge
 
 from ..components.balance import Balance
-from ..components.config_parser.economic_model import LegacyParams, SigmoidParams
 from ..components.decorators import keepalive
+from ..components.eligibility import EligibilityFilter
 from ..components.logs import configure_logging
+from ..components.metrics import address_metrics
 from ..components.utils import Utils
 from .protocols import (
     HasChannels,
+    HasModelTrigger,
     HasNFT,
     HasParams,
     HasPeers,
@@ -19,8 +22,43 @@ from .protocols import (
 )
 
 ELIGIBLE_PEERS = Gauge("ct_eligible_peers", "# of eligible peers for rewards")
-MESSAGE_COUNT = Gauge(
-    "ct_message_count", "messages one should receive / year", ["address", "model"]
+ECONOMIC_SECURITY = Gauge("ct_economic_security", "Share of the token supply staked by peers")
+NETWORK_CAPACITY = Gauge("ct_network_capacity", "Share of the network capacity in use")
+SIGMOID_APR = Gauge("ct_sigmoid_apr", "APR of the sigmoid model")
+MESSAGE_COUNT = address_metrics.register(
+    Gauge,
+    "ct_message_count",
+    "messages one should receive / year",
+    ["address", "model"],
+    "address",
+    distribution=[1e3, 1e4, 1e5, 1e6, 1e7, 1e8],
+)
+CHANNEL_STAKE = address_metrics.register(
+    Gauge,
+    "ct_peer_channels_balance",
+    "Balance in outgoing channels",
+    ["address"],
+    "address",
+    distribution=[10, 100, 1e3, 1e4, 1e5],
+)
+DELAY = address_metrics.register(
+    Gauge,
+    "ct_peer_delay",
+    "Delay between two messages",
+    ["address"],
+    "address",
+    additive=False,
+    distribution=[60, 300, 900, 3600, 6 * 3600, 24 * 3600],
+)
+NODES_LINKED_TO_SAFE_COUNT = address_metrics.register(
+    Gauge,
+    "ct_peer_safe_count",
+    "Number of nodes linked to the safes",
+    ["address", "safe"],
+    "address",
+    linked_labels=["safe"],
+    additive=False,
+    distribution=[1, 2, 3, 5, 10],
 )
 
 configure_logging()
@@ -28,81 +66,71 @@ logger = logging.getLogger(__name__)
 
 
 class EconomicSystemMixin(
-    HasChannels, HasNFT, HasParams, HasPeers, HasRPCs, HasSession, HasSubgraphs
+    HasChannels, HasModelTrigger, HasNFT, HasParams, HasPeers, HasRPCs, HasSession, HasSubgraphs
 ):
     @keepalive
     async def apply_economic_model(self):
         """
         Applies the economic model to the eligible peers (after multiple filtering layers).
+        Only runs when the data keepalives marked new inputs, see `ModelTrigger`.
         """
+        if not self.model_trigger.due():
+            return
 
         if not all([len(self.topology_data), len(self.registered_nodes_data), len(self.peers)]):
+            # the pending sources are kept for the next complete run
             logger.warning("Not enough data to apply economic model")
             return
 
-        Utils.associateEntitiesToNodes(self.allocations_data, self.registered_nodes_data)
-        Utils.associateEntitiesToNodes(self.eoa_balances_data, self.registered_nodes_data)
+        sources = self.model_trigger.consume()
+        logger.debug("Applying economic model", {"sources": sorted(sources)})
 
-        await Utils.mergeDataSources(
-            self.topology_data,
-            self.peers,
-            self.registered_nodes_data,
-            self.allocations_data,
-            self.eoa_balances_data,
+        self.data_index.sync(
+            self.registered_nodes_data, self.allocations_data, self.eoa_balances_data
         )
 
-        Utils.allowManyNodePerSafe(self.peers)
+        await Utils.mergeDataSources(self.topology_data, self.peers, self.data_index)
 
-        for p in self.peers:
-            if not p.is_eligible(
-                self.params.economic_model.min_safe_allowance,
-                self.params.economic_model.legacy.coefficients.lowerbound,
-                self.nft_holders_data,
-                self.params.economic_model.nft_threshold,
-                self.params.sessions.blue_destinations + self.params.sessions.green_destinations,
-                self.params.peer.excluded_peers,
-            ):
-                p.yearly_message_count = None
+        Utils.allowManyNodePerSafe(self.peers, self.data_index)
 
-        economic_security = (
-            sum(
-                [p.split_stake for p in self.peers if p.yearly_message_count is not None],
-                Balance.zero("wxHOPR"),
-            )
-            / self.params.economic_model.sigmoid.total_token_supply
-        )
-        network_capacity = Decimal(
-            len([p for p in self.peers if p.yearly_message_count is not None])
-            / self.params.economic_model.sigmoid.network_capacity
+        eligibility = EligibilityFilter(
+            self.params.economic_model.min_safe_allowance,
+            self.params.economic_model.legacy.coefficients.lowerbound,
+            self.nft_holders_data,
+            self.params.economic_model.nft_threshold,
+            self.params.sessions.blue_destinations + self.params.sessions.green_destinations,
+            self.params.peer.excluded_peers,
         )
+        eligible_peers = eligibility.apply(self.peers)
+        eligibility.publish()
 
-        message_count = {model: 0 for model in self.params.economic_model.models}
-        model_input = {model: None for model in self.params.economic_model.models}
+        eligible_set = set(eligible_peers)
+        for p in self.peers:
+            if p not in eligible_set:
+                p.yearly_message_count = None
 
-        model_input[SigmoidParams] = [economic_security, network_capacity]
+        economic_security, network_capacity, sigmoid_apr = self._network_terms(eligible_peers)
 
-        for peer in self.peers:
-            if peer.yearly_message_count is None:
-                continue
+        fingerprints = self._economic_model_fingerprints(
+            eligible_peers, economic_security, network_capacity
+        )
+        changed = set(self.economic_model_cache.changed(fingerprints))
+        changed_peers = [p for p in eligible_peers if p.address.native in changed]
 
-            model_input[LegacyParams] = self.peers_rewards_data.get(
-                peer.address.native, Balance.zero("wxHOPR")
-            )
+        if changed_peers:
+            self._compute_message_counts(changed_peers, fingerprints, sigmoid_apr)
 
-            for model, name in self.params.economic_model.models.items():
-                message_count[model] = getattr(
-                    self.params.economic_model, name
-                ).yearly_message_count(
-                    peer.split_stake,
-                    self.ticket_price,
-                    model_input[model],
-                ) / (
-                    len(self.session_destinations) + 1
-                )
+        self.economic_model_cache.retain(fingerprints)
 
-                MESSAGE_COUNT.labels(peer.address.native, name).set(message_count[model])
+        for peer in eligible_peers:
+            peer.yearly_message_count = sum(
+                self.economic_model_cache.counts(peer.address.native).values()
+            )
 
-            peer.yearly_message_count = sum(message_count.values())
+        logger.debug(
+            "Recomputed the economic model",
+            {"changed": len(changed_peers), "cached": len(eligible_peers) - len(changed_peers)},
+        )
 
         eligible_count = sum([p.yearly_message_count is not None for p in self.peers])
         expected_rate = sum(
@@ -113,3 +141,123 @@ class EconomicSystemMixin(
             {"count": eligible_count, "expected_rate": expected_rate},
         )
         ELIGIBLE_PEERS.set(eligible_count)
+
+        self._publish_peer_metrics(eligible_peers)
+
+    def _publish_peer_metrics(self, eligible_peers: list):
+        """
+        Export a snapshot of the peers state, once per run. Peers without a value (no channel,
+        no messages to relay) have no series.
+        """
+        for name in self.params.economic_model.models.values():
+            address_metrics.publish(
+                MESSAGE_COUNT,
+                {
+                    p.address.native: self.economic_model_cache.counts(p.address.native)[name]
+                    for p in eligible_peers
+                },
+                model=name,
+            )
+
+        address_metrics.publish(
+            CHANNEL_STAKE,
+            {
+                p.address.native: float(p.channel_balance.value)
+                for p in self.peers
+                if p.channel_balance is not None
+            },
+        )
+        address_metrics.publish(
+            DELAY,
+            {p.address.native: delay for p in self.peers if (delay := p.message_delay) is not None},
+        )
+
+        safe_counts: dict[str, float] = {}
+        safes: dict[str, dict[str, str]] = {}
+        for p in self.peers:
+            if p.safe is not None:
+                safe_counts[p.address.native] = p.safe_address_count
+                safes[p.address.native] = {"safe": p.safe.address}
+        address_metrics.publish(NODES_LINKED_TO_SAFE_COUNT, safe_counts, linked=safes)
+
+    def _network_terms(self, peers: list) -> tuple[Decimal, Decimal, float]:
+        """
+        Global stage of the economic model: the terms that only depend on the network as a
+        whole, computed once per run.
+        :returns: The economic security, the network capacity and the sigmoid APR.
+        """
+        sigmoid = self.params.economic_model.sigmoid
+
+        economic_security = (
+            sum([p.split_stake for p in peers], Balance.zero("wxHOPR")) / sigmoid.total_token_supply
+        )
+        network_capacity = Decimal(len(peers) / sigmoid.network_capacity)
+        sigmoid_apr = sigmoid.network_apr([economic_security, network_capacity])
+
+        ECONOMIC_SECURITY.set(float(economic_security))
+        NETWORK_CAPACITY.set(float(network_capacity))
+        SIGMOID_APR.set(sigmoid_apr)
+
+        return economic_security, network_capacity, sigmoid_apr
+
+    def _economic_model_fingerprints(
+        self, peers: list, economic_security: Decimal, network_capacity: Decimal
+    ) -> dict[str, tuple]:
+        """
+        Build the fingerprint of the economic model inputs of each peer. The network-wide terms
+        are part of every fingerprint, so that a change in them invalidates all peers.
+        """
+        zero = Balance.zero("wxHOPR")
+        network_terms = (
+            self.ticket_price.value.wei if self.ticket_price is not None else None,
+            economic_security,
+            network_capacity,
+            len(self.session_destinations),
+        )
+
+        return {
+            p.address.native: (
+                p.channel_balance.wei,
+                p.safe.balance.wei,
+                p.safe.allowance.wei,
+                p.safe.additional_balance.wei,
+                p.safe_address_count,
+                self.peers_rewards_data.get(p.address.native, zero).wei,
+                network_terms,
+            )
+            for p in peers
+        }
+
+    def _compute_message_counts(
+        self, peers: list, fingerprints: dict[str, tuple], sigmoid_apr: float
+    ):
+        """
+        Per-peer stage of the economic model: evaluate the models for the given peers, and
+        store the results in the cache.
+        """
+        stakes = np.fromiter(
+            (float(p.split_stake.value) for p in peers),
+            dtype=np.float64,
+            count=len(peers),
+        )
+        redeemed_rewards = np.fromiter(
+            (
+                float(self.peers_rewards_data.get(p.address.native, Balance.zero("wxHOPR")).value)
+                for p in peers
+            ),
+            dtype=np.float64,
+            count=len(peers),
+        )
+
+        message_counts = {
+            name: (counts / (len(self.session_destinations) + 1)).tolist()
+            for name, counts in self.params.economic_model.yearly_message_counts(
+                stakes, self.ticket_price, redeemed_rewards, sigmoid_apr
+            ).items()
+        }
+
+        for idx, peer in enumerate(peers):
+            address = peer.address.native
+            counts = {name: values[idx] for name, values in message_counts.items()}
+
+            self.economic_model_cache.store(address, fingerprints[address], counts)
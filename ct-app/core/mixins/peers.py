@@ -5,8 +5,9 @@ from prometheus_client import Gauge
 
 from ..components.decorators import connectguard, keepalive, master
 from ..components.logs import configure_logging
+from ..components.metrics import address_metrics
 from ..components.peer import Peer
-from .protocols import HasAPI, HasPeers
+from .protocols import HasAPI, HasModelTrigger, HasPeers
 
 PEERS_COUNT = Gauge("ct_peers_count", "Node peers")
 UNIQUE_PEERS = Gauge("ct_unique_peers", "Unique peers", ["type"])
@@ -15,7 +16,7 @@ configure_logging()
 logger = logging.getLogger(__name__)
 
 
-class PeersMixin(HasAPI, HasPeers):
+class PeersMixin(HasAPI, HasModelTrigger, HasPeers):
     @master(keepalive, connectguard)
     async def retrieve_peers(self):
         """
@@ -30,6 +31,8 @@ class PeersMixin(HasAPI, HasPeers):
         self.peer_history.update({item.address.native: datetime.now() for item in visible_peers})
 
         counts = {"new": 0, "known": 0, "unreachable": 0}
+        reactivated = 0
+        unreachable = list[str]()
 
         for peer in self.peers:
             # if peer is still visible
@@ -37,12 +40,14 @@ class PeersMixin(HasAPI, HasPeers):
                 if peer.yearly_message_count is None:
                     peer.yearly_message_count = 0
                     peer.start_async_processes()
+                    reactivated += 1
                 counts["known"] += 1
 
             # if peer is not visible anymore
             else:
                 peer.yearly_message_count = None
                 peer.running = False
+                unreachable.append(peer.address.native)
                 counts["unreachable"] += 1
 
         # if peer is new
@@ -58,6 +63,12 @@ class PeersMixin(HasAPI, HasPeers):
         if counts["new"] > 0 or counts["unreachable"] > 0:
             self.invalidate_peer_cache()
 
+        if counts["new"] > 0 or counts["unreachable"] > 0 or reactivated > 0:
+            self.model_trigger.mark("retrieve_peers")
+
+        # series of the peers that are gone would otherwise be exported forever
+        address_metrics.evict(unreachable)
+
         logger.info("Retrieved visible peers", counts)
 
         PEERS_COUNT.set(len(self.peers))
@@ -1,4 +1,3 @@
-from datetime import datetime
 from typing import Optional, Protocol
 
 from ..api.hoprd_api import HoprdAPI
@@ -6,10 +5,16 @@ from ..api.response_objects import Channels, Session
 from ..components.address import Address
 from ..components.balance import Balance
 from ..components.config_parser.parameters import Parameters
+from ..components.data_index import DataIndex
+from ..components.economic_model_cache import EconomicModelCache
+from ..components.http_session import PooledSession
+from ..components.model_trigger import ModelTrigger
 from ..components.peer import Peer
+from ..components.peer_history import PeerHistory
 from ..components.session_rate_limiter import SessionRateLimiter
+from ..rpc.call_cache import CallCache
 from ..rpc.entries import Allocation, ExternalBalance
-from ..subgraph import GraphQLProvider, Type
+from ..subgraph import GraphQLBatch, GraphQLProvider, Type
 from ..subgraph.entries import Node
 
 
@@ -24,6 +29,10 @@ class HasChannels(Protocol):
     topology_data: dict[str, Balance]
 
 
+class HasModelTrigger(Protocol):
+    model_trigger: ModelTrigger
+
+
 class HasNFT(Protocol):
     nft_holders_data: list[str]
 
@@ -34,7 +43,8 @@ class HasParams(Protocol):
 
 class HasPeers(Protocol):
     peers: set[Peer]
-    peer_history: dict[str, datetime]
+    peer_history: PeerHistory
+    economic_model_cache: EconomicModelCache
 
 
 class HasSession(Protocol):
@@ -47,9 +57,14 @@ class HasSession(Protocol):
 class HasRPCs(Protocol):
     allocations_data: list[Allocation]
     eoa_balances_data: list[ExternalBalance]
+    rpc_sessions: dict[str, PooledSession]
+    rpc_cache: CallCache
+    data_index: DataIndex
 
 
 class HasSubgraphs(Protocol):
     graphql_providers: dict[Type, GraphQLProvider]
+    graphql_batch: Optional[GraphQLBatch]
+    subgraph_session: PooledSession
     peers_rewards_data: dict[str, float]
     registered_nodes_data: list[Node]
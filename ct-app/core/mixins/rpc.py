@@ -1,8 +1,13 @@
+import asyncio
 import logging
+from typing import Optional, TypeVar
 
 from ..components.asyncloop import AsyncLoop
 from ..components.decorators import keepalive
+from ..components.http_session import PooledSession
 from ..components.logs import configure_logging
+from ..rpc.failover import RetryPolicy
+from ..rpc.multicall import MulticallProvider
 from ..rpc.providers import (
     GnosisDistributor,
     HOPRBalance,
@@ -10,14 +15,100 @@ from ..rpc.providers import (
     wxHOPRBalance,
     xHOPRBalance,
 )
-from ..rpc.query_provider import BalanceProvider, ProviderError
-from .protocols import HasParams, HasRPCs
+from ..rpc.query_provider import (
+    BalanceProvider,
+    BlockNumberProvider,
+    DistributorProvider,
+    ETHCallRPCProvider,
+    ProviderError,
+    RPCQueryProvider,
+)
+from .protocols import HasModelTrigger, HasParams, HasRPCs
 
 configure_logging()
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T", bound=RPCQueryProvider)
+
+
+class RPCMixin(HasModelTrigger, HasParams, HasRPCs):
+    def rpc_session(self, chain: str) -> PooledSession:
+        """
+        Gets the pooled session of an RPC endpoint, shared by all the providers of the endpoint,
+        whatever the URL they use.
+        """
+        if chain not in self.rpc_sessions:
+            self.rpc_sessions[chain] = PooledSession.fromParams(self.params.rpc.connection)
+        return self.rpc_sessions[chain]
+
+    def rpc_provider(self, cls: type[T], chain: str) -> T:
+        """
+        Creates an RPC provider on the URLs of a chain (`gnosis` or `mainnet`).
+        """
+        return cls(
+            getattr(self.params.rpc, chain),
+            self.rpc_session(chain),
+            RetryPolicy.fromParams(self.params.rpc.retry),
+        )
+
+    async def rpc_head(self, chain: str) -> Optional[int]:
+        """
+        Gets the current block of a chain.
+        :return: The block number, or None if it could not be fetched.
+        """
+        try:
+            return await self.rpc_provider(BlockNumberProvider, chain).block_number()
+        except ProviderError as e:
+            logger.warning("Error fetching block number", {"chain": chain, "error": str(e)})
+            return None
+
+    async def eth_calls(
+        self, requests: list[tuple[str, ETHCallRPCProvider, list[tuple[str, str]]]]
+    ) -> list[list[str]]:
+        """
+        Gets the results of eth_calls. Results fetched within the block window of the current
+        head of their chain are served from the cache, the others are aggregated through
+        Multicall3 or sent as JSON-RPC batches.
+        :param requests: The chain and provider of the calls, with their (to, data) pairs.
+        :return: The results of the calls of each request.
+        """
+        chains = sorted({chain for chain, _, _ in requests if self.rpc_cache.enabled(chain)})
+        heads: dict[str, Optional[int]] = {chain: None for chain, _, _ in requests}
+        heads.update(zip(chains, await asyncio.gather(*map(self.rpc_head, chains))))
+
+        results: list[list[Optional[str]]] = [
+            [self.rpc_cache.get(chain, to, data, heads[chain]) for to, data in calls]
+            for chain, _, calls in requests
+        ]
+        missing = [
+            [idx for idx, result in enumerate(request_results) if result is None]
+            for request_results in results
+        ]
+        to_fetch = [
+            (provider, [calls[idx] for idx in indices])
+            for (_, provider, calls), indices in zip(requests, missing)
+        ]
+
+        max_size: int = self.params.rpc.max_batch_size
+        if self.params.rpc.multicall:
+            fetched = await MulticallProvider.gather(
+                [(provider, calls) for provider, calls in to_fetch if calls], max_size
+            )
+        else:
+            fetched = await AsyncLoop.gather_any(
+                [provider.get_batch(calls, max_size) for provider, calls in to_fetch if calls]
+            )
+
+        fetched_results = iter(fetched)
+        for (chain, _, calls), indices, request_results in zip(requests, missing, results):
+            if not indices:
+                continue
+            for idx, result in zip(indices, next(fetched_results)):
+                request_results[idx] = result
+                self.rpc_cache.store(chain, *calls[idx], result, heads[chain])
+
+        return results  # ty: ignore[invalid-return-type]
 
-class RPCMixin(HasParams, HasRPCs):
     @keepalive
     async def allocations(self):
         """
@@ -28,24 +119,35 @@ class RPCMixin(HasParams, HasRPCs):
         addresses: list[str] = self.params.investors.addresses
         schedule: str = self.params.investors.schedule
 
-        providers = [
-            GnosisDistributor(self.params.rpc.gnosis),
-            MainnetDistributor(self.params.rpc.mainnet),
+        providers: list[tuple[str, DistributorProvider]] = [
+            ("gnosis", self.rpc_provider(GnosisDistributor, "gnosis")),
+            ("mainnet", self.rpc_provider(MainnetDistributor, "mainnet")),
         ]
 
-        futures = sum(
-            [
-                [provider.allocations(addr, schedule) for addr in addresses]
-                for provider in providers
-            ],
-            [],
-        )
-
         try:
-            self.allocations_data = await AsyncLoop.gather_any(futures)
+            results = await self.eth_calls(
+                [
+                    (
+                        chain,
+                        p,
+                        [(p.contract, p.allocations_data(addr, schedule)) for addr in addresses],
+                    )
+                    for chain, p in providers
+                ]
+            )
+            allocations = [
+                provider.to_allocation(addr, schedule, result)
+                for (_, provider), provider_results in zip(providers, results)
+                for addr, result in zip(addresses, provider_results)
+            ]
         except ProviderError as e:
+            # the previous snapshot is kept, and the model is not triggered
             logger.error("Error fetching investors allocations", {"error": str(e)})
-            self.allocations_data = []
+            return
+
+        # an unchanged snapshot is kept as is, so that the data index is not rebuilt
+        if self.model_trigger.mark_if_changed("allocations", self.allocations_data, allocations):
+            self.allocations_data = allocations
 
         logger.info("Fetched investors allocations", {"counts": len(self.allocations_data)})
 
@@ -56,20 +158,30 @@ class RPCMixin(HasParams, HasRPCs):
         """
         addresses: list[str] = self.params.investors.addresses
 
-        providers: list[BalanceProvider] = [
-            HOPRBalance(self.params.rpc.mainnet),
-            xHOPRBalance(self.params.rpc.gnosis),
-            wxHOPRBalance(self.params.rpc.gnosis),
+        providers: list[tuple[str, BalanceProvider]] = [
+            ("mainnet", self.rpc_provider(HOPRBalance, "mainnet")),
+            ("gnosis", self.rpc_provider(xHOPRBalance, "gnosis")),
+            ("gnosis", self.rpc_provider(wxHOPRBalance, "gnosis")),
         ]
 
-        futures = sum(
-            [[provider.balance_of(addr) for addr in addresses] for provider in providers], []
-        )
-
         try:
-            self.eoa_balances_data = await AsyncLoop.gather_any(futures)
+            results = await self.eth_calls(
+                [
+                    (chain, p, [(p.token_contract, p.balance_of_data(addr)) for addr in addresses])
+                    for chain, p in providers
+                ]
+            )
+            eoa_balances = [
+                provider.to_balance(addr, result)
+                for (_, provider), provider_results in zip(providers, results)
+                for addr, result in zip(addresses, provider_results)
+            ]
         except ProviderError as e:
+            # the previous snapshot is kept, and the model is not triggered
             logger.error("Error fetching investors EOA balances", {"error": str(e)})
-            self.eoa_balances_data = []
+            return
+
+        if self.model_trigger.mark_if_changed("eoa_balances", self.eoa_balances_data, eoa_balances):
+            self.eoa_balances_data = eoa_balances
 
         logger.info("Fetched investors EOA balances", {"count": len(self.eoa_balances_data)})
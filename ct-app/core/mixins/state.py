@@ -1,12 +1,14 @@
 import asyncio
 import logging
+from typing import Optional
 
 from prometheus_client import Gauge
 
+from ..api.response_objects import TicketPrice
 from ..components.address import Address
 from ..components.decorators import connectguard, keepalive, master
 from ..components.logs import configure_logging
-from .protocols import HasAPI, HasParams, HasSession
+from .protocols import HasAPI, HasModelTrigger, HasParams, HasSession
 
 BALANCE = Gauge("ct_balance", "Node balance", ["token"])
 HEALTH = Gauge("ct_node_health", "Node health")
@@ -17,7 +19,9 @@ configure_logging()
 logger = logging.getLogger(__name__)
 
 
-class StateMixin(HasAPI, HasParams, HasSession):
+class StateMixin(HasAPI, HasModelTrigger, HasParams, HasSession):
+    ticket_price: Optional[TicketPrice]
+
     @master(keepalive, connectguard)
     async def retrieve_balances(self):
         """
@@ -96,6 +100,8 @@ class StateMixin(HasAPI, HasParams, HasSession):
                 {"value": ticket_price.value.as_str},
             )
 
+            if self.ticket_price is None or self.ticket_price.value != ticket_price.value:
+                self.model_trigger.mark("ticket_parameters")
             self.ticket_price = ticket_price
             TICKET_STATS.labels("price").set(ticket_price.value.value)
         else:
@@ -1,30 +1,85 @@
 import logging
+from typing import Any, AsyncIterator
 
 from prometheus_client import Gauge
 
 from ..components.decorators import keepalive
 from ..components.logs import configure_logging
-from ..subgraph import URL, Type, entries
-from .protocols import HasParams, HasSubgraphs
+from ..components.metrics import address_metrics
+from ..subgraph import URL, GraphQLBatch, GraphQLProvider, ResponseCache, Type
+from .protocols import HasModelTrigger, HasParams, HasSubgraphs
 
-STAKE = Gauge("ct_peer_stake", "Stake", ["safe", "type"])
+STAKE = address_metrics.register(
+    Gauge,
+    "ct_peer_stake",
+    "Stake",
+    ["safe", "type"],
+    "safe",
+    distribution=[1e3, 1e4, 3e4, 1e5, 3e5, 1e6, 1e7],
+)
 SUBGRAPH_SIZE = Gauge("ct_subgraph_size", "Size of the subgraph")
-REDEEMED_REWARDS = Gauge("ct_redeemed_rewards", "Redeemed rewards", ["address"])
+REDEEMED_REWARDS = address_metrics.register(
+    Gauge,
+    "ct_redeemed_rewards",
+    "Redeemed rewards",
+    ["address"],
+    "address",
+    distribution=[1, 10, 100, 1e3, 1e4, 1e5],
+)
 
 configure_logging()
 logger = logging.getLogger(__name__)
 
 
-class SubgraphMixin(HasParams, HasSubgraphs):
+class SubgraphMixin(HasModelTrigger, HasParams, HasSubgraphs):
     def get_graphql_providers(self):
         user_id = self.params.subgraph.user_id
         api_key = self.params.subgraph.api_key
 
+        cache = None
+        if self.params.subgraph.cache_dir:
+            cache = ResponseCache(
+                self.params.subgraph.cache_dir,
+                self.params.subgraph.cache_ttl,
+                self.params.subgraph.cache_max_stale,
+            )
+
         self.graphql_providers = {
-            s: s.provider(URL(user_id, api_key, getattr(self.params.subgraph, s.value)))
+            s: s.provider(
+                URL(user_id, api_key, getattr(self.params.subgraph, s.value)),
+                self.subgraph_session,
+                self.params.subgraph.prefetch_ranges,
+                self.params.subgraph.full_sync_interval,
+                cache,
+            )
             for s in Type
         }
 
+        if getattr(self.params.subgraph, "batched", False):
+            self.graphql_batch = GraphQLBatch(list(self.graphql_providers.values()))
+
+    async def _subgraph_entries(self, provider: GraphQLProvider) -> AsyncIterator[Any]:
+        """
+        Yields the typed entries of a provider query. In batched mode, the query is fetched along
+        with the other queries served by the same endpoint, if any. Incremental queries keep
+        their entities for the next sync, so they go through the cached `get`, the others are
+        streamed page by page.
+        """
+        raws = None
+        if self.graphql_batch is not None:
+            raws = await self.graphql_batch.get(provider)
+        if raws is None and provider.incremental:
+            raws = await provider.get()
+
+        if raws is not None:
+            for raw in raws:
+                for entry in provider.parse(raw):
+                    yield entry
+            return
+
+        async for entry in provider.stream():
+            yield entry
+
     @keepalive
     async def rotate_subgraphs(self):
         """
@@ -37,14 +92,21 @@ class SubgraphMixin(HasParams, HasSubgraphs):
     @keepalive
     async def peers_rewards(self):
         results = dict()
-        for acc in await self.graphql_providers[Type.REWARDS].get():
-            account = entries.Account(acc["id"], acc["redeemedValue"])
+        async for account in self._subgraph_entries(self.graphql_providers[Type.REWARDS]):
             results[account.address] = account.redeemed_value
-            REDEEMED_REWARDS.labels(account.address).set(
-                account.redeemed_value.value  # ty: ignore[invalid-argument-type]
-            )
 
-        self.peers_rewards_data = results
+        address_metrics.publish(
+            REDEEMED_REWARDS,
+            {address: float(value.value) for address, value in results.items()},
+        )
+
+        if not results:
+            # failed queries yield no entries: the previous snapshot is kept
+            logger.warning("No results while fetching peers rewards")
+            return
+
+        if self.model_trigger.mark_if_changed("peers_rewards", self.peers_rewards_data, results):
+            self.peers_rewards_data = results
         logger.info("Fetched peers rewards amounts", {"count": len(results)})
 
     @keepalive
@@ -53,22 +115,26 @@ class SubgraphMixin(HasParams, HasSubgraphs):
         Gets all registered nodes in the Network Registry.
         """
 
-        results = list[entries.Node]()
-        for safe in await self.graphql_providers[Type.SAFES].get():
-            results.extend(
-                [
-                    entries.Node.fromSubgraphResult(node)
-                    for node in safe["registeredNodesInSafeRegistry"]
-                ]
-            )
+        stake_types = ["balance", "allowance", "additional_balance"]
+        stakes: dict[str, dict[str, float]] = {stake_type: {} for stake_type in stake_types}
+        results = []
+        async for node in self._subgraph_entries(self.graphql_providers[Type.SAFES]):
+            results.append(node)
+            for stake_type in stake_types:
+                stakes[stake_type][node.safe.address] = float(getattr(node.safe, stake_type).value)
 
-        for node in results:
-            STAKE.labels(node.safe.address, "balance").set(float(node.safe.balance.value))
-            STAKE.labels(node.safe.address, "allowance").set(float(node.safe.allowance.value))
-            STAKE.labels(node.safe.address, "additional_balance").set(
-                node.safe.additional_balance.value
-            )
+        for stake_type in stake_types:
+            address_metrics.publish(STAKE, stakes[stake_type], type=stake_type)
+
+        if not results:
+            # failed queries yield no entries: the previous snapshot is kept
+            logger.warning("No results while fetching registered nodes")
+            return
 
-        self.registered_nodes_data = results
+        # an unchanged snapshot is kept as is, so that the data index is not rebuilt
+        if self.model_trigger.mark_if_changed(
+            "registered_nodes", self.registered_nodes_data, results
+        ):
+            self.registered_nodes_data = results
         logger.info("Fetched registered nodes in the safe registry", {"count": len(results)})
         SUBGRAPH_SIZE.set(len(results))
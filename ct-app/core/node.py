@@ -19,7 +19,6 @@ Thread Safety:
 """
 
 import logging
-from datetime import datetime
 from typing import Optional
 
 from api_lib.headers.authorization import Bearer
@@ -31,10 +30,17 @@ from .api.response_objects import Channels, Session
 from .components.asyncloop import AsyncLoop
 from .components.balance import Balance
 from .components.config_parser import Parameters
+from .components.data_index import DataIndex
+from .components.economic_model_cache import EconomicModelCache
+from .components.http_session import PooledSession
 from .components.logs import configure_logging
+from .components.metrics import address_metrics
+from .components.model_trigger import ModelTrigger
 from .components.peer import Peer
+from .components.peer_history import PeerHistory
 from .components.session_rate_limiter import SessionRateLimiter
 from .components.utils import Utils
+from .rpc import CallCache
 from .rpc import entries as rpc_entries
 from .subgraph import entries as subgraph_entries
 
@@ -82,7 +88,7 @@ class Node(
         self.url = url
 
         self.peers = set[Peer]()
-        self.peer_history = dict[str, datetime]()
+        self.peer_history = PeerHistory()
         self.session_destinations = list[str]()
         self.sessions = dict[str, Session]()
         # relayer -> timestamp when grace period started
@@ -106,6 +112,41 @@ class Node(
             ),
         )
 
+        # Economic model runs when its inputs change, see ModelTrigger
+        self.model_trigger = ModelTrigger(
+            debounce=(
+                getattr(self.params.economic_model, "debounce_seconds", 0.0)
+                if hasattr(self.params, "economic_model")
+                else 0.0
+            ),
+            max_staleness=(
+                getattr(self.params.economic_model, "max_staleness_seconds", 0.0)
+                if hasattr(self.params, "economic_model")
+                else 0.0
+            ),
+        )
+
+        # Pooled HTTP session shared by the subgraph providers, closed in stop()
+        self.subgraph_session = (
+            PooledSession.fromParams(self.params.subgraph.connection)
+            if hasattr(self.params, "subgraph") and hasattr(self.params.subgraph, "connection")
+            else PooledSession()
+        )
+        # Pooled HTTP sessions of the RPC providers, one per chain, closed in stop()
+        self.rpc_sessions = dict[str, PooledSession]()
+        # Results of the RPC calls, pinned to the block they were fetched at
+        self.rpc_cache = CallCache(
+            self.params.rpc.cache_block_window.as_dict()
+            if hasattr(self.params, "rpc") and hasattr(self.params.rpc, "cache_block_window")
+            else {}
+        )
+        # Merges the subgraph queries served by the same endpoint, see get_graphql_providers
+        self.graphql_batch = None
+
+        # Bounds of the metric families labelled per address, see AddressMetrics
+        if hasattr(self.params, "metrics"):
+            address_metrics.configure(self.params.metrics.mode, self.params.metrics.max_series)
+
         self.address = None  # type: ignore[assignment]
         self.channels: Optional[Channels] = None
 
@@ -115,8 +156,10 @@ class Node(
         self.allocations_data = list[rpc_entries.Allocation]()
         self.eoa_balances_data = list[rpc_entries.ExternalBalance]()
         self.peers_rewards_data = dict[str, float]()
+        self.data_index = DataIndex()
 
         self.ticket_price = None
+        self.economic_model_cache = EconomicModelCache()
 
         self.connected = False
         self.running = True
@@ -149,7 +192,8 @@ class Node(
         """
         Gracefully stop the node and clean up all resources.
 
-        Implements a three-phase parallel shutdown strategy for optimal performance:
+        Closes the pooled subgraph and RPC sessions, then implements a three-phase parallel shutdown
+        strategy for optimal performance:
 
         Phase 1 - Parallel API Close:
             Closes all sessions at the API level concurrently using asyncio.gather().
@@ -189,6 +233,10 @@ class Node(
 
         self.running = False
 
+        await self.subgraph_session.close()
+        for rpc_session in self.rpc_sessions.values():
+            await rpc_session.close()
+
         # Close all active sessions
         # Create snapshot to avoid modification during iteration
         sessions_to_close = list(self.sessions.items())
@@ -1,9 +1,13 @@
 from . import entries
+from .call_cache import CallCache
+from .multicall import MulticallProvider
 from .providers import BalanceProvider
 from .query_provider import RPCQueryProvider
 
 __all__ = [
     "BalanceProvider",
+    "CallCache",
     "entries",
+    "MulticallProvider",
     "RPCQueryProvider",
 ]
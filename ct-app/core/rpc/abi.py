@@ -0,0 +1,66 @@
+"""
+ABI codec - calldata and return data of the contract calls of the RPC providers.
+
+Selectors are precomputed, calldata is assembled from bytes, and return data is decoded with
+`int.from_bytes`, straight into wei integers, instead of slicing and re-parsing hex strings.
+"""
+
+WORD: int = 32
+
+# keccak256 of the function signatures, first 4 bytes
+BALANCE_OF: bytes = bytes.fromhex("70a08231")  # balanceOf(address)
+ALLOCATIONS: bytes = bytes.fromhex("c31cd7d7")  # allocations(address,string)
+
+_ZERO_ADDRESS_PADDING = bytes(WORD - 20)
+
+
+def address_word(address: str) -> bytes:
+    """
+    Encode an address as a left-padded word.
+    """
+    raw = bytes.fromhex(address.removeprefix("0x").removeprefix("0X"))
+    if len(raw) != 20:
+        raise ValueError(f"Invalid address: {address}")
+
+    return _ZERO_ADDRESS_PADDING + raw
+
+
+def uint_word(value: int) -> bytes:
+    return value.to_bytes(WORD, "big")
+
+
+def bytes_tail(data: bytes) -> bytes:
+    """
+    Encode the tail of a dynamic `bytes` or `string`: its length, then its content right-padded
+    to a multiple of a word.
+    """
+    return uint_word(len(data)) + data + bytes(-len(data) % WORD)
+
+
+def encode_balance_of(address: str) -> str:
+    return "0x" + (BALANCE_OF + address_word(address)).hex()
+
+
+def encode_allocations(address: str, schedule: str) -> str:
+    # the string is the second argument: its tail starts after the two head words
+    return (
+        "0x"
+        + (
+            ALLOCATIONS
+            + address_word(address)
+            + uint_word(2 * WORD)
+            + bytes_tail(schedule.encode())
+        ).hex()
+    )
+
+
+def decode_words(result: str, count: int) -> list[int]:
+    """
+    Decode the first `count` words of return data as unsigned integers.
+    :raises ValueError: If the return data is not hex, or has less than `count` words.
+    """
+    raw = bytes.fromhex(result.removeprefix("0x"))
+    if len(raw) < count * WORD:
+        raise ValueError(f"Expected {count} words, got {len(raw)} bytes")
+
+    return [int.from_bytes(raw[idx * WORD : (idx + 1) * WORD], "big") for idx in range(count)]
@@ -0,0 +1,91 @@
+"""
+Call cache - results of eth_calls, pinned to the block they were fetched at.
+
+Balances and allocations only change when a block touches their contract. A result fetched at
+block N is served as long as the head of the chain, read with a cheap `eth_blockNumber`, is at
+most `block_window` blocks of that chain past N: the call is skipped entirely while the head did
+not move (`block_window` 0), or within the window.
+
+Chains do not share a block time, so each has its own window. A window should stay shorter than
+the keepalive period of the refreshes reading through the cache, so that no refresh serves the
+result of the previous one.
+"""
+
+from typing import NamedTuple, Optional
+
+from prometheus_client import Counter
+
+RPC_CACHE_HITS = Counter(
+    "ct_rpc_cache_hits_total", "# of eth_calls served from the cache", ["chain"]
+)
+RPC_CACHE_MISSES = Counter(
+    "ct_rpc_cache_misses_total", "# of eth_calls sent to the chain", ["chain"]
+)
+
+
+class CachedCall(NamedTuple):
+    result: str
+    block: int
+
+
+class CallCache:
+    """
+    In-memory cache of eth_call results, keyed by (chain, contract, calldata).
+
+    Thread Safety:
+        Safe for asyncio single-threaded environment. All operations are synchronous.
+    """
+
+    def __init__(self, block_windows: dict[str, int]):
+        """
+        Args:
+            block_windows: Number of blocks of each chain a result is served for after the
+                block it was fetched at. Negative, or missing, to disable the cache of a chain.
+        """
+        self.block_windows = block_windows
+        self._entries: dict[tuple[str, str, str], CachedCall] = {}
+
+    def block_window(self, chain: str) -> int:
+        return self.block_windows.get(chain, -1)
+
+    def enabled(self, chain: str) -> bool:
+        return self.block_window(chain) >= 0
+
+    @staticmethod
+    def key(chain: str, to: str, data: str) -> tuple[str, str, str]:
+        return chain, to.lower(), data.lower()
+
+    def get(self, chain: str, to: str, data: str, head: Optional[int]) -> Optional[str]:
+        """
+        Get the result of a call, if it was fetched within the block window of `head`.
+        :param head: The current block of the chain. If None, nothing is served.
+        """
+        entry = self._entries.get(self.key(chain, to, data))
+
+        if (
+            not self.enabled(chain)
+            or head is None
+            or entry is None
+            or not 0 <= head - entry.block <= self.block_window(chain)
+        ):
+            RPC_CACHE_MISSES.labels(chain).inc()
+            return None
+
+        RPC_CACHE_HITS.labels(chain).inc()
+        return entry.result
+
+    def store(self, chain: str, to: str, data: str, result: str, block: Optional[int]):
+        """
+        Record the result of a call, fetched at `block`. Results of an unknown block are not
+        cached.
+        """
+        if not self.enabled(chain) or block is None:
+            return
+
+        self._entries[self.key(chain, to, data)] = CachedCall(result, block)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(block_windows={self.block_windows}, entries={len(self)})"
@@ -3,6 +3,8 @@ from .entry import RPCEntry
 
 
 class Allocation(RPCEntry):
+    derived_fields = ("linked_safes",)
+
     def __init__(self, address: str, schedule: str, amount: Balance, claimed: Balance):
         self.address = address
         self.schedule = schedule
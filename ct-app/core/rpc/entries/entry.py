@@ -1,4 +1,7 @@
 class RPCEntry:
+    # attributes derived from other sources, left out of the comparisons
+    derived_fields: tuple[str, ...] = ()
+
     def __str__(self):
         cls = self.__class__.__name__
         fields = ", ".join(f"{field}={value}" for field, value in vars(self).items())
@@ -8,5 +11,10 @@ class RPCEntry:
     def __repr__(self):
         return str(self)
 
+    def _values(self) -> dict:
+        return {k: v for k, v in vars(self).items() if k not in self.derived_fields}
+
     def __eq__(self, other):
-        return vars(self) == vars(other)
+        if not isinstance(other, RPCEntry):
+            return False
+        return self._values() == other._values()
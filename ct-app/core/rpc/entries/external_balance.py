@@ -3,6 +3,8 @@ from .entry import RPCEntry
 
 
 class ExternalBalance(RPCEntry):
+    derived_fields = ("linked_safes",)
+
     def __init__(self, address: str, amount: Balance):
         self.address = address
         self.amount = amount
@@ -0,0 +1,124 @@
+"""
+Failover - retries of the RPC requests, with exponential backoff and jitter, over the URLs of an
+endpoint, each behind a circuit breaker.
+
+A URL failing `failure_threshold` times in a row opens its circuit: it is skipped for
+`reset_timeout` seconds, and the requests fail over to the next URL of the endpoint. Once the
+timeout elapsed, the URL is tried again (half-open), and closes its circuit on success. When
+every circuit is open, requests fail immediately instead of hammering dead URLs.
+"""
+
+import random
+import time
+from dataclasses import dataclass
+from enum import Enum
+
+from prometheus_client import Counter, Gauge
+
+RPC_CIRCUIT_STATE = Gauge(
+    "ct_rpc_circuit_state", "RPC circuit state (0: closed, 1: half-open, 2: open)", ["endpoint"]
+)
+RPC_FAILOVERS = Counter(
+    "ct_rpc_failovers_total", "# of RPC requests failed over to an other URL", ["endpoint"]
+)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    max_attempts: int = 5
+    backoff_base: float = 0.2
+    backoff_max: float = 5.0
+    failure_threshold: int = 5
+    reset_timeout: float = 30.0
+
+    @classmethod
+    def fromParams(cls, params):
+        """
+        Create a retry policy from retry parameters (`RetryParams`).
+        """
+        return cls(**params.as_dict())
+
+    def delay(self, attempt: int) -> float:
+        """
+        Get the delay before the next attempt: uniformly drawn up to an exponentially growing,
+        capped, bound ("full jitter"), so that failing clients do not retry in lockstep.
+        """
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+
+class CircuitState(Enum):
+    CLOSED = 0
+    HALF_OPEN = 1
+    OPEN = 2
+
+
+class CircuitBreaker:
+    """
+    Health of an RPC URL.
+
+    Thread Safety:
+        Safe for asyncio single-threaded environment. All operations are synchronous.
+    """
+
+    def __init__(self, label: str, failure_threshold: int, reset_timeout: float):
+        """
+        Args:
+            label: The label of the URL in the metrics.
+            failure_threshold: Number of consecutive failures opening the circuit.
+            reset_timeout: Seconds the circuit stays open.
+        """
+        self.label = label
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.failures = 0
+        self._opened_at = 0.0
+        self._state = CircuitState.CLOSED
+        RPC_CIRCUIT_STATE.labels(label).set(self._state.value)
+
+    def _set_state(self, state: CircuitState):
+        self._state = state
+        RPC_CIRCUIT_STATE.labels(self.label).set(state.value)
+
+    @property
+    def state(self) -> CircuitState:
+        if (
+            self._state == CircuitState.OPEN
+            and time.monotonic() - self._opened_at >= self.reset_timeout
+        ):
+            self._set_state(CircuitState.HALF_OPEN)
+        return self._state
+
+    @property
+    def available(self) -> bool:
+        return self.state != CircuitState.OPEN
+
+    def record_success(self):
+        self.failures = 0
+        if self._state != CircuitState.CLOSED:
+            self._set_state(CircuitState.CLOSED)
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == CircuitState.HALF_OPEN or self.failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+            self._set_state(CircuitState.OPEN)
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}(label={self.label}, state={self.state.name}, "
+            f"failures={self.failures})"
+        )
+
+
+# circuits are shared by all the providers using a URL
+_circuits: dict[str, CircuitBreaker] = {}
+
+
+def circuit(url: str, label: str, policy: RetryPolicy) -> CircuitBreaker:
+    """
+    Get the circuit breaker of a URL, created with the thresholds of `policy` on first use.
+    """
+    if url not in _circuits:
+        _circuits[url] = CircuitBreaker(label, policy.failure_threshold, policy.reset_timeout)
+    return _circuits[url]
@@ -0,0 +1,148 @@
+"""
+Multicall - eth_calls aggregated in a single `aggregate3` call of the Multicall3 contract.
+
+Many RPC providers bill and rate-limit per call, whatever the number of calls in a JSON-RPC
+batch. Aggregating the calls of an endpoint makes them a single `eth_call`, whose result packs
+the return data of every call.
+"""
+
+import asyncio
+from typing import Any
+
+from .abi import WORD, address_word, bytes_tail, uint_word
+from .query_provider import ETHCallRPCProvider, ProviderError
+
+# aggregate3((address,bool,bytes)[])
+AGGREGATE3: bytes = bytes.fromhex("82ad56cb")
+
+
+def encode_aggregate3(calls: list[tuple[str, str]], allow_failure: bool = True) -> str:
+    """
+    Encode the calldata of `aggregate3(Call3[] calls)`, a Call3 being
+    `(address target, bool allowFailure, bytes callData)`.
+    :param calls: The (to, data) pairs of the calls, as hex strings.
+    :param allow_failure: Whether a failed call leaves the other calls succeed.
+    :return: The calldata, as a hex string.
+    """
+    tuples = [
+        address_word(to)
+        + uint_word(int(allow_failure))
+        + uint_word(3 * WORD)  # offset of callData from the start of the tuple
+        + bytes_tail(bytes.fromhex(data.removeprefix("0x")))
+        for to, data in calls
+    ]
+
+    # offsets of the tuples from the start of the offsets
+    offsets = []
+    position = len(calls) * WORD
+    for encoded in tuples:
+        offsets.append(uint_word(position))
+        position += len(encoded)
+
+    return (
+        "0x"
+        + (
+            AGGREGATE3
+            + uint_word(WORD)  # offset of the array
+            + uint_word(len(calls))
+            + b"".join(offsets)
+            + b"".join(tuples)
+        ).hex()
+    )
+
+
+def decode_aggregate3(result: str) -> list[tuple[bool, str]]:
+    """
+    Decode the return data of `aggregate3`, a `Result[]` with Result being
+    `(bool success, bytes returnData)`.
+    :param result: The return data, as a hex string.
+    :return: The success and the return data of every call, as hex strings.
+    """
+    try:
+        raw = bytes.fromhex(result.removeprefix("0x"))
+    except ValueError:
+        raise ProviderError(f"Invalid aggregate3 return data: {result}")
+
+    def word(offset: int) -> int:
+        if offset + WORD > len(raw):
+            raise ProviderError(f"Invalid aggregate3 return data: {result}")
+        return int.from_bytes(raw[offset : offset + WORD], "big")
+
+    array = word(0)
+    count = word(array)
+    start = array + WORD
+
+    decoded = []
+    for idx in range(count):
+        entry = start + word(start + idx * WORD)
+        data = entry + word(entry + WORD)
+        length = word(data)
+        if data + WORD + length > len(raw):
+            raise ProviderError(f"Invalid aggregate3 return data: {result}")
+        decoded.append((bool(word(entry)), "0x" + raw[data + WORD : data + WORD + length].hex()))
+
+    return decoded
+
+
+class MulticallProvider(ETHCallRPCProvider):
+    """
+    Sends the eth_calls to an endpoint through the Multicall3 contract, deployed at the same
+    address on Gnosis and Mainnet.
+    """
+
+    contract: str = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
+    async def aggregate(self, calls: list[tuple[str, str]], max_size: int) -> list[str]:
+        """
+        Aggregates calls in `aggregate3` calls of at most `max_size` calls, sent concurrently.
+        :param calls: The (to, data) pairs of the calls.
+        :return: The return data of the calls, in their order.
+        """
+        size = max(max_size, 1)
+        chunks = [calls[idx : idx + size] for idx in range(0, len(calls), size)]
+
+        async def send(chunk: list[tuple[str, str]]) -> list[str]:
+            result = await self.get(to=self.contract, data=encode_aggregate3(chunk))
+            decoded = decode_aggregate3(result)
+
+            if len(decoded) != len(chunk):
+                raise ProviderError(f"Expected {len(chunk)} results, got {len(decoded)}")
+
+            for (to, _), (success, _) in zip(chunk, decoded):
+                if not success:
+                    raise ProviderError(f"Aggregated call to {to} failed")
+
+            return [data for _, data in decoded]
+
+        results = await asyncio.gather(*[send(chunk) for chunk in chunks])
+        return [data for chunk in results for data in chunk]
+
+    @classmethod
+    async def gather(
+        cls, requests: list[tuple[ETHCallRPCProvider, list[tuple[str, str]]]], max_size: int
+    ) -> list[list[Any]]:
+        """
+        Aggregates the calls of several providers, one multicall per endpoint.
+        :param requests: The providers, with the (to, data) pairs of their calls.
+        :return: The return data of the calls of each provider.
+        """
+        endpoints: dict[tuple[str, ...], list[tuple[str, str]]] = {}
+        senders: dict[tuple[str, ...], ETHCallRPCProvider] = {}
+        for provider, calls in requests:
+            endpoints.setdefault(tuple(provider.urls), []).extend(calls)
+            senders.setdefault(tuple(provider.urls), provider)
+
+        keys = list(endpoints)
+        results = await asyncio.gather(
+            *[
+                cls(list(key), senders[key].session, senders[key].policy).aggregate(
+                    endpoints[key], max_size
+                )
+                for key in keys
+            ]
+        )
+        remaining = {key: iter(result) for key, result in zip(keys, results)}
+
+        return [
+            [next(remaining[tuple(provider.urls)]) for _ in calls] for provider, calls in requests
+        ]
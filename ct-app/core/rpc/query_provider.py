@@ -1,22 +1,41 @@
 import asyncio
 import logging
 import sys
+import time
 from pathlib import Path
-from typing import Any
+from typing import Any, Optional
+from urllib.parse import urlparse
 
-import aiohttp
+from prometheus_client import Counter, Histogram
 
 from ..components.balance import Balance
+from ..components.http_session import PooledSession
 from ..components.logs import configure_logging
+from . import abi
 from .entries.allocation import Allocation
 from .entries.external_balance import ExternalBalance
+from .failover import RPC_FAILOVERS, RetryPolicy, circuit
 
-BLOCK_SIZE: int = 64
+RPC_LATENCY = Histogram(
+    "ct_rpc_request_seconds",
+    "Duration of RPC requests",
+    ["endpoint", "method"],
+    buckets=[0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30],
+)
+RPC_ERRORS = Counter("ct_rpc_errors_total", "# of failed RPC requests", ["endpoint", "type"])
 
 configure_logging()
 logger = logging.getLogger(__name__)
 
 
+def endpoint_label(url: str) -> str:
+    """
+    Get the host of an RPC URL, as metrics label: the path and query of the URL can hold an
+    API key.
+    """
+    return urlparse(url).hostname or "unknown"
+
+
 class ProviderError(Exception):
     pass
 
@@ -24,39 +43,136 @@ class ProviderError(Exception):
 class RPCQueryProvider:
     method: str = ""
 
-    def __init__(self, url: str):
-        self.url = url
+    def __init__(
+        self,
+        urls: str | list[str],
+        session: Optional[PooledSession] = None,
+        policy: Optional[RetryPolicy] = None,
+    ):
+        """
+        :param urls: The URLs of the RPC endpoint, by order of preference.
+        :param session: The pooled session to send requests with, usually shared by the
+            providers of an endpoint. If None, the provider opens its own, closed by `close`.
+        :param policy: The retries and circuit breaking of the requests. If None, the defaults.
+        """
+        self.urls = [urls] if isinstance(urls, str) else list(urls)
+        self.policy = policy if policy is not None else RetryPolicy()
         self.pwd = Path(sys.modules[self.__class__.__module__].__file__).parent
-        self.query = {
+        self._owns_session = session is None
+        self.session = session if session is not None else PooledSession()
+
+    @property
+    def url(self) -> str:
+        """
+        The preferred URL of the endpoint.
+        """
+        return self.urls[0] if self.urls else ""
+
+    #### PRIVATE METHODS ####
+    def _payload(self, to: str, data: str, request_id: int = 1) -> dict:
+        """
+        Build the request of a call. Each call gets its own payload, so that concurrent calls
+        on a provider never share their parameters.
+        """
+        return {
             "jsonrpc": "2.0",
             "method": self.method,
-            "params": [{"to": "", "data": ""}, "latest"],
-            "id": 1,
+            "params": [{"to": to, "data": data}, "latest"],
+            "id": request_id,
         }
 
-    #### PRIVATE METHODS ####
-    async def _execute(self, to: str, data: str) -> tuple[dict, dict]:
-        self.query["params"][0]["to"] = to
-        self.query["params"][0]["data"] = data
+    async def _send(self, url: str, payload: dict | list[dict]) -> tuple[Any, int]:
+        """
+        Sends a request to a URL once.
+        :return: The response content and status, or None and 0 if no response was received.
+        """
+        endpoint = endpoint_label(url)
 
-        while True:
-            try:
-                async with (
-                    aiohttp.ClientSession() as session,
-                    session.post(self.url, json=self.query) as response,
-                ):
-                    return (
-                        await response.json(),
-                        response.status,
-                    )  # ty: ignore [invalid-return-type]
-            except TimeoutError as err:
-                logger.error("Timeout error", {"error": str(err)})
-                await asyncio.sleep(0.2)  # Retry after a short delay
-            except Exception as err:
-                logger.error("Unknown error", {"error": str(err)})
-                await asyncio.sleep(0.2)  # Retry after a short delay
+        start = time.perf_counter()
+        try:
+            async with self.session.session.post(url, json=payload) as response:
+                content = await response.json()
+                if response.status != 200:
+                    RPC_ERRORS.labels(endpoint, "status").inc()
+                return content, response.status  # ty: ignore [invalid-return-type]
+        except TimeoutError as err:
+            RPC_ERRORS.labels(endpoint, "timeout").inc()
+            logger.error("Timeout error", {"endpoint": endpoint, "error": str(err)})
+        except Exception as err:
+            RPC_ERRORS.labels(endpoint, "unknown").inc()
+            logger.error("Unknown error", {"endpoint": endpoint, "error": str(err)})
+        finally:
+            RPC_LATENCY.labels(endpoint, self.method).observe(time.perf_counter() - start)
+        return None, 0
+
+    async def _post(self, payload: dict | list[dict]) -> tuple[Any, int]:
+        """
+        Sends a request to the endpoint, retrying with exponential backoff and jitter. Each
+        attempt goes to the next URL whose circuit is not open, so that a failing URL is
+        failed over.
+        :return: The response content and status, or an error with a 503 status if every
+            attempt failed or every circuit is open.
+        """
+        previous: Optional[str] = None
+
+        for attempt in range(self.policy.max_attempts):
+            available = [
+                url for url in self.urls if circuit(url, endpoint_label(url), self.policy).available
+            ]
+            if not available:
+                logger.error("No RPC URL available", {"endpoint": endpoint_label(self.url)})
+                break
+
+            url = available[attempt % len(available)]
+            if previous is not None and url != previous:
+                RPC_FAILOVERS.labels(endpoint_label(previous)).inc()
+            previous = url
+
+            content, status = await self._send(url, payload)
+            breaker = circuit(url, endpoint_label(url), self.policy)
+
+            # rate limits and server errors are failures of the URL, other statuses are answers
+            if content is not None and status != 429 and status < 500:
+                breaker.record_success()
+                return content, status
+
+            breaker.record_failure()
+            if attempt < self.policy.max_attempts - 1:
+                await asyncio.sleep(self.policy.delay(attempt))
+
+        return {"error": "RPC endpoint unavailable"}, 503
+
+    async def _execute(self, to: str, data: str) -> tuple[dict, int]:
+        return await self._post(self._payload(to, data))
+
+    async def _execute_batch(self, calls: list[tuple[str, str]]) -> list[Any]:
+        """
+        Sends calls in a single JSON-RPC batch array, and matches the responses to the calls by
+        id, as the responses of a batch can come in any order.
+        :param calls: The (to, data) pairs of the calls.
+        :return: The converted results, in the order of the calls.
+        """
+        payload = [self._payload(to, data, idx) for idx, (to, data) in enumerate(calls)]
+        content, status = await self._post(payload)
+
+        if not isinstance(content, list):
+            # endpoints not supporting batches answer with a single error object
+            return [self.convert_result(content, status) for _ in calls]
+
+        responses = {item.get("id"): item for item in content if isinstance(item, dict)}
+        return [
+            self.convert_result(responses.get(idx, {"error": "missing response"}), status)
+            for idx in range(len(calls))
+        ]
 
     #### PUBLIC METHODS ####
+    async def close(self):
+        """
+        Closes the session of the provider, if it is not shared.
+        """
+        if self._owns_session:
+            await self.session.close()
+
     def convert_result(self, result: dict, status: int) -> Any:
         return result
 
@@ -69,6 +185,27 @@ class RPCQueryProvider:
         else:
             return self.convert_result(*res)
 
+    async def get_batch(
+        self, calls: list[tuple[str, str]], max_batch_size: int, timeout: int = 30
+    ) -> list[Any]:
+        """
+        Sends calls as JSON-RPC batch arrays of at most `max_batch_size` calls, concurrently.
+        :param calls: The (to, data) pairs of the calls.
+        :return: The converted results, in the order of the calls.
+        """
+        size = max(max_batch_size, 1)
+        chunks = [calls[idx : idx + size] for idx in range(0, len(calls), size)]
+
+        async def send(chunk: list[tuple[str, str]]) -> list[Any]:
+            try:
+                return await asyncio.wait_for(self._execute_batch(chunk), timeout)
+            except asyncio.TimeoutError:
+                logger.error(f"Batch request to {self.url} timed out after {timeout} seconds")
+                return [self.convert_result({}, 504) for _ in chunk]
+
+        results = await asyncio.gather(*[send(chunk) for chunk in chunks])
+        return [result for chunk in results for result in chunk]
+
 
 class ETHCallRPCProvider(RPCQueryProvider):
     method: str = "eth_call"
@@ -77,6 +214,9 @@ class ETHCallRPCProvider(RPCQueryProvider):
         if status != 200:
             raise ProviderError(f"Error fetching data: {result.get('error', 'Unknown error')}")
 
+        if "error" in result:
+            raise ProviderError(f"Error fetching data: {result['error']}")
+
         if "result" not in result:
             raise ProviderError("Invalid response format: 'result' key not found")
 
@@ -86,46 +226,91 @@ class ETHCallRPCProvider(RPCQueryProvider):
         return result["result"]
 
 
+class BlockNumberProvider(ETHCallRPCProvider):
+    method: str = "eth_blockNumber"
+
+    def _payload(self, to: str, data: str, request_id: int = 1) -> dict:
+        return {"jsonrpc": "2.0", "method": self.method, "params": [], "id": request_id}
+
+    async def block_number(self) -> int:
+        result = await self.get(to="", data="")
+        try:
+            return int(result, 16)
+        except ValueError:
+            raise ProviderError(f"Invalid block number: {result}")
+
+
 class BalanceProvider(ETHCallRPCProvider):
     token_contract: str = ""
     symbol: str = ""
 
-    async def balance_of(self, address: str) -> ExternalBalance:
-        result = await self.get(
-            to=self.token_contract,
-            data="0x70a08231" + address.lower().replace("0x", "").rjust(BLOCK_SIZE, "0"),
-        )
+    def balance_of_data(self, address: str) -> str:
         try:
-            balance = Balance(f"{int(result, 16)} wei {self.symbol}")
+            return abi.encode_balance_of(address)
+        except ValueError as e:
+            raise ProviderError(f"Invalid address {address}: {e}")
+
+    def to_balance(self, address: str, result: str) -> ExternalBalance:
+        try:
+            (wei,) = abi.decode_words(result, 1)
+            balance = Balance.from_wei(wei, self.symbol)
         except ValueError as e:
             logger.error("Failed to parse balance", {"address": address, "error": str(e)})
             raise ProviderError(f"Invalid balance format for address {address}: {result}")
 
         return ExternalBalance(address, balance)
 
+    async def balance_of(self, address: str) -> ExternalBalance:
+        result = await self.get(to=self.token_contract, data=self.balance_of_data(address))
+        return self.to_balance(address, result)
+
+    async def balance_of_batch(
+        self, addresses: list[str], max_batch_size: int
+    ) -> list[ExternalBalance]:
+        results = await self.get_batch(
+            [(self.token_contract, self.balance_of_data(address)) for address in addresses],
+            max_batch_size,
+        )
+        return [self.to_balance(address, result) for address, result in zip(addresses, results)]
+
 
 class DistributorProvider(ETHCallRPCProvider):
     contract: str = ""
     symbol: str = ""
 
-    async def allocations(self, address: str, schedule: str) -> Allocation:
-        encoded_schedule: str = schedule.encode().hex()
-        data_offset = len(encoded_schedule) // 2
-
-        result = await self.get(
-            to=self.contract,
-            data="0xc31cd7d7"
-            + address.lower().replace("0x", "").rjust(BLOCK_SIZE, "0")
-            + hex(BLOCK_SIZE)[2:].rjust(BLOCK_SIZE, "0")
-            + hex(data_offset)[2:].rjust(BLOCK_SIZE, "0")
-            + encoded_schedule.ljust(BLOCK_SIZE, "0"),
-        )
+    def allocations_data(self, address: str, schedule: str) -> str:
+        try:
+            return abi.encode_allocations(address, schedule)
+        except ValueError as e:
+            raise ProviderError(f"Invalid address {address}: {e}")
+
+    def to_allocation(self, address: str, schedule: str, result: str) -> Allocation:
+        # the result starts with the allocated and claimed amounts
+        try:
+            amount, claimed = abi.decode_words(result, 2)
+        except ValueError as e:
+            logger.error("Failed to parse allocation", {"address": address, "error": str(e)})
+            raise ProviderError(f"Invalid allocation format for address {address}: {result}")
 
-        # split the result into 4 blocks of 64 charaters
-        blocks = [result[2 + i * BLOCK_SIZE : 2 + (i + 1) * BLOCK_SIZE] for i in range(4)]
         return Allocation(
             address,
             schedule,
-            Balance(f"{int(blocks[0], 16)} wei {self.symbol}"),
-            Balance(f"{int(blocks[1], 16)} wei {self.symbol}"),
+            Balance.from_wei(amount, self.symbol),
+            Balance.from_wei(claimed, self.symbol),
+        )
+
+    async def allocations(self, address: str, schedule: str) -> Allocation:
+        result = await self.get(to=self.contract, data=self.allocations_data(address, schedule))
+        return self.to_allocation(address, schedule, result)
+
+    async def allocations_batch(
+        self, addresses: list[str], schedule: str, max_batch_size: int
+    ) -> list[Allocation]:
+        results = await self.get_batch(
+            [(self.contract, self.allocations_data(address, schedule)) for address in addresses],
+            max_batch_size,
         )
+        return [
+            self.to_allocation(address, schedule, result)
+            for address, result in zip(addresses, results)
+        ]
@@ -1,14 +1,18 @@
 from . import entries
+from .batch import GraphQLBatch
 from .graphql_provider import GraphQLProvider, ProviderError
 from .mode import Mode
+from .response_cache import ResponseCache
 from .type import Type
 from .url import URL
 
 __all__ = [
     "entries",
+    "GraphQLBatch",
     "GraphQLProvider",
     "Mode",
     "ProviderError",
+    "ResponseCache",
     "Type",
     "URL",
 ]
@@ -0,0 +1,215 @@
+"""
+Batched queries - the queries of providers served by the same endpoint, merged in a single
+GraphQL document.
+
+Each provider query is aliased in the document, with its own variables and cursor, so that one
+request fetches a page of every query. Once the first round indexed a block, the next rounds
+are pinned to it: every dataset is read at the same block, whatever the number of pages.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from typing import Any, Optional
+
+from prometheus_client import Gauge
+
+from ..components.logs import configure_logging
+from .graphql_provider import (
+    ID_LOWER_BOUND,
+    ID_UPPER_BOUND,
+    PAGE_SIZE,
+    GraphQLProvider,
+    indexed_block,
+    is_success,
+)
+
+SUBGRAPH_BATCHED_CALLS = Gauge(
+    "ct_subgraph_batched_calls", "# of batched subgraph calls", ["queries"]
+)
+
+configure_logging()
+logger = logging.getLogger(__name__)
+
+VARIABLE = re.compile(r"\$(\w+)")
+
+
+def alias_query(body: str, alias: str, pinned: bool = False) -> str:
+    """
+    Alias a query body, and prefix its variables with the alias.
+    :param body: The query body, as in the query files.
+    :param alias: The alias of the query in the document.
+    :param pinned: Whether the query reads the block given in the `$<alias>_block` variable.
+    """
+    body = VARIABLE.sub(rf"${alias}_\1", body)
+    name, arguments = body.split("(", 1)
+
+    block = f"block: {{number: ${alias}_block}}, " if pinned else ""
+    return f"{alias}: {name.strip()}({block}{arguments}"
+
+
+def alias_inputs(provider: GraphQLProvider, alias: str, pinned: bool = False) -> list[str]:
+    inputs = [
+        "$first: Int!",
+        f"$lastId: {provider.cursor_type}!",
+        f"$upperId: {provider.cursor_type}!",
+        "$changeBlock: Int!",
+        *provider.params,
+    ]
+    if pinned:
+        inputs.append("$block: Int!")
+
+    return [VARIABLE.sub(rf"${alias}_\1", entry) for entry in inputs]
+
+
+class GraphQLBatch:
+    """
+    Fetches the queries of several providers in a single request per page, when they are
+    served by the same endpoint. The result of a provider is kept until it asks for it, so
+    that the keepalive fetching one dataset also fetches the others.
+
+    Thread Safety:
+        Safe for asyncio single-threaded environment. Concurrent fetches are serialized.
+    """
+
+    def __init__(self, providers: list[GraphQLProvider], max_age: float = 10.0):
+        """
+        Args:
+            providers: The providers whose queries can be batched.
+            max_age: Seconds the result of a provider is kept for it.
+        """
+        self.providers = providers
+        self.max_age = max_age
+
+        self._bodies = {
+            provider: provider.pwd.joinpath(provider.query_file).read_text()
+            for provider in providers
+        }
+        self._results: dict[GraphQLProvider, tuple[list[Any], float]] = {}
+        self._lock = asyncio.Lock()
+
+    def group(self, provider: GraphQLProvider) -> list[GraphQLProvider]:
+        """
+        Get the providers whose endpoint in use is the one of `provider`.
+        """
+        if provider not in self._bodies or provider.url.url is None:
+            return []
+
+        return [other for other in self.providers if other.url.url == provider.url.url]
+
+    def document(self, queries: dict[str, GraphQLProvider], pinned: bool = False) -> str:
+        """
+        Build the document querying a page of each aliased provider.
+        """
+        inputs = [
+            entry
+            for alias, provider in queries.items()
+            for entry in alias_inputs(provider, alias, pinned)
+        ]
+        bodies = [
+            alias_query(self._bodies[provider], alias, pinned)
+            for alias, provider in queries.items()
+        ]
+
+        header = "query (" + ",".join(inputs) + ") {"
+        footer = "_meta { block { number } }\n}"
+        return "\n".join([header, *bodies, footer])
+
+    async def _fetch(
+        self, group: list[GraphQLProvider]
+    ) -> Optional[dict[GraphQLProvider, list[Any]]]:
+        """
+        Fetch every page of the queries of a group of providers.
+        :return: The raw entries per provider, or None if a request failed.
+        """
+        aliases = {f"q{idx}": provider for idx, provider in enumerate(group)}
+        cursors = {alias: ID_LOWER_BOUND for alias in aliases}
+        results: dict[GraphQLProvider, list[Any]] = {provider: [] for provider in group}
+        block: Optional[int] = None
+
+        while cursors:
+            queries = {alias: aliases[alias] for alias in cursors}
+            variables = {}
+            for alias, provider in queries.items():
+                inputs = getattr(provider.url.params, "inputs", None) or {}
+                values = {
+                    **inputs,
+                    "first": PAGE_SIZE,
+                    "lastId": cursors[alias],
+                    "upperId": ID_UPPER_BOUND,
+                    "changeBlock": 0,
+                }
+                if block is not None:
+                    values["block"] = block
+                variables.update({f"{alias}_{name}": value for name, value in values.items()})
+
+            try:
+                response, _ = await asyncio.wait_for(
+                    group[0]._execute(self.document(queries, block is not None), variables),
+                    timeout=30,
+                )
+            except asyncio.TimeoutError:
+                logger.error("Timeout error while fetching batched data from subgraph")
+                return None
+
+            SUBGRAPH_BATCHED_CALLS.labels(len(queries)).inc()
+
+            if "errors" in response:
+                logger.error(f"Internal error: {response['errors']}")
+
+            if not is_success(response):
+                return None
+
+            if block is None:
+                block = indexed_block(response)
+
+            for alias, provider in queries.items():
+                content = response["data"].get(alias) or []
+                results[provider].extend(content)
+
+                if len(content) < PAGE_SIZE:
+                    del cursors[alias]
+                else:
+                    cursors[alias] = content[-1]["id"]
+
+        logger.debug(
+            "Fetched batched subgraph queries",
+            {
+                "slugs": [provider.url.params.slug for provider in group],
+                "counts": [len(data) for data in results.values()],
+                "block": block,
+            },
+        )
+        return results
+
+    async def get(self, provider: GraphQLProvider) -> Optional[list[Any]]:
+        """
+        Get the raw entries of a provider query, fetched along with the other queries served by
+        the same endpoint.
+        :return: The entries, or None if the query cannot be batched or the fetch failed, in
+            which case the provider should be queried on its own.
+        """
+        async with self._lock:
+            if provider in self._results:
+                data, timestamp = self._results.pop(provider)
+                if time.monotonic() - timestamp < self.max_age:
+                    return data
+
+            group = self.group(provider)
+            if len(group) < 2:
+                return None
+
+            results = await self._fetch(group)
+            if results is None:
+                return None
+
+            now = time.monotonic()
+            for other, data in results.items():
+                if other is not provider:
+                    self._results[other] = (data, now)
+
+            return results[provider]
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(providers={len(self.providers)})"
@@ -1,9 +1,11 @@
 from .account import Account
 from .node import Node
-from .safe import Safe
+from .safe import Safe, SafeOverlay, SafeView
 
 __all__ = [
     "Account",
     "Node",
     "Safe",
+    "SafeOverlay",
+    "SafeView",
 ]
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Optional, Protocol
 
 from ...components.balance import Balance
 from .entry import SubgraphEntry
@@ -7,23 +7,39 @@ from .entry import SubgraphEntry
 class Safe(SubgraphEntry):
     """
     A Safe represents a single entry in the subgraph.
+
+    Safes are immutable snapshots of the subgraph data, shared by all the peers linked to them.
+    Values derived per peer (e.g. the additional balance) are carried by a `SafeOverlay`.
     """
 
+    # set once in __init__ through object.__setattr__, as the class is immutable
+    address: Optional[str]
+    balance: Balance
+    allowance: Balance
+    owners: tuple[str, ...]
+    additional_balance: Balance
+
     def __init__(self, address: str, balance: Optional[str], allowance: str, owners: list[str]):
         """
         Create a new Safe with the specified balance and allowance.
         :param balance: The balance of the safe.
         :param allowance: The allowance of the safe.
         """
-        self.address = address.lower() if address is not None else None
-        self.balance = (
-            Balance(f"{balance} wxHOPR") if balance is not None else Balance.zero("wxHOPR")
+        object.__setattr__(self, "address", address.lower() if address is not None else None)
+        object.__setattr__(
+            self,
+            "balance",
+            Balance(f"{balance} wxHOPR") if balance is not None else Balance.zero("wxHOPR"),
+        )
+        object.__setattr__(
+            self,
+            "allowance",
+            Balance(f"{allowance} wxHOPR") if allowance is not None else Balance.zero("wxHOPR"),
         )
-        self.allowance = (
-            Balance(f"{allowance} wxHOPR") if allowance is not None else Balance.zero("wxHOPR")
+        object.__setattr__(
+            self, "owners", tuple(owner.lower() for owner in owners if owner is not None)
         )
-        self.owners = [owner.lower() for owner in owners if owner is not None]
-        self.additional_balance = Balance.zero("wxHOPR")
+        object.__setattr__(self, "additional_balance", Balance.zero("wxHOPR"))
 
     @property
     def total_balance(self) -> Balance:
@@ -32,6 +48,18 @@ class Safe(SubgraphEntry):
         """
         return self.balance + self.additional_balance
 
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{self.__class__.__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{self.__class__.__name__} is immutable")
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
     @classmethod
     def fromSubgraphResult(cls, safe: dict):
         """
@@ -44,3 +72,80 @@ class Safe(SubgraphEntry):
             safe["allowance"]["wxHoprAllowance"],
             [owner["owner"]["id"] for owner in safe["owners"]],
         )
+
+
+class SafeView(Protocol):
+    """
+    Fields of a safe, read either from a `Safe` snapshot or through a `SafeOverlay`.
+    """
+
+    @property
+    def address(self) -> Optional[str]: ...
+
+    @property
+    def balance(self) -> Balance: ...
+
+    @property
+    def allowance(self) -> Balance: ...
+
+    @property
+    def owners(self) -> tuple[str, ...]: ...
+
+    @property
+    def additional_balance(self) -> Balance: ...
+
+    @property
+    def total_balance(self) -> Balance: ...
+
+
+class SafeOverlay:
+    """
+    Per-peer view of a shared `Safe` snapshot, carrying the values derived for that peer.
+    Reading a field of the snapshot goes through the overlay, so it can be used in place of
+    the `Safe` itself.
+    """
+
+    __slots__ = ("snapshot", "additional_balance")
+
+    def __init__(self, snapshot: Safe, additional_balance: Balance):
+        """
+        Create a new overlay.
+        :param snapshot: The shared Safe.
+        :param additional_balance: The balance from allocations and EOAs attributed to the safe.
+        """
+        self.snapshot = snapshot
+        self.additional_balance = additional_balance
+
+    @property
+    def address(self) -> Optional[str]:
+        return self.snapshot.address
+
+    @property
+    def balance(self) -> Balance:
+        return self.snapshot.balance
+
+    @property
+    def allowance(self) -> Balance:
+        return self.snapshot.allowance
+
+    @property
+    def owners(self) -> tuple[str, ...]:
+        return self.snapshot.owners
+
+    @property
+    def total_balance(self) -> Balance:
+        """
+        Get the total balance of the safe, including the additional balance.
+        """
+        return self.snapshot.balance + self.additional_balance
+
+    def __eq__(self, other):
+        if not isinstance(other, SafeOverlay):
+            return False
+        return (
+            self.snapshot == other.snapshot and self.additional_balance == other.additional_balance
+        )
+
+    def __repr__(self):
+        cls = self.__class__.__name__
+        return f"{cls}({self.snapshot}, additional_balance={self.additional_balance})"
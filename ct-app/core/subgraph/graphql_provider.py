@@ -2,23 +2,109 @@ import asyncio
 import json
 import logging
 import sys
+import time
+from dataclasses import dataclass
+from functools import partial
 from pathlib import Path
-from typing import Any, Optional, Tuple
+from typing import Any, AsyncIterator, Iterable, NamedTuple, Optional, Tuple
 
-import aiohttp
-from prometheus_client import Gauge
+from prometheus_client import Counter, Gauge, Histogram
 
+from ..components.asyncloop import AsyncLoop
+from ..components.http_session import PooledSession
+from ..components.latency_window import LatencyWindow
 from ..components.logs import configure_logging
 from .mode import Mode
+from .response_cache import CachedResponse, ResponseCache
 from .url import URL
 
 SUBGRAPH_CALLS = Gauge("ct_subgraph_calls", "# of subgraph calls", ["slug", "type"])
 SUBGRAPH_IN_USE = Gauge("ct_subgraph_in_use", "Subgraph in use", ["slug"])
+SUBGRAPH_HEDGED = Counter(
+    "ct_subgraph_hedged_requests_total", "# of hedged subgraph requests", ["slug"]
+)
+SUBGRAPH_LATENCY = Histogram(
+    "ct_subgraph_request_seconds",
+    "Duration of subgraph requests",
+    ["slug"],
+    buckets=[0.1, 0.25, 0.5, 1, 2, 5, 10, 30],
+)
 
 configure_logging()
 logger = logging.getLogger(__name__)
 
 
+PAGE_SIZE = 1000
+MAX_BLOCK_LAG = 10
+# ids are lowercase hex strings, and no id is a single byte: the bounds of the ranges
+ID_LOWER_BOUND = "0x"
+ID_UPPER_BOUND = "0x" + "ff" * 32
+
+
+def id_bounds(ranges: int) -> list[str]:
+    """
+    Split the id space in ranges of equal width on the first byte of the ids.
+    :param ranges: The number of ranges, between 1 and 256.
+    :return: The `ranges + 1` bounds of the ranges.
+    """
+    ranges = min(max(ranges, 1), 256)
+    inner = [f"0x{(256 * idx) // ranges:02x}" for idx in range(1, ranges)]
+
+    return [ID_LOWER_BOUND, *inner, ID_UPPER_BOUND]
+
+
+def indexed_block(response: dict) -> Optional[int]:
+    """
+    Get the block a response was indexed at, from its `_meta` field.
+    """
+    try:
+        return int(response["data"]["_meta"]["block"]["number"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+@dataclass
+class FetchState:
+    headers: Optional[dict] = None
+    block: Optional[int] = None
+    complete: bool = False
+
+
+class FetchResult(NamedTuple):
+    data: list[Any]
+    headers: Optional[dict]
+    # lowest block the pages were indexed at, None if unknown
+    block: Optional[int]
+    # whether every page was fetched
+    complete: bool
+
+
+def is_success(response: Optional[dict]) -> bool:
+    return bool(response) and response.get("data") is not None
+
+
+class Probe(NamedTuple):
+    mode: Mode
+    ok: bool
+    latency: Optional[float]
+    block: Optional[int]
+
+
+def rank(probes: list[Probe]) -> list[Mode]:
+    """
+    Rank the endpoints that answered a probe: endpoints lagging more than `MAX_BLOCK_LAG`
+    blocks behind the most recent one come last, then by latency.
+    """
+    available = [probe for probe in probes if probe.ok]
+    head = max((probe.block for probe in available if probe.block is not None), default=None)
+
+    def key(probe: Probe):
+        lagging = head is not None and (probe.block is None or head - probe.block > MAX_BLOCK_LAG)
+        return (lagging, probe.latency)
+
+    return [probe.mode for probe in sorted(available, key=key)]
+
+
 class ProviderError(Exception):
     pass
 
@@ -27,12 +113,47 @@ class GraphQLProvider:
     query_file: Optional[str] = None
     params: list[str] = []
     default_key: Optional[list[str]] = None
-
-    def __init__(self, url: URL):
+    # GraphQL type of the `id` field of the queried entity
+    cursor_type: str = "ID"
+    # whether the query can be synced incrementally: `_change_block` only tracks changes of
+    # the queried entity itself, not of the nested entities
+    incremental: bool = False
+
+    def __init__(
+        self,
+        url: URL,
+        session: Optional[PooledSession] = None,
+        prefetch_ranges: int = 1,
+        full_sync_interval: float = 0.0,
+        cache: Optional[ResponseCache] = None,
+    ):
+        """
+        :param url: The subgraph endpoints.
+        :param session: The pooled session to send requests with, usually shared between
+            providers. If None, the provider opens its own, closed by `close`.
+        :param prefetch_ranges: Number of id ranges fetched concurrently. The connection limits
+            of the session bound the number of requests in flight.
+        :param full_sync_interval: Seconds between two full fetches of an incremental query.
+        :param cache: Cache of the query results. If None, every call queries the subgraph.
+        """
         self.url = url
+        self.prefetch_ranges = prefetch_ranges
+        self.full_sync_interval = full_sync_interval
+        self.cache = cache
+        self._refresh: Optional[asyncio.Future] = None
+
+        # endpoints by rank, and their recent latencies, see `test`
+        self.ranking: list[Mode] = []
+        self.latencies = {mode: LatencyWindow() for mode in Mode.callables()}
+        self._owns_session = session is None
+        self.session = session if session is not None else PooledSession()
         self.pwd = Path(sys.modules[self.__class__.__module__].__file__).parent
         self._initialize_query(self.query_file, self.params)
 
+        self._entries: dict[str, Any] = {}
+        self._block: Optional[int] = None
+        self._last_full_sync = 0.0
+
     #### PRIVATE METHODS ####
     def _initialize_query(self, query_file: str, extra_inputs: Optional[list[str]] = None):
         if extra_inputs is None:
@@ -54,113 +175,158 @@ class GraphQLProvider:
         if extra_inputs is None:
             extra_inputs = []
 
-        inputs = ["$first: Int!", "$skip: Int!", *extra_inputs]
+        inputs = [
+            "$first: Int!",
+            f"$lastId: {self.cursor_type}!",
+            f"$upperId: {self.cursor_type}!",
+            "$changeBlock: Int!",
+            *extra_inputs,
+        ]
 
         header = "query (" + ",".join(inputs) + ") {"
-        footer = "}"
+        footer = "_meta { block { number } }\n}"
         with open(self.pwd.joinpath(path)) as f:
             body = f.read()
 
         return body.split("(")[0], ("\n".join([header, body, footer]))
 
-    async def _execute(self, query: str, variable_values: dict) -> tuple[dict, Optional[dict]]:
+    async def _execute(
+        self, query: str, variable_values: dict, mode: Optional[Mode] = None
+    ) -> tuple[dict, Optional[dict]]:
         """
         Executes a graphql query.
         :param query: The query to execute.
-        :param variable_values: The variables to use in the query (dict)"""
+        :param variable_values: The variables to use in the query (dict)
+        :param mode: The endpoint to query. If None, the endpoint in use."""
+        if mode is None:
+            mode = self.url.mode
 
+        start = time.perf_counter()
         try:
-            async with (
-                aiohttp.ClientSession() as session,
-                session.post(
-                    self.url.url, json={"query": query, "variables": variable_values}
-                ) as response,
-            ):
-                SUBGRAPH_CALLS.labels(self.url.params.slug, self.url.mode).inc()
-                return await response.json(), response.headers  # ty: ignore[invalid-return-type]
+            async with self.session.session.post(
+                self.url[mode], json={"query": query, "variables": variable_values}
+            ) as response:
+                SUBGRAPH_CALLS.labels(self.url.params.slug, mode).inc()
+                content = await response.json()
+                self.latencies[mode].add(time.perf_counter() - start)
+                return content, response.headers  # ty: ignore[invalid-return-type]
         except TimeoutError as err:
             logger.error("Timeout error", {"error": str(err)})
         except Exception as err:
             logger.error("Unknown error", {"error": str(err)})
+        finally:
+            SUBGRAPH_LATENCY.labels(self.url.params.slug).observe(time.perf_counter() - start)
         return {}, None
 
-    async def _test_query(self, key: str, **kwargs) -> bool:
+    async def _request(self, variables: dict) -> tuple[dict, Optional[dict]]:
+        """
+        Executes the query on the endpoint in use. If the response takes longer than the p95
+        latency of that endpoint, the query is also sent to the next ranked endpoint, and the
+        first successful response is used.
         """
-        Tests a subgraph query.
+        primary = self.url.mode
+        hedge = None
+        if len(self.ranking) > 1 and self.ranking[0] == primary:
+            hedge = self.ranking[1]
+
+        delay = self.latencies[primary].p95 if hedge is not None else None
+        if delay is None:
+            return await asyncio.wait_for(self._execute(self._sku_query, variables), timeout=30)
+
+        def attempt(mode: Mode) -> asyncio.Task:
+            return asyncio.create_task(
+                asyncio.wait_for(self._execute(self._sku_query, variables, mode), timeout=30)
+            )
+
+        tasks = [attempt(primary)]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                SUBGRAPH_HEDGED.labels(self.url.params.slug).inc()
+                tasks.append(attempt(hedge))
+
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None and is_success(task.result()[0]):
+                        return task.result()
+
+            return tasks[0].result()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _probe(self, key: str, mode: Mode, **kwargs) -> Probe:
+        """
+        Tests a subgraph query on an endpoint.
         :param key: The key to look for in the response.
+        :param mode: The endpoint to test.
         :param kwargs: The variables to use in the query (dict).
-        :return: True if the query is successful, False otherwise.
+        :return: Whether the query is successful, its latency and the indexed block.
         """
-        kwargs.update({"first": 1, "skip": 0})
+        kwargs.update(
+            {"first": 1, "lastId": ID_LOWER_BOUND, "upperId": ID_UPPER_BOUND, "changeBlock": 0}
+        )
+        log_params = {"url": self.url[mode], "mode": mode.value, "key": key, **kwargs}
 
+        start = time.perf_counter()
         try:
-            logger.debug(
-                "Testing subgraph endpoint",
-                {
-                    "url": self.url.url,
-                    "mode": self.url.mode.value,
-                    "key": key,
-                    **kwargs,
-                },
+            logger.debug("Testing subgraph endpoint", log_params)
+            response, _ = await asyncio.wait_for(
+                self._execute(self._sku_query, kwargs, mode), timeout=30
             )
-            response, _ = await asyncio.wait_for(self._execute(self._sku_query, kwargs), timeout=30)
         except asyncio.TimeoutError:
-            logger.error(
-                "Query timeout occurred",
-                {
-                    "url": self.url.url,
-                    "mode": self.url.mode.value,
-                    "key": key,
-                    **kwargs,
-                },
-            )
-            return False
+            logger.error("Query timeout occurred", log_params)
+            return Probe(mode, False, None, None)
         except ProviderError as err:
-            logger.error(
-                "ProviderError error",
-                {
-                    "error": str(err),
-                    "url": self.url.url,
-                    "mode": self.url.mode.value,
-                    "key": key,
-                    **kwargs,
-                },
-            )
-            return False
-
-        return key in response.get("data", [])
+            logger.error("ProviderError error", {"error": str(err), **log_params})
+            return Probe(mode, False, None, None)
+
+        return Probe(
+            mode,
+            key in (response.get("data") or {}),
+            time.perf_counter() - start,
+            indexed_block(response),
+        )
 
-    async def _get(self, key: str, **kwargs) -> list[Any]:
+    async def _pages(
+        self, key: str, lower: str, upper: str, state: FetchState, **kwargs
+    ) -> AsyncIterator[list[Any]]:
         """
-        Gets the data from a subgraph query.
+        Yields the pages of entries whose id is in a range. Each page starts after the id of
+        the last entry of the previous one (keyset pagination).
         :param key: The key to look for in the response.
+        :param lower: The range lower bound (excluded).
+        :param upper: The range upper bound (excluded).
+        :param state: Updated with the headers, the lowest indexed block, and whether every
+            page was fetched.
         :param kwargs: The variables to use in the query (dict).
-        :return: The data from the query.
         """
-        page_size = 1000
-        skip = 0
-        data = []
+        last_id = lower
 
         while True:
-            kwargs.update({"first": page_size, "skip": skip})
+            variables = {**kwargs, "first": PAGE_SIZE, "lastId": last_id, "upperId": upper}
 
             try:
-                response, headers = await asyncio.wait_for(
-                    self._execute(self._sku_query, kwargs), timeout=30
-                )
+                response, state.headers = await self._request(variables)
             except asyncio.TimeoutError:
                 logger.error("Timeout error while fetching data from subgraph")
-                break
+                return
             except ProviderError as err:
                 logger.error("ProviderError error", {"error": str(err)})
-                break
+                return
 
             if response is None:
-                break
+                return
 
             if "errors" in response:
                 logger.error(f"Internal error: {response['errors']}")
 
+            # failed requests return an empty response, the range is incomplete
+            if not is_success(response):
+                return
+
             try:
                 content = response.get("data", dict()).get(key, [])
             except Exception as err:
@@ -168,26 +334,228 @@ class GraphQLProvider:
                     "Error while fetching data from subgraph",
                     {"error": str(err), "data": response},
                 )
-                break
-            data.extend(content)
+                return
+
+            page_block = indexed_block(response)
+            if page_block is not None:
+                state.block = page_block if state.block is None else min(state.block, page_block)
+
+            if len(content) < PAGE_SIZE:
+                state.complete = True
+                yield content
+                return
+
+            last_id = content[-1]["id"]
+            yield content
+
+    async def _get_range(self, key: str, lower: str, upper: str, **kwargs) -> FetchResult:
+        """
+        Gets the entries whose id is in a range.
+        :return: The data from the query, with the lowest block it was indexed at.
+        """
+        state = FetchState()
+        data = [
+            entry
+            async for page in self._pages(key, lower, upper, state, **kwargs)
+            for entry in page
+        ]
+
+        return FetchResult(data, state.headers, state.block, state.complete)
 
-            skip += page_size
-            if len(content) < page_size:
-                break
+    async def _get(self, key: str, **kwargs) -> FetchResult:
+        """
+        Gets the data from a subgraph query. The id space is split in `prefetch_ranges` ranges,
+        fetched concurrently.
+        :param key: The key to look for in the response.
+        :param kwargs: The variables to use in the query (dict).
+        :return: The data from the query, ordered by id.
+        """
+        bounds = id_bounds(self.prefetch_ranges)
+
+        results = await asyncio.gather(
+            *[
+                self._get_range(key, lower, upper, **kwargs)
+                for lower, upper in zip(bounds[:-1], bounds[1:])
+            ]
+        )
+
+        headers = results[-1].headers
+        blocks = [result.block for result in results if result.block is not None]
 
         try:
             if headers is not None:
                 attestations = json.loads(headers.getall("graph-attestation")[0])
                 logger.debug("Subgraph attestations", {"attestations": attestations})
-        except UnboundLocalError:
-            # raised if the headers variable is not defined
-            pass
         except KeyError:
             # raised if using the centralized endpoint
             pass
-        return data
+
+        return FetchResult(
+            [entry for result in results for entry in result.data],
+            headers,
+            min(blocks) if blocks else None,
+            all(result.complete for result in results),
+        )
+
+    async def _sync(self, key: str, **kwargs) -> FetchResult:
+        """
+        Gets the data from a subgraph query, incrementally if the provider supports it: only
+        the entities changed since the last indexed block are fetched, and merged by id into
+        the entities known so far. A full fetch replaces them periodically, when the indexed
+        block goes backwards (reorg, or an other indexer), or when no block is known yet.
+        :param key: The key to look for in the response.
+        :param kwargs: The variables to use in the query (dict).
+        :return: The entities known after the sync.
+        """
+        if not self.incremental:
+            return await self._get(key, changeBlock=0, **kwargs)
+
+        full = (
+            self._block is None
+            or time.monotonic() - self._last_full_sync >= self.full_sync_interval
+        )
+
+        result = await self._get(key, changeBlock=0 if full else self._block, **kwargs)
+
+        if not full and result.block is not None and result.block < self._block:
+            logger.warning(
+                "Subgraph block went backwards, resyncing",
+                {"slug": self.url.params.slug, "block": result.block, "last_block": self._block},
+            )
+            full = True
+            result = await self._get(key, changeBlock=0, **kwargs)
+
+        if full:
+            self._entries = {entry["id"]: entry for entry in result.data}
+            self._last_full_sync = time.monotonic()
+        else:
+            self._entries.update((entry["id"], entry) for entry in result.data)
+
+        # only move forward from a complete fetch, so that no change is skipped
+        if result.complete and result.block is not None:
+            self._block = result.block
+        elif full:
+            self._block = None
+
+        logger.debug(
+            "Synced subgraph entities",
+            {
+                "slug": self.url.params.slug,
+                "full": full,
+                "changed": len(result.data),
+                "count": len(self._entries),
+                "block": self._block,
+            },
+        )
+        return result._replace(data=list(self._entries.values()))
+
+    def _seed(self, cached: CachedResponse):
+        """
+        Start the incremental sync from a cached result, instead of a full fetch.
+        """
+        if not self.incremental or self._block is not None or cached.block is None:
+            return
+
+        self._entries = {entry["id"]: entry for entry in cached.data}
+        self._block = cached.block
+        self._last_full_sync = time.monotonic() - cached.age
+
+    async def _fetch(
+        self, key: str, cache_key: str, cached: Optional[CachedResponse], **kwargs
+    ) -> list[Any]:
+        """
+        Syncs the query and caches the result. If the sync is incomplete, the cached result is
+        served instead, when there is one.
+        """
+        result = await self._sync(key, **kwargs)
+
+        if result.complete:
+            await self.cache.store(cache_key, result.data, result.block)
+            return result.data
+
+        if cached is not None:
+            logger.warning(
+                "Serving cached subgraph data", {"slug": self.url.params.slug, "age": cached.age}
+            )
+            return cached.data
+
+        return result.data
+
+    async def _revalidate(self, key: str, cache_key: str, **kwargs):
+        try:
+            await self._fetch(key, cache_key, None, **kwargs)
+        except Exception as err:
+            logger.error("Background subgraph refresh failed", {"error": str(err)})
 
     #### DEFAULT PUBLIC METHODS ####
+    async def close(self):
+        """
+        Closes the session of the provider, if it is not shared.
+        """
+        if self._owns_session:
+            await self.session.close()
+
+    def parse(self, raw: dict) -> Iterable[Any]:
+        """
+        Converts a raw entry of the query into typed entries.
+        """
+        return [raw]
+
+    async def stream(self, key: Optional[str] = None, **kwargs) -> AsyncIterator[Any]:
+        """
+        Yields the typed entries of a subgraph query, page by page, so that only the pages in
+        flight are held in memory. Ranges are fetched concurrently, so entries are not ordered.
+        The cache holds whole results, so it is only used by `get`, never while streaming.
+        :param key: The key to look for in the response. If None, the default key is used.
+        :param kwargs: The variables to use in the query (dict).
+        """
+        if key is None:
+            key = self.default_key
+        if key is None:
+            logger.warning(
+                "No key provided for the query, and no default key set. Skipping query..."
+            )
+            return
+
+        if inputs := getattr(self.url.params, "inputs", None):
+            kwargs.update(inputs)
+
+        bounds = id_bounds(self.prefetch_ranges)
+        # one slot per range: a range waits for its previous page to be consumed
+        queue: asyncio.Queue[Optional[list[Any]]] = asyncio.Queue(maxsize=len(bounds) - 1)
+
+        async def produce(lower: str, upper: str):
+            try:
+                async for page in self._pages(
+                    key, lower, upper, FetchState(), changeBlock=0, **kwargs
+                ):
+                    await queue.put(page)
+            except asyncio.CancelledError:
+                raise
+            except Exception as err:
+                logger.error("Error while streaming data from subgraph", {"error": str(err)})
+            await queue.put(None)
+
+        producers = [
+            asyncio.create_task(produce(lower, upper))
+            for lower, upper in zip(bounds[:-1], bounds[1:])
+        ]
+
+        try:
+            remaining = len(producers)
+            while remaining:
+                page = await queue.get()
+                if page is None:
+                    remaining -= 1
+                    continue
+
+                for raw in page:
+                    for entry in self.parse(raw):
+                        yield entry
+        finally:
+            for producer in producers:
+                producer.cancel()
+
     async def get(self, key: Optional[str] = None, **kwargs):
         """
         Gets the data from a subgraph query.
@@ -196,9 +564,9 @@ class GraphQLProvider:
         :return: The data from the query.
         """
 
-        if key is None and self.default_key is not None:
+        if key is None:
             key = self.default_key
-        else:
+        if key is None:
             logger.warning(
                 "No key provided for the query, and no default key set. Skipping query..."
             )
@@ -206,13 +574,37 @@ class GraphQLProvider:
 
         if inputs := getattr(self.url.params, "inputs", None):
             kwargs.update(inputs)
-        return await self._get(key, **kwargs)
+
+        if self.cache is None:
+            return (await self._sync(key, **kwargs)).data
+
+        cache_key = self.cache.key(self.url.params.slug, self._sku_query, kwargs)
+        cached = await self.cache.load(cache_key)
+
+        if cached is not None:
+            self._seed(cached)
+
+            if cached.age < self.cache.ttl:
+                return cached.data
+
+            # stale-while-revalidate, the staleness is bounded by the maximum staleness
+            if cached.age < self.cache.max_stale:
+                if self._refresh is None or self._refresh.done():
+                    self._refresh = AsyncLoop.add(
+                        partial(self._revalidate, key, cache_key, **kwargs),
+                        publish_to_task_set=False,
+                    )
+                return cached.data
+
+        return await self._fetch(key, cache_key, cached, **kwargs)
 
     async def test(self, method: str, **kwargs):
         """
-        Tests a subgraph query using the default key.
+        Tests a subgraph query using the default key. In `auto` mode, all the endpoints are
+        probed concurrently, and ranked: endpoints lagging behind the most recent indexed block
+        come last, then faster endpoints first. The best one is used.
         :param kwargs: The variables to use in the query (dict).
-        :return: True if the query is successful, False otherwise.
+        :return: The mode in use.
         """
         if self.default_key is None:
             logger.warning(
@@ -222,18 +614,14 @@ class GraphQLProvider:
 
         if method != "auto":
             self.url.mode = Mode.fromString(method)
+            self.ranking = [self.url.mode] if self.url.mode != Mode.NONE else []
+            probes = []
         else:
-            for mode in Mode.callables():
-                self.url.mode = mode
-                try:
-                    result = await self._test_query(self.default_key, **kwargs)
-                except ProviderError as err:
-                    logger.error(f"ProviderError error: {err}")
-
-                if result is True:
-                    break
-            else:
-                self.url.mode = Mode.NONE
+            probes = await asyncio.gather(
+                *[self._probe(self.default_key, mode, **kwargs) for mode in Mode.callables()]
+            )
+            self.ranking = rank(probes)
+            self.url.mode = self.ranking[0] if self.ranking else Mode.NONE
 
         if self.url.mode == Mode.NONE:
             logger.warning(f"No subgraph available for '{self.url.params.slug}'")
@@ -243,7 +631,11 @@ class GraphQLProvider:
             {
                 "url": self.url.url,
                 "mode": self.url.mode.value,
-                "result": result,
+                "ranking": [mode.value for mode in self.ranking],
+                "probes": [
+                    {"mode": p.mode.value, "ok": p.ok, "latency": p.latency, "block": p.block}
+                    for p in probes
+                ],
                 **kwargs,
             },
         )
@@ -1,9 +1,21 @@
+from typing import Any, Iterable
+
+from . import entries
 from .graphql_provider import GraphQLProvider
 
 
 class Safes(GraphQLProvider):
     query_file = "queries/safes_balance.graphql"
 
+    def parse(self, raw: dict) -> Iterable[Any]:
+        return [
+            entries.Node.fromSubgraphResult(node) for node in raw["registeredNodesInSafeRegistry"]
+        ]
+
 
 class Rewards(GraphQLProvider):
     query_file = "queries/rewards.graphql"
+    incremental = True
+
+    def parse(self, raw: dict) -> Iterable[Any]:
+        return [entries.Account(raw["id"], raw["redeemedValue"])]
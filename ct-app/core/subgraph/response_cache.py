@@ -0,0 +1,118 @@
+"""
+Response cache - subgraph query results persisted on disk.
+
+Results are keyed by the subgraph slug, the query and its variables, and stored along with the
+block they were indexed at and the time they were fetched. Fresh entries (younger than the TTL)
+are served without querying the subgraph. Stale entries (younger than the maximum staleness)
+are served immediately while the provider refreshes them in the background. Any entry is the
+fallback when the subgraph cannot be reached. On a cold start, the entries are read back from
+disk instead of fetching every page again.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+from ..components.logs import configure_logging
+
+configure_logging()
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    data: list[Any]
+    block: Optional[int]
+    timestamp: float
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.timestamp
+
+
+class ResponseCache:
+    """
+    On-disk cache of the subgraph query results, with an in-memory copy of the entries read
+    or written since startup.
+
+    Thread Safety:
+        Safe for asyncio single-threaded environment. Disk accesses run in a worker thread.
+    """
+
+    def __init__(self, directory: str | Path, ttl: float, max_stale: float):
+        """
+        Args:
+            directory: Directory the entries are stored in, created if missing.
+            ttl: Seconds an entry is served without querying the subgraph.
+            max_stale: Seconds an entry can be served while it is refreshed.
+        """
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.max_stale = max_stale
+
+        self._memory: dict[str, CachedResponse] = {}
+
+    @staticmethod
+    def key(slug: str, query: str, variables: dict) -> str:
+        content = json.dumps([slug, query, variables], sort_keys=True, default=str)
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory.joinpath(f"{key}.json")
+
+    def _read(self, key: str) -> Optional[CachedResponse]:
+        try:
+            with open(self._path(key)) as f:
+                content = json.load(f)
+            return CachedResponse(content["data"], content["block"], content["timestamp"])
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as err:
+            logger.warning("Unreadable subgraph cache entry", {"key": key, "error": str(err)})
+            return None
+
+    def _write(self, key: str, entry: CachedResponse) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        path = self._path(key)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"data": entry.data, "block": entry.block, "timestamp": entry.timestamp}, f)
+        os.replace(tmp_path, path)
+
+    async def load(self, key: str) -> Optional[CachedResponse]:
+        """
+        Get an entry, from memory or from disk.
+        :returns: The entry, or None if there is none.
+        """
+        if key not in self._memory:
+            entry = await asyncio.to_thread(self._read, key)
+            if entry is None:
+                return None
+            self._memory[key] = entry
+
+        return self._memory[key]
+
+    async def store(self, key: str, data: list[Any], block: Optional[int]) -> None:
+        """
+        Record the result of a query. Failing to persist it only keeps it in memory.
+        """
+        entry = CachedResponse(data, block, time.time())
+        self._memory[key] = entry
+
+        try:
+            await asyncio.to_thread(self._write, key, entry)
+        except OSError as err:
+            logger.warning("Failed to persist subgraph cache entry", {"error": str(err)})
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}(directory={self.directory}, ttl={self.ttl}, "
+            f"max_stale={self.max_stale})"
+        )
@@ -0,0 +1,92 @@
+"""
+Balance microbenchmark.
+
+Compares the integer-wei Balance against the previous string-backed implementation on the
+operations of an economic model run: parsing on-chain amounts, summing stakes and comparing
+balances.
+"""
+
+import time
+from decimal import Decimal
+
+import pytest
+
+from core.components.balance import WEI_TO_READABLE, Balance
+
+ITERATIONS = 20_000
+
+
+class StringBalance:
+    """
+    Hot paths of the former Balance, which kept the amount as a string and parsed it on
+    every access.
+    """
+
+    def __init__(self, value: str):
+        self._value = value
+
+        if self.unit.split()[0] == "wei":
+            converted_value = Decimal(self.value) / WEI_TO_READABLE
+            self._value = f"{converted_value} {self.unit.split(maxsplit=1)[1]}"
+
+        _ = self.value
+
+    @property
+    def value(self) -> Decimal:
+        return Decimal(self._value.split()[0])
+
+    @property
+    def unit(self) -> str:
+        return self._value.split(maxsplit=1)[1]
+
+    def __add__(self, other):
+        if self.unit != other.unit:
+            raise TypeError("Cannot add balances with different units")
+        return StringBalance(f"{self.value + other.value} {self.unit}")
+
+    def __lt__(self, other):
+        if self.unit != other.unit:
+            raise ValueError("Cannot compare balances with different units")
+        return self.value < other.value
+
+    def __eq__(self, other):
+        return (
+            self.value.quantize(Decimal("1e-7")) == other.value.quantize(Decimal("1e-7"))
+            and self.unit == other.unit
+        )
+
+
+def workload(cls) -> float:
+    start = time.perf_counter()
+
+    total = cls("0 wxHOPR")
+    threshold = cls("1000 wxHOPR")
+    for idx in range(ITERATIONS):
+        stake = cls(f"{idx * 10**15} wei wxHOPR")
+        total = total + stake
+        _ = stake < threshold
+        _ = stake == threshold
+
+    return time.perf_counter() - start
+
+
+@pytest.mark.benchmark
+def test_balance_throughput():
+    """
+    Benchmark: integer-wei Balance vs. string-backed Balance.
+
+    Success criteria: same results, integer-wei Balance at least twice as fast.
+    """
+    string_duration = workload(StringBalance)
+    wei_duration = workload(Balance)
+
+    print(f"\n{'='*60}")
+    print("Balance Throughput Benchmark")
+    print(f"{'='*60}")
+    print(f"String-backed: {ITERATIONS / string_duration:>12,.0f} ops/sec")
+    print(f"Integer-wei:   {ITERATIONS / wei_duration:>12,.0f} ops/sec")
+    print(f"Speedup:       {string_duration / wei_duration:>12.1f}x")
+
+    expected = sum(idx * 10**15 for idx in range(ITERATIONS))
+    assert Balance(f"{expected} wei wxHOPR").value == StringBalance(f"{expected} wei wxHOPR").value
+    assert wei_duration * 2 < string_duration
@@ -2,7 +2,7 @@ import pytest
 
 from core.api.response_objects import TicketPrice
 from core.components.balance import Balance
-from core.components.config_parser.economic_model import LegacyParams
+from core.components.config_parser.economic_model import LegacyEquationParams, LegacyParams
 
 ZERO_BALANCE = Balance.zero("wxHOPR")
 
@@ -64,3 +64,44 @@ def test_message_count_for_reward(model: LegacyParams):
         / model.coefficients.upperbound,
         2,
     ), "Non linear above [lowerbound, upperbound] range"
+
+
+def test_message_count_does_not_mutate_coefficients(model: LegacyParams):
+    ticket_price = TicketPrice({"price": "0.0001 wxHOPR"})
+    upperbound = model.coefficients.upperbound
+
+    with_rewards = model.yearly_message_count(
+        model.coefficients.upperbound * 2, ticket_price, Balance("1000 wxHOPR")
+    )
+    without_rewards = model.yearly_message_count(model.coefficients.upperbound * 2, ticket_price)
+
+    assert model.coefficients.upperbound is upperbound
+    assert with_rewards > without_rewards
+
+
+def test_equations_compiled_once(model: LegacyParams):
+    equation = model.equations.fx.compiled_formula
+
+    assert model.equations.fx.compiled_formula is equation
+
+    model.equations.fx.formula = "2 * a * x"
+    assert model.equations.fx.compiled_formula is not equation
+    assert model.transformed_stake(model.coefficients.lowerbound) == (
+        model.coefficients.lowerbound * 2
+    )
+
+
+@pytest.mark.parametrize(
+    "formula",
+    [
+        "__import__('os')",
+        "x.value",
+        "unknown * x",
+        "[x]",
+        "'x'",
+        "a * (",
+    ],
+)
+def test_invalid_equations_rejected(formula: str):
+    with pytest.raises(ValueError):
+        LegacyEquationParams({"formula": formula, "condition": "x > lowerbound"})
@@ -148,6 +148,15 @@ def test_bucket_apr():
     with pytest.raises(ValueError):
         bucket.apr(Decimal("0.5"))
 
+    for x in [0, 0.5, 0.75]:
+        with pytest.raises(ValueError):
+            bucket.table.apr(x)
+
+    assert bucket.table.apr(0.125) == pytest.approx(
+        float(bucket.apr(Decimal("0.125"))), abs=bucket.table.error_bound
+    )
+    assert bucket.table.apr(0.375) == 0
+
 
 def test_yearly_message_count():
     stake = Balance("75000 wxHOPR")
@@ -0,0 +1,116 @@
+from decimal import Decimal
+
+import numpy as np
+import pytest
+import yaml
+
+from core.api.response_objects import TicketPrice
+from core.components.balance import Balance
+from core.components.config_parser import Parameters
+from core.components.config_parser.economic_model import EconomicModelParams
+
+RELATIVE_TOLERANCE = 1e-9
+TICKET_PRICE = TicketPrice({"price": "0.0001 wxHOPR"})
+XS = [Decimal("0.05"), Decimal("0.3")]
+
+
+@pytest.fixture(params=["test/test_config.yaml", ".configs/core_prod_config.yaml"])
+def model(request) -> EconomicModelParams:
+    with open(request.param, "r") as file:
+        return Parameters(yaml.safe_load(file)).economic_model
+
+
+@pytest.fixture
+def stakes(model: EconomicModelParams) -> np.ndarray:
+    upperbound = float(model.legacy.coefficients.upperbound.value)
+    lowerbound = float(model.legacy.coefficients.lowerbound.value)
+
+    rng = np.random.default_rng(42)
+    random_stakes = np.round(rng.uniform(0, 4 * upperbound, 500), 6)
+    edge_stakes = [0, lowerbound / 2, lowerbound, upperbound, upperbound * 1.000001]
+
+    return np.concatenate([edge_stakes, random_stakes])
+
+
+@pytest.fixture
+def redeemed_rewards(stakes: np.ndarray) -> np.ndarray:
+    rng = np.random.default_rng(7)
+    rewards = np.round(rng.uniform(0, stakes.max() / 10, stakes.size), 6)
+    rewards[::3] = 0
+    return rewards
+
+
+def to_balance(value: float) -> Balance:
+    return Balance(f"{Decimal(str(value))} wxHOPR")
+
+
+def test_legacy_parity(model: EconomicModelParams, stakes, redeemed_rewards):
+    batch = model.legacy.yearly_message_counts(stakes, TICKET_PRICE, redeemed_rewards)
+
+    reference = [
+        model.legacy.yearly_message_count(to_balance(stake), TICKET_PRICE, to_balance(reward))
+        for stake, reward in zip(stakes, redeemed_rewards)
+    ]
+
+    np.testing.assert_allclose(batch, reference, rtol=RELATIVE_TOLERANCE)
+
+
+def test_legacy_parity_without_rewards(model: EconomicModelParams, stakes):
+    batch = model.legacy.yearly_message_counts(stakes, TICKET_PRICE)
+
+    reference = [
+        model.legacy.yearly_message_count(to_balance(stake), TICKET_PRICE) for stake in stakes
+    ]
+
+    np.testing.assert_allclose(batch, reference, rtol=RELATIVE_TOLERANCE)
+
+
+def test_sigmoid_parity(model: EconomicModelParams, stakes):
+    batch = model.sigmoid.yearly_message_counts(stakes, TICKET_PRICE, model.sigmoid.network_apr(XS))
+
+    reference = [
+        model.sigmoid.yearly_message_count(to_balance(stake), TICKET_PRICE, XS) for stake in stakes
+    ]
+
+    np.testing.assert_allclose(batch, reference, rtol=RELATIVE_TOLERANCE)
+
+
+def test_economic_model_batch(model: EconomicModelParams, stakes, redeemed_rewards):
+    results = model.yearly_message_counts(
+        stakes, TICKET_PRICE, redeemed_rewards, model.sigmoid.network_apr(XS)
+    )
+
+    assert set(results) == {"legacy", "sigmoid"}
+    assert all(values.shape == stakes.shape for values in results.values())
+    np.testing.assert_array_equal(
+        results["legacy"],
+        model.legacy.yearly_message_counts(stakes, TICKET_PRICE, redeemed_rewards),
+    )
+
+
+def test_empty_batch(model: EconomicModelParams):
+    empty = np.array([], dtype=np.float64)
+
+    results = model.yearly_message_counts(empty, TICKET_PRICE, empty, 0.0)
+
+    assert all(values.size == 0 for values in results.values())
+
+
+@pytest.mark.parametrize(
+    "xs", [XS, [Decimal("0.001"), Decimal("0.01")], [Decimal("0.2"), Decimal("0.9")]]
+)
+def test_network_apr_parity(model: EconomicModelParams, xs):
+    assert model.sigmoid.network_apr(xs) == pytest.approx(
+        float(model.sigmoid.apr(xs)), rel=RELATIVE_TOLERANCE
+    )
+
+
+def test_apr_table_error_bound(model: EconomicModelParams):
+    for bucket in model.sigmoid.buckets.values:
+        upperbound = float(bucket.upperbound)
+        xs = np.geomspace(upperbound * 1e-10, upperbound * (1 - 1e-9), 2000)
+
+        for x in xs:
+            assert bucket.table.apr(x) == pytest.approx(
+                float(bucket.apr(Decimal(x))), abs=2 * bucket.table.error_bound
+            )
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from core.components.config_parser.equation import Equation, compile_equation
+
+PARAMETERS = ("x", "a", "lowerbound", "upperbound")
+
+
+def test_scalar_evaluation():
+    equation = Equation("a * x + 1", PARAMETERS)
+
+    assert equation.scalar(x=2, a=3, lowerbound=0, upperbound=0) == 7
+
+
+def test_array_evaluation_of_chained_comparisons():
+    equation = Equation("lowerbound <= x <= upperbound and not x == 2", PARAMETERS)
+
+    result = equation.array(x=np.array([0.0, 1.0, 2.0, 3.0]), a=1, lowerbound=1, upperbound=2)
+
+    np.testing.assert_array_equal(result, [False, True, False, False])
+    assert equation.scalar(x=1.5, a=1, lowerbound=1, upperbound=2) is True
+
+
+def test_compile_equation_is_cached():
+    assert compile_equation("a * x", PARAMETERS) is compile_equation("a * x", PARAMETERS)
+    assert compile_equation("a * x", PARAMETERS) is not compile_equation("x * a", PARAMETERS)
+
+
+@pytest.mark.parametrize(
+    "source",
+    ["open('file')", "x if a else 0", "lambda: x", "x[0]", "b * x", "True", "x // a"],
+)
+def test_rejected_expressions(source: str):
+    with pytest.raises(ValueError):
+        Equation(source, PARAMETERS)
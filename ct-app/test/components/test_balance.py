@@ -1,3 +1,5 @@
+import copy
+import pickle
 from decimal import Decimal
 
 import pytest
@@ -9,7 +11,8 @@ def test_read_balance():
     assert Balance("42.314 wxHOPR").value == Decimal("42.314")
     assert Balance("42.314 wxHOPR").unit == "wxHOPR"
 
-    assert Balance("42.314 wei wxHOPR").value == Decimal("42.314") / WEI_TO_READABLE
+    # amounts in wei are rounded to the nearest wei
+    assert Balance("42.314 wei wxHOPR").value == Decimal("42") / WEI_TO_READABLE
     assert Balance("42.314 wei wxHOPR").unit == "wxHOPR"
 
     with pytest.raises(TypeError):
@@ -29,10 +32,16 @@ def test_from_float():
     assert Balance.from_float(42.314, "wxHOPR").value == Decimal("42.314")
     assert Balance.from_float(42.314, "wxHOPR").unit == "wxHOPR"
 
-    assert Balance.from_float(42.314, "wei wxHOPR").value == Decimal("42.314") / WEI_TO_READABLE
+    assert Balance.from_float(42.314, "wei wxHOPR").value == Decimal("42") / WEI_TO_READABLE
     assert Balance.from_float(42.314, "wei wxHOPR").unit == "wxHOPR"
 
 
+def test_from_wei():
+    assert Balance.from_wei(42, "wxHOPR") == Balance("42 wei wxHOPR")
+    assert Balance.from_wei(10**18, "wxHOPR").value == Decimal("1")
+    assert Balance.from_wei(42, "wxHOPR").unit == "wxHOPR"
+
+
 def test_comparison():
     assert Balance("1.1 unit") < Balance("1.2 unit")
     assert Balance("1.1 unit") < Balance("1200000000000000000 wei unit")
@@ -98,3 +107,34 @@ def test_power():
 def test_round():
     assert round(Balance("2.12 unit"), 1) == Balance("2.1 unit")
     assert round(Balance("2.126 unit"), 2) == Balance("2.13 unit")
+
+
+def test_wei_storage():
+    assert Balance("1.5 unit").wei == 1_500_000_000_000_000_000
+    assert Balance("1500000000000000000 wei unit").wei == 1_500_000_000_000_000_000
+    assert Balance("0.0000000000000000015 unit").wei == 2
+
+    assert Balance("1500000000000000000 wei unit").as_str == "1.5 unit"
+    assert Balance("-2.50 unit").as_str == "-2.5 unit"
+    assert Balance("3.000 unit").as_str == "3 unit"
+
+
+def test_immutable():
+    balance = Balance("1.0 unit")
+
+    with pytest.raises(AttributeError):
+        balance._wei = 2  # ty: ignore[invalid-assignment]
+
+    assert copy.copy(balance) is balance
+    assert copy.deepcopy(balance) is balance
+
+    restored = pickle.loads(pickle.dumps(balance))
+    assert restored == balance
+    assert restored.unit == balance.unit
+
+
+def test_int_arithmetic():
+    assert Balance("1 wei unit") * 3 == Balance("3 wei unit")
+    assert (Balance("5 wei unit") / 2).wei == 2
+    assert (Balance("7 wei unit") / 2).wei == 4
+    assert (Balance("7 wei unit") / -2).wei == -4
@@ -357,6 +357,7 @@ class TestMergeDataSourcesOptimization:
     async def test_mergeDataSources_with_large_dataset(self):
         """Test mergeDataSources performance with large dataset (100+ peers)."""
         from core.components import Utils
+        from core.components.data_index import DataIndex
         from core.components.balance import Balance
         from core.rpc import entries as rpc_entries
         from core.subgraph import entries as sg_entries
@@ -387,7 +388,9 @@ class TestMergeDataSourcesOptimization:
             allocation.linked_safes = {f"safe_{i}", f"safe_{(i+1) % num_nodes}"}
 
         # Run mergeDataSources
-        await Utils.mergeDataSources(topology_list, peers_list, nodes_list, allocation_list, {})
+        index = DataIndex()
+        index.sync(nodes_list, allocation_list, [])
+        await Utils.mergeDataSources(topology_list, peers_list, index)
 
         # Verify results
         peers_with_safe = [p for p in peers_list if p.safe is not None]
@@ -401,6 +404,7 @@ class TestMergeDataSourcesOptimization:
     async def test_mergeDataSources_indexed_lookups(self):
         """Test that mergeDataSources uses indexed lookups correctly."""
         from core.components import Utils
+        from core.components.data_index import DataIndex
         from core.components.balance import Balance
         from core.rpc import entries as rpc_entries
         from core.subgraph import entries as sg_entries
@@ -422,7 +426,9 @@ class TestMergeDataSourcesOptimization:
         allocation_list[0].linked_safes = {"safe_1"}
 
         # Run mergeDataSources
-        await Utils.mergeDataSources(topology_list, peers_list, nodes_list, allocation_list, {})
+        index = DataIndex()
+        index.sync(nodes_list, allocation_list, [])
+        await Utils.mergeDataSources(topology_list, peers_list, index)
 
         # Verify indexed lookup worked with case-insensitive matching
         assert peers_list[0].safe is not None
@@ -433,13 +439,14 @@ class TestMergeDataSourcesOptimization:
     async def test_mergeDataSources_edge_cases(self):
         """Test mergeDataSources handles edge cases correctly."""
         from core.components import Utils
+        from core.components.data_index import DataIndex
 
         # Test with empty lists
-        await Utils.mergeDataSources({}, [], [], [], {})
+        await Utils.mergeDataSources({}, [], DataIndex())
 
         # Test with None values
         peers_list = [Peer("address_1")]
-        await Utils.mergeDataSources({}, peers_list, [], [], {})
+        await Utils.mergeDataSources({}, peers_list, DataIndex())
 
         # Peer should not have safe set
         assert peers_list[0].safe is None
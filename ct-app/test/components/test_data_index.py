@@ -0,0 +1,44 @@
+from core.components.balance import Balance
+from core.components.data_index import DataIndex
+from core.rpc import entries as rpc_entries
+from core.subgraph import entries as sg_entries
+
+
+def test_sync_only_rebuilds_on_new_sources():
+    nodes = [sg_entries.Node("ADDRESS_1", sg_entries.Safe("safe_1", "10", "1", ["owner_1"]))]
+    allocations = [
+        rpc_entries.Allocation("owner_1", "schedule", Balance("100 wxHOPR"), Balance("40 wxHOPR"))
+    ]
+    eoa_balances = [rpc_entries.ExternalBalance("owner_1", Balance("5 wxHOPR"))]
+
+    index = DataIndex()
+
+    assert index.sync(nodes, allocations, eoa_balances)
+    assert not index.sync(nodes, allocations, eoa_balances)
+
+    assert index.node("address_1") is nodes[0]
+    assert index.node("unknown") is None
+    assert index.additional_balance("safe_1") == Balance("65 wxHOPR")
+    assert index.additional_balance("safe_2") == Balance.zero("wxHOPR")
+
+    assert index.sync(nodes, allocations, [])
+    assert index.additional_balance("safe_1") == Balance("60 wxHOPR")
+
+
+def test_entities_are_split_between_safes():
+    nodes = [
+        sg_entries.Node("address_1", sg_entries.Safe("safe_1", "10", "1", ["owner_1"])),
+        sg_entries.Node("address_2", sg_entries.Safe("safe_2", "10", "1", ["owner_1"])),
+    ]
+    eoa_balances = [rpc_entries.ExternalBalance("owner_1", Balance("10 wxHOPR"))]
+
+    index = DataIndex()
+    index.sync(nodes, [], eoa_balances)
+
+    assert eoa_balances[0].linked_safes == {"safe_1", "safe_2"}
+    assert index.additional_balance("safe_1") == Balance("5 wxHOPR")
+
+    # links are rebuilt from scratch when the nodes change
+    index.sync(nodes[:1], [], eoa_balances)
+    assert eoa_balances[0].linked_safes == {"safe_1"}
+    assert index.additional_balance("safe_1") == Balance("10 wxHOPR")
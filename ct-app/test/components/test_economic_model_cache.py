@@ -0,0 +1,24 @@
+from core.components.economic_model_cache import EconomicModelCache
+
+
+def test_changed():
+    cache = EconomicModelCache()
+    assert cache.changed({"address_1": (1,), "address_2": (2,)}) == ["address_1", "address_2"]
+
+    cache.store("address_1", (1,), {"legacy": 1.0})
+    cache.store("address_2", (2,), {"legacy": 2.0})
+
+    assert cache.changed({"address_1": (1,), "address_2": (2,)}) == []
+    assert cache.changed({"address_1": (1,), "address_2": (3,)}) == ["address_2"]
+    assert cache.counts("address_2") == {"legacy": 2.0}
+
+
+def test_retain():
+    cache = EconomicModelCache()
+    cache.store("address_1", (1,), {"legacy": 1.0})
+    cache.store("address_2", (2,), {"legacy": 2.0})
+
+    assert cache.retain(["address_2", "address_3"]) == ["address_1"]
+    assert "address_1" not in cache
+    assert "address_2" in cache
+    assert len(cache) == 1
@@ -0,0 +1,58 @@
+import pytest
+
+from core.components import Peer
+from core.components.balance import Balance
+from core.components.eligibility import EligibilityFilter
+from core.subgraph import entries as sg_entries
+
+
+def make_peer(address: str, balance: str = "100", allowance: str = "10", channel: str = "1"):
+    peer = Peer(address)
+    peer.safe = sg_entries.Safe(f"safe_{address}", balance, allowance, [])
+    peer.channel_balance = Balance(f"{channel} wxHOPR")
+    return peer
+
+
+@pytest.fixture
+def eligibility() -> EligibilityFilter:
+    return EligibilityFilter(
+        min_allowance=Balance("5 wxHOPR"),
+        min_stake=Balance("10 wxHOPR"),
+        nft_holders=["safe_nft"],
+        nft_threshold=Balance("50 wxHOPR"),
+        ct_nodes=["ct_node"],
+        exclusion_list=["excluded"],
+    )
+
+
+def test_rejection(eligibility: EligibilityFilter):
+    assert eligibility.rejection(make_peer("eligible")) is None
+    assert eligibility.rejection(make_peer("excluded")) == "excluded"
+    assert eligibility.rejection(make_peer("ct_node")) == "ct_node"
+    assert eligibility.rejection(Peer("no_safe")) == "missing_data"
+    assert eligibility.rejection(make_peer("low_allowance", allowance="1")) == "allowance"
+    assert eligibility.rejection(make_peer("low_stake", balance="20")) == "nft_threshold"
+    assert eligibility.rejection(make_peer("nft", balance="5")) == "min_stake"
+
+    nft_holder = make_peer("nft", balance="20")
+    nft_holder.safe = sg_entries.Safe("safe_nft", "20", "10", [])
+    assert eligibility.rejection(nft_holder) is None
+
+
+def test_apply_counts_rejections(eligibility: EligibilityFilter):
+    inactive = make_peer("inactive")
+    inactive.yearly_message_count = None
+    peers = [make_peer("eligible"), make_peer("excluded"), make_peer("ct_node"), inactive]
+
+    assert eligibility.apply(peers) == [peers[0]]
+    assert eligibility.rejections == {"excluded": 1, "ct_node": 1, "inactive": 1}
+
+
+def test_peer_is_eligible():
+    peer = make_peer("eligible")
+    args = [Balance("5 wxHOPR"), Balance("10 wxHOPR"), [], None, [], []]
+
+    assert peer.is_eligible(*args)
+
+    peer.channel_balance = None
+    assert not peer.is_eligible(*args)
@@ -0,0 +1,47 @@
+import pytest
+import yaml
+
+from core.components.config_parser import Parameters
+from core.components.http_session import PooledSession
+from core.subgraph import URL, Type
+
+
+@pytest.mark.asyncio
+async def test_session_is_reused():
+    pool = PooledSession(limit=5, limit_per_host=2, timeout=12, connect_timeout=3)
+    assert pool.closed
+
+    session = pool.session
+    assert pool.session is session
+    assert session.connector.limit == 5
+    assert session.connector.limit_per_host == 2
+    assert session.timeout.total == 12
+    assert session.timeout.connect == 3
+
+    await pool.close()
+    assert pool.closed
+    assert session.closed
+
+    # reopened on next use
+    assert pool.session is not session
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_providers_share_session():
+    with open("./test/test_config.yaml", "r") as file:
+        params = Parameters(yaml.safe_load(file))
+    pool = PooledSession.fromParams(params.subgraph.connection)
+
+    providers = [
+        s.provider(URL("user", "key", getattr(params.subgraph, s.value)), pool) for s in Type
+    ]
+    assert all(provider.session is pool for provider in providers)
+
+    # a shared session is closed by its owner, not by the providers
+    _ = pool.session
+    for provider in providers:
+        await provider.close()
+    assert not pool.closed
+
+    await pool.close()
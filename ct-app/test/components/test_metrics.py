@@ -0,0 +1,113 @@
+import pytest
+from prometheus_client import REGISTRY, Gauge
+
+from core.components.metrics import OTHER, AddressMetrics
+
+
+def series(metric) -> dict[tuple, float]:
+    return {
+        tuple(sample.labels.values()): sample.value
+        for family in metric.collect()
+        for sample in family.samples
+    }
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        AddressMetrics("unknown")
+
+
+def test_full_mode_publish_removes_absent_addresses():
+    metrics = AddressMetrics("full")
+    gauge = metrics.register(Gauge, "test_full_stake", "", ["address"], "address", registry=None)
+
+    metrics.publish(gauge, {"address_1": 1.0, "address_2": 2.0})
+    assert series(gauge) == {("address_1",): 1.0, ("address_2",): 2.0}
+
+    metrics.publish(gauge, {"address_2": 3.0})
+    assert series(gauge) == {("address_2",): 3.0}
+
+
+def test_bounded_mode_publish_keeps_top_values():
+    metrics = AddressMetrics("bounded", max_series=2)
+    gauge = metrics.register(
+        Gauge, "test_bounded_count", "", ["address", "model"], "address", registry=None
+    )
+
+    metrics.publish(gauge, {"a": 1.0, "b": 5.0, "c": 3.0, "d": 2.0}, model="legacy")
+    assert series(gauge) == {("b", "legacy"): 5.0, ("c", "legacy"): 3.0, (OTHER, "legacy"): 3.0}
+
+    metrics.publish(gauge, {"a": 1.0, "b": 5.0}, model="legacy")
+    assert series(gauge) == {("a", "legacy"): 1.0, ("b", "legacy"): 5.0}
+
+
+def test_bounded_mode_publish_does_not_sum_non_additive_values():
+    metrics = AddressMetrics("bounded", max_series=2)
+    gauge = metrics.register(
+        Gauge, "test_bounded_delay", "", ["address"], "address", additive=False, registry=None
+    )
+
+    metrics.publish(gauge, {"a": 60.0, "b": 300.0, "c": 900.0})
+    assert series(gauge) == {("b",): 300.0, ("c",): 900.0}
+
+
+def test_publish_replaces_series_of_moved_addresses():
+    metrics = AddressMetrics("full")
+    gauge = metrics.register(
+        Gauge,
+        "test_linked_count",
+        "",
+        ["address", "safe"],
+        "address",
+        linked_labels=["safe"],
+        additive=False,
+        registry=None,
+    )
+
+    metrics.publish(
+        gauge,
+        {"a": 2.0, "b": 2.0, "c": 1.0},
+        linked={"a": {"safe": "s1"}, "b": {"safe": "s1"}, "c": {"safe": "s2"}},
+    )
+    assert series(gauge) == {("a", "s1"): 2.0, ("b", "s1"): 2.0, ("c", "s2"): 1.0}
+
+    # b moved to the safe of c, and the safe of a lost its last peer
+    metrics.publish(gauge, {"b": 2.0, "c": 2.0}, linked={"b": {"safe": "s2"}, "c": {"safe": "s2"}})
+    assert series(gauge) == {("b", "s2"): 2.0, ("c", "s2"): 2.0}
+
+
+def test_bounded_mode_labels_and_eviction():
+    metrics = AddressMetrics("bounded", max_series=2)
+    gauge = metrics.register(
+        Gauge, "test_bounded_ops", "", ["relayer", "op"], "relayer", registry=None
+    )
+
+    for relayer in ["a", "b", "c", "d"]:
+        metrics.labels(gauge, relayer=relayer, op="opened").inc()
+    assert series(gauge) == {("a", "opened"): 1, ("b", "opened"): 1, (OTHER, "opened"): 2}
+
+    metrics.evict(["a"])
+    metrics.labels(gauge, relayer="d", op="opened").inc()
+    assert series(gauge) == {("b", "opened"): 1, ("d", "opened"): 1, (OTHER, "opened"): 2}
+
+
+def test_aggregate_mode_distribution():
+    metrics = AddressMetrics("aggregate")
+    gauge = metrics.register(
+        Gauge,
+        "test_aggregate_stake",
+        "",
+        ["safe", "type"],
+        "safe",
+        distribution=[10, 100],
+        registry=None,
+    )
+
+    metrics.publish(gauge, {"a": 5.0, "b": 50.0, "c": 500.0}, type="balance")
+    assert series(gauge) == {(OTHER, "balance"): 555.0}
+
+    name = "test_aggregate_stake_distribution"
+    labels = {"type": "balance"}
+    assert REGISTRY.get_sample_value(f"{name}_bucket", {**labels, "le": "10.0"}) == 1
+    assert REGISTRY.get_sample_value(f"{name}_bucket", {**labels, "le": "+Inf"}) == 3
+    assert REGISTRY.get_sample_value(f"{name}_gsum", labels) == 555.0
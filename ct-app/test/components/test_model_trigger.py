@@ -0,0 +1,51 @@
+from core.components import model_trigger
+from core.components.model_trigger import ModelTrigger
+
+
+def test_initial_run():
+    trigger = ModelTrigger(debounce=10, max_staleness=60)
+    assert trigger.due()
+
+    assert trigger.consume() == frozenset()
+    assert not trigger.due()
+
+
+def test_debounce(mocker):
+    now = mocker.patch.object(model_trigger.time, "monotonic", return_value=100.0)
+    trigger = ModelTrigger(debounce=10, max_staleness=60)
+    trigger.consume()
+
+    trigger.mark("peers_rewards")
+    now.return_value = 105.0
+    trigger.mark("allocations")
+    assert not trigger.due()
+
+    now.return_value = 115.0
+    assert trigger.due()
+    assert trigger.consume() == {"peers_rewards", "allocations"}
+    assert not trigger.due()
+
+
+def test_max_staleness(mocker):
+    now = mocker.patch.object(model_trigger.time, "monotonic", return_value=100.0)
+    trigger = ModelTrigger(debounce=10, max_staleness=30)
+    trigger.consume()
+
+    for timestamp in range(100, 130, 5):
+        now.return_value = float(timestamp)
+        trigger.mark("retrieve_peers")
+        assert not trigger.due()
+
+    now.return_value = 130.0
+    assert trigger.due()
+
+
+def test_mark_if_changed():
+    trigger = ModelTrigger()
+    trigger.consume()
+
+    assert not trigger.mark_if_changed("peers_rewards", {"0x1": 1}, {"0x1": 1})
+    assert trigger.pending == frozenset()
+
+    assert trigger.mark_if_changed("peers_rewards", {"0x1": 1}, {"0x1": 2})
+    assert trigger.pending == {"peers_rewards"}
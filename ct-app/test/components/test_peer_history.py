@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta
+
+from core.components.peer_history import PeerHistory
+
+NOW = datetime(2025, 1, 1)
+
+
+def test_update_and_get():
+    history = PeerHistory()
+    history.update({"address_1": NOW, "address_2": NOW + timedelta(seconds=1)})
+
+    assert len(history) == 2
+    assert "address_1" in history
+    assert history.get("address_2") == NOW + timedelta(seconds=1)
+    assert history.get("address_3") is None
+    assert history == {"address_1": NOW, "address_2": NOW + timedelta(seconds=1)}
+
+
+def test_older_than():
+    history = PeerHistory()
+    history.update({f"address_{i}": NOW + timedelta(seconds=i) for i in range(10)})
+
+    assert history.older_than(NOW - timedelta(seconds=1)) == []
+    assert history.older_than(NOW + timedelta(seconds=2)) == [
+        "address_0",
+        "address_1",
+        "address_2",
+    ]
+
+    # aged entries are not consumed by the lookup
+    assert len(history.older_than(NOW + timedelta(seconds=2))) == 3
+    assert len(history) == 10
+
+
+def test_older_than_ignores_overridden_timestamps():
+    history = PeerHistory()
+    history.update({"address_1": NOW, "address_2": NOW})
+    history.update({"address_1": NOW + timedelta(hours=1)})
+
+    assert history.older_than(NOW) == ["address_2"]
+    assert history.older_than(NOW + timedelta(hours=1)) == ["address_2", "address_1"]
+
+
+def test_remove():
+    history = PeerHistory()
+    history.update({"address_1": NOW, "address_2": NOW})
+    history.remove(["address_1", "unknown"])
+
+    assert "address_1" not in history
+    assert history.older_than(NOW) == ["address_2"]
+
+
+def test_max_size_evicts_oldest():
+    history = PeerHistory(max_size=3)
+    history.update({f"address_{i}": NOW + timedelta(seconds=i) for i in range(5)})
+
+    assert len(history) == 3
+    assert set(history) == {"address_2", "address_3", "address_4"}
+
+
+def test_heap_stays_bounded_with_repeated_updates():
+    history = PeerHistory()
+    for i in range(1000):
+        history.update({f"address_{j}": NOW + timedelta(seconds=i) for j in range(10)})
+
+    assert len(history) == 10
+    assert len(history._heap) <= 2 * len(history) + 64
@@ -3,6 +3,7 @@ import pytest
 from core.api.response_objects import Channel
 from core.components import Peer, Utils
 from core.components.balance import Balance
+from core.components.data_index import DataIndex
 from core.rpc import entries as rpc_entries
 from core.subgraph import entries as sg_entries
 
@@ -87,10 +88,9 @@ async def test_mergeDataSources():
         ),
     ]
 
-    allocation_list[0].linked_safes = ["safe_address_1", "safe_address_2"]
-    allocation_list[1].linked_safes = ["safe_address_2"]
-
-    await Utils.mergeDataSources(topology_list, peers_list, nodes_list, allocation_list, {})
+    index = DataIndex()
+    index.sync(nodes_list, allocation_list, [])
+    await Utils.mergeDataSources(topology_list, peers_list, index)
 
     assert len(peers_list) == 3
     assert len([p for p in peers_list if p.safe is not None]) == 3
@@ -101,6 +101,42 @@ async def test_mergeDataSources():
     )
 
 
+@pytest.mark.asyncio
+async def test_mergeDataSources_shares_safe_snapshots():
+    topology_list = {"address_1": Balance("1 wxHOPR"), "address_2": Balance("2 wxHOPR")}
+    peers_list = [Peer("address_1"), Peer("address_2")]
+    safe = sg_entries.Safe("safe_address_1", "10", "1", ["owner_1"])
+    nodes_list = [sg_entries.Node("address_1", safe), sg_entries.Node("address_2", safe)]
+    eoa_balances = []
+    allocation_list = [
+        rpc_entries.Allocation(
+            "owner_1", "schedule", Balance("100 wxHOPR"), Balance.zero("wxHOPR")
+        ),
+    ]
+    index = DataIndex()
+    index.sync(nodes_list, allocation_list, eoa_balances)
+    await Utils.mergeDataSources(topology_list, peers_list, index)
+    overlays = [p.safe for p in peers_list]
+
+    assert all(overlay.snapshot is safe for overlay in overlays)
+    assert all(overlay.additional_balance == Balance("100 wxHOPR") for overlay in overlays)
+    assert overlays[0].total_balance == Balance("110 wxHOPR")
+    assert safe.additional_balance == Balance.zero("wxHOPR")
+
+    with pytest.raises(AttributeError):
+        safe.balance = Balance("1 wxHOPR")  # ty: ignore[invalid-assignment]
+
+    # unchanged inputs keep the existing overlays
+    assert not index.sync(nodes_list, allocation_list, eoa_balances)
+    await Utils.mergeDataSources(topology_list, peers_list, index)
+    assert all(p.safe is overlay for p, overlay in zip(peers_list, overlays))
+
+    assert index.sync(nodes_list, [], eoa_balances)
+    await Utils.mergeDataSources(topology_list, peers_list, index)
+    assert peers_list[0].safe is not overlays[0]
+    assert peers_list[0].safe.additional_balance == Balance.zero("wxHOPR")
+
+
 def test_associateEntitiesToNodes_with_allocations():
     allocations = [
         rpc_entries.Allocation(
@@ -145,26 +181,45 @@ def test_associateEntitiesToNodes_with_balances():
     assert balances[1].linked_safes == {"safe_address_2"}
 
 
-def test_allowManyNodePerSafe():
-    peer_1 = Peer("address_1")
-    peer_2 = Peer("address_2")
-    peer_3 = Peer("address_3")
-    peer_4 = Peer("address_4")
+def test_associateEntitiesToNodes_links_first_entity_of_an_owner():
+    allocations = [
+        rpc_entries.Allocation("owner_1", "gnosis", Balance("100 wxHOPR"), Balance.zero("wxHOPR")),
+        rpc_entries.Allocation("owner_1", "mainnet", Balance("50 wxHOPR"), Balance.zero("wxHOPR")),
+    ]
+    nodes = [
+        sg_entries.Node("address_1", sg_entries.Safe("safe_address_1", "10", "1", ["owner_1"])),
+    ]
+
+    Utils.associateEntitiesToNodes(allocations, nodes)
+
+    assert allocations[0].linked_safes == {"safe_address_1"}
+    assert allocations[1].linked_safes == set()
 
-    peer_1.safe = sg_entries.Safe("safe_address_1", "10", "1", [])
-    peer_2.safe = sg_entries.Safe("safe_address_2", "10", "1", [])
-    peer_3.safe = sg_entries.Safe("safe_address_3", "10", "1", [])
-    peer_4.safe = sg_entries.Safe("safe_address_2", "10", "1", [])
 
-    source_data = [peer_1, peer_2, peer_3, peer_4]
+@pytest.mark.asyncio
+async def test_allowManyNodePerSafe():
+    peers = [Peer(f"address_{idx}") for idx in range(1, 6)]
+    nodes = [
+        sg_entries.Node("address_1", sg_entries.Safe("safe_address_1", "10", "1", [])),
+        sg_entries.Node("address_2", sg_entries.Safe("safe_address_2", "10", "1", [])),
+        sg_entries.Node("address_3", sg_entries.Safe("safe_address_3", "10", "1", [])),
+        sg_entries.Node("address_4", sg_entries.Safe("safe_address_2", "10", "1", [])),
+        # registered, but not visible
+        sg_entries.Node("address_6", sg_entries.Safe("safe_address_3", "10", "1", [])),
+    ]
+    index = DataIndex()
+    index.sync(nodes, [], [])
+    await Utils.mergeDataSources({}, peers, index)
 
-    assert all([peer.safe_address_count == 1 for peer in source_data])
+    assert all([peer.safe_address_count == 1 for peer in peers])
 
-    Utils.allowManyNodePerSafe(source_data)
+    Utils.allowManyNodePerSafe(peers, index)
 
-    assert peer_1.safe_address_count == 1
-    assert peer_2.safe_address_count == 2
-    assert peer_3.safe_address_count == 1
+    assert peers[0].safe_address_count == 1
+    assert peers[1].safe_address_count == 2
+    assert peers[2].safe_address_count == 1
+    assert peers[3].safe_address_count == 2
+    assert peers[4].safe is None
 
 
 @pytest.mark.asyncio
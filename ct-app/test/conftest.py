@@ -46,10 +46,18 @@ def economic_model() -> LegacyParams:
         {
             "proportion": 1,
             "apr": 15,
-            "coefficients": {"a": 1, "b": 1, "c": "3 wxHOPR", "l": "0 wxHOPR"},
+            "coefficients": {
+                "a": 1,
+                "b": 1,
+                "upperbound": "3 wxHOPR",
+                "lowerbound": "0 wxHOPR",
+            },
             "equations": {
-                "fx": {"formula": "a * x", "condition": "l <= x <= c"},
-                "gx": {"formula": "a * c + (x - c) ** (1 / b)", "condition": "x > c"},
+                "fx": {"formula": "a * x", "condition": "lowerbound <= x <= upperbound"},
+                "gx": {
+                    "formula": "a * upperbound + (x - upperbound) ** (1 / b)",
+                    "condition": "x > upperbound",
+                },
             },
         }
     )
@@ -0,0 +1,113 @@
+import random
+import string
+
+import pytest
+
+from core.components.balance import Balance
+from core.rpc import abi
+from core.rpc.providers import GnosisDistributor, wxHOPRBalance
+from core.rpc.query_provider import ProviderError
+
+BLOCK_SIZE = 64
+ROUNDS = 200
+
+
+# string-based encoding and decoding the codec replaces, kept as reference
+def legacy_balance_of_data(address: str) -> str:
+    return "0x70a08231" + address.lower().replace("0x", "").rjust(BLOCK_SIZE, "0")
+
+
+def legacy_allocations_data(address: str, schedule: str) -> str:
+    encoded_schedule: str = schedule.encode().hex()
+    data_offset = len(encoded_schedule) // 2
+
+    return (
+        "0xc31cd7d7"
+        + address.lower().replace("0x", "").rjust(BLOCK_SIZE, "0")
+        + hex(BLOCK_SIZE)[2:].rjust(BLOCK_SIZE, "0")
+        + hex(data_offset)[2:].rjust(BLOCK_SIZE, "0")
+        + encoded_schedule.ljust(BLOCK_SIZE, "0")
+    )
+
+
+def legacy_balance(result: str, symbol: str) -> Balance:
+    return Balance(f"{int(result, 16)} wei {symbol}")
+
+
+def legacy_allocation(result: str, symbol: str) -> tuple[Balance, Balance]:
+    blocks = [result[2 + i * BLOCK_SIZE : 2 + (i + 1) * BLOCK_SIZE] for i in range(4)]
+    return (
+        Balance(f"{int(blocks[0], 16)} wei {symbol}"),
+        Balance(f"{int(blocks[1], 16)} wei {symbol}"),
+    )
+
+
+def random_address(rng: random.Random) -> str:
+    address = f"0x{rng.getrandbits(160):040x}"
+    # checksummed addresses mix cases
+    return "".join(c.upper() if rng.random() < 0.5 else c for c in address).replace("0X", "0x")
+
+
+def random_word(rng: random.Random) -> str:
+    bits = rng.choice([0, 1, 64, 96, 128, 256])
+    return f"{rng.getrandbits(bits) if bits else 0:064x}"
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_encode_matches_legacy(seed: int):
+    rng = random.Random(seed)
+
+    for _ in range(ROUNDS):
+        address = random_address(rng)
+        # the legacy encoding only pads non-empty schedules of up to 32 bytes
+        schedule = "".join(
+            rng.choice(string.ascii_letters + string.digits + "-")
+            for _ in range(rng.randint(1, 32))
+        )
+
+        assert abi.encode_balance_of(address) == legacy_balance_of_data(address)
+        assert abi.encode_allocations(address, schedule) == legacy_allocations_data(
+            address, schedule
+        )
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_decode_matches_legacy(seed: int):
+    rng = random.Random(seed)
+    balances, distributor = wxHOPRBalance("http://rpc"), GnosisDistributor("http://rpc")
+
+    for _ in range(ROUNDS):
+        balance = "0x" + random_word(rng)
+        allocation = "0x" + "".join(random_word(rng) for _ in range(4))
+
+        assert balances.to_balance("0x", balance).amount == legacy_balance(balance, "wxHOPR")
+
+        decoded = distributor.to_allocation("0x", "schedule", allocation)
+        assert (decoded.amount, decoded.claimed) == legacy_allocation(allocation, "wxHOPR")
+
+
+def test_empty_schedule():
+    data = abi.encode_allocations("0x" + "11" * 20, "")
+
+    # no content word after the zero length, the legacy encoding added an empty one
+    assert data == legacy_allocations_data("0x" + "11" * 20, "")[:-BLOCK_SIZE]
+
+
+def test_long_schedule_is_padded():
+    data = abi.encode_allocations("0x" + "11" * 20, "s" * 33)
+
+    # selector, 3 head and tail words, then 2 words of content
+    assert len(data) == 2 + 8 + 64 * 5
+    assert data.endswith("73" + "00" * 31)
+
+
+def test_invalid_inputs():
+    with pytest.raises(ValueError):
+        abi.address_word("0x1234")
+    with pytest.raises(ValueError):
+        abi.decode_words("0x" + "00" * 32, 2)
+
+    with pytest.raises(ProviderError):
+        wxHOPRBalance("http://rpc").to_balance("0x", "0x")
+    with pytest.raises(ProviderError):
+        GnosisDistributor("http://rpc").to_allocation("0x", "schedule", "0x" + "00" * 32)
@@ -0,0 +1,104 @@
+import pytest
+
+from core.components.balance import Balance
+from core.rpc.providers import GnosisDistributor, wxHOPRBalance
+from core.rpc.query_provider import ProviderError
+
+ADDRESSES = [f"0x{idx:040x}" for idx in range(1, 6)]
+
+
+def word(value: int) -> str:
+    return f"{value:064x}"
+
+
+class FakeEndpoint:
+    def __init__(self, answer):
+        self.answer = answer
+        self.payloads: list[list[dict]] = []
+
+    async def post(self, payload):
+        self.payloads.append(payload)
+        # responses of a batch can come in any order
+        return [
+            {"jsonrpc": "2.0", "id": call["id"], **self.answer(call)} for call in reversed(payload)
+        ], 200
+
+
+def balance_answer(call: dict) -> dict:
+    return {"result": "0x" + word(int(call["params"][0]["data"][-40:], 16) * 10)}
+
+
+@pytest.mark.asyncio
+async def test_balance_of_batch(monkeypatch):
+    endpoint = FakeEndpoint(balance_answer)
+    provider = wxHOPRBalance("http://rpc")
+    monkeypatch.setattr(provider, "_post", endpoint.post)
+
+    balances = await provider.balance_of_batch(ADDRESSES, max_batch_size=2)
+
+    assert [len(payload) for payload in endpoint.payloads] == [2, 2, 1]
+    assert [balance.address for balance in balances] == ADDRESSES
+    assert [balance.amount for balance in balances] == [
+        Balance(f"{idx * 10} wei wxHOPR") for idx in range(1, 6)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_allocations_batch(monkeypatch):
+    def answer(call: dict) -> dict:
+        data = call["params"][0]["data"]
+        assert call["params"][0]["to"] == GnosisDistributor.contract
+        assert data.startswith("0xc31cd7d7")
+        index = int(data[10:74], 16)
+        return {"result": "0x" + word(index * 100) + word(index) + word(0) + word(0)}
+
+    endpoint = FakeEndpoint(answer)
+    provider = GnosisDistributor("http://rpc")
+    monkeypatch.setattr(provider, "_post", endpoint.post)
+
+    allocations = await provider.allocations_batch(ADDRESSES, "schedule", max_batch_size=50)
+
+    assert len(endpoint.payloads) == 1
+    assert allocations[2].address == ADDRESSES[2]
+    assert allocations[2].amount == Balance("300 wei wxHOPR")
+    assert allocations[2].claimed == Balance("3 wei wxHOPR")
+
+
+@pytest.mark.asyncio
+async def test_batch_matches_single_calls(monkeypatch):
+    endpoint = FakeEndpoint(balance_answer)
+    provider = wxHOPRBalance("http://rpc")
+    monkeypatch.setattr(provider, "_post", endpoint.post)
+
+    async def single(payload):
+        return balance_answer(payload), 200
+
+    batched = await provider.balance_of_batch(ADDRESSES, max_batch_size=3)
+    monkeypatch.setattr(provider, "_post", single)
+    assert batched == [await provider.balance_of(address) for address in ADDRESSES]
+
+
+@pytest.mark.asyncio
+async def test_batch_call_error(monkeypatch):
+    def answer(call: dict) -> dict:
+        if call["id"] == 1:
+            return {"error": {"code": -32000, "message": "execution reverted"}}
+        return balance_answer(call)
+
+    provider = wxHOPRBalance("http://rpc")
+    monkeypatch.setattr(provider, "_post", FakeEndpoint(answer).post)
+
+    with pytest.raises(ProviderError, match="execution reverted"):
+        await provider.balance_of_batch(ADDRESSES, max_batch_size=50)
+
+
+@pytest.mark.asyncio
+async def test_batch_not_supported(monkeypatch):
+    async def post(payload):
+        return {"jsonrpc": "2.0", "id": None, "error": {"message": "batch not supported"}}, 200
+
+    provider = wxHOPRBalance("http://rpc")
+    monkeypatch.setattr(provider, "_post", post)
+
+    with pytest.raises(ProviderError, match="batch not supported"):
+        await provider.balance_of_batch(ADDRESSES, max_batch_size=50)
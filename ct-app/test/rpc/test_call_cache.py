@@ -0,0 +1,52 @@
+from core.rpc import CallCache
+
+
+def test_served_within_block_window():
+    cache = CallCache({"gnosis": 2})
+    cache.store("gnosis", "0xAB", "0x01", "0x10", 100)
+
+    assert cache.get("gnosis", "0xab", "0x01", 100) == "0x10"
+    assert cache.get("gnosis", "0xab", "0x01", 102) == "0x10"
+    assert cache.get("gnosis", "0xab", "0x01", 103) is None
+
+    # an other chain, or a head going backwards, is a miss
+    assert cache.get("mainnet", "0xab", "0x01", 100) is None
+    assert cache.get("gnosis", "0xab", "0x01", 99) is None
+
+
+def test_block_window_per_chain():
+    cache = CallCache({"gnosis": 50, "mainnet": 20})
+    cache.store("gnosis", "0xab", "0x01", "0x10", 100)
+    cache.store("mainnet", "0xab", "0x01", "0x20", 100)
+
+    assert cache.get("gnosis", "0xab", "0x01", 150) == "0x10"
+    assert cache.get("mainnet", "0xab", "0x01", 120) == "0x20"
+    assert cache.get("mainnet", "0xab", "0x01", 121) is None
+
+
+def test_refreshed_every_keepalive():
+    # 300s apart on Gnosis is 60 blocks, past a window shorter than the keepalive period
+    cache = CallCache({"gnosis": 50})
+    cache.store("gnosis", "0xab", "0x01", "0x10", 100)
+
+    assert cache.get("gnosis", "0xab", "0x01", 160) is None
+
+
+def test_unknown_head():
+    cache = CallCache({"gnosis": 0})
+    cache.store("gnosis", "0xab", "0x01", "0x10", None)
+    assert len(cache) == 0
+
+    cache.store("gnosis", "0xab", "0x01", "0x10", 100)
+    assert cache.get("gnosis", "0xab", "0x01", None) is None
+
+
+def test_disabled():
+    cache = CallCache({"gnosis": -1})
+    cache.store("gnosis", "0xab", "0x01", "0x10", 100)
+    cache.store("mainnet", "0xab", "0x01", "0x10", 100)
+
+    assert len(cache) == 0
+    assert not cache.enabled("gnosis")
+    assert not cache.enabled("mainnet")
+    assert cache.get("gnosis", "0xab", "0x01", 100) is None
@@ -0,0 +1,100 @@
+import pytest
+import yaml
+
+from core.components.config_parser import Parameters
+from core.rpc import failover
+from core.rpc.failover import CircuitBreaker, CircuitState, RetryPolicy
+from core.rpc.providers import wxHOPRBalance
+from core.rpc.query_provider import ProviderError
+
+POLICY = RetryPolicy(
+    max_attempts=4, backoff_base=0, backoff_max=0, failure_threshold=2, reset_timeout=60
+)
+
+
+@pytest.fixture(autouse=True)
+def circuits():
+    failover._circuits.clear()
+    yield
+    failover._circuits.clear()
+
+
+def test_backoff_is_bounded():
+    policy = RetryPolicy(backoff_base=0.2, backoff_max=1.0)
+
+    assert all(0 <= policy.delay(0) <= 0.2 for _ in range(100))
+    assert all(0 <= policy.delay(10) <= 1.0 for _ in range(100))
+
+
+def test_circuit_breaker():
+    breaker = CircuitBreaker("rpc", failure_threshold=2, reset_timeout=60)
+
+    breaker.record_failure()
+    assert breaker.state == CircuitState.CLOSED
+    breaker.record_failure()
+    assert not breaker.available
+
+    # once the timeout elapsed, a single failure reopens the circuit
+    breaker.reset_timeout = 0
+    assert breaker.state == CircuitState.HALF_OPEN
+    breaker.record_failure()
+    breaker.reset_timeout = 60
+    assert breaker.state == CircuitState.OPEN
+
+    breaker.reset_timeout = 0
+    breaker.record_success()
+    assert breaker.state == CircuitState.CLOSED
+
+
+class FakeURLs:
+    def __init__(self, dead: set[str]):
+        self.dead = dead
+        self.calls: list[str] = []
+
+    async def send(self, url: str, payload):
+        self.calls.append(url)
+        if url in self.dead:
+            return None, 0
+        return {"result": "0x" + "0" * 63 + "1"}, 200
+
+
+@pytest.mark.asyncio
+async def test_failover_to_next_url(monkeypatch):
+    urls = FakeURLs(dead={"http://primary"})
+    provider = wxHOPRBalance(["http://primary", "http://secondary"], policy=POLICY)
+    monkeypatch.setattr(provider, "_send", urls.send)
+
+    await provider.balance_of("0x" + "11" * 20)
+    assert urls.calls == ["http://primary", "http://secondary"]
+
+    # the primary opens its circuit after a second failure, and is skipped afterwards
+    await provider.balance_of("0x" + "11" * 20)
+    await provider.balance_of("0x" + "11" * 20)
+    assert urls.calls[-1:] == ["http://secondary"]
+    assert urls.calls.count("http://primary") == 2
+
+
+@pytest.mark.asyncio
+async def test_dead_endpoint_fails_fast(monkeypatch):
+    urls = FakeURLs(dead={"http://primary"})
+    provider = wxHOPRBalance("http://primary", policy=POLICY)
+    monkeypatch.setattr(provider, "_send", urls.send)
+
+    with pytest.raises(ProviderError):
+        await provider.balance_of("0x" + "11" * 20)
+    assert len(urls.calls) == POLICY.failure_threshold
+
+    # every circuit is open: no request is sent
+    with pytest.raises(ProviderError):
+        await provider.balance_of("0x" + "11" * 20)
+    assert len(urls.calls) == POLICY.failure_threshold
+
+
+def test_rpc_urls_from_config(monkeypatch):
+    with open("./test/test_config.yaml", "r") as file:
+        params = Parameters(yaml.safe_load(file))
+    assert params.rpc.gnosis == []
+
+    monkeypatch.setenv("RPC_GNOSIS", "http://primary, http://secondary")
+    params.rpc.set_attribute_from_env("gnosis", "RPC_GNOSIS")
+    assert params.rpc.gnosis == ["http://primary", "http://secondary"]
@@ -0,0 +1,100 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from core.components.balance import Balance
+from core.rpc.multicall import MulticallProvider, decode_aggregate3, encode_aggregate3
+from core.rpc.providers import HOPRBalance, wxHOPRBalance, xHOPRBalance
+from core.rpc.query_provider import ProviderError
+
+with open(Path(__file__).parent.joinpath("fixtures", "aggregate3.json")) as f:
+    FIXTURE = json.load(f)
+
+
+def word(value: int) -> str:
+    return f"{value:064x}"
+
+
+def test_encode_aggregate3():
+    calls = [tuple(call) for call in FIXTURE["calls"]]
+
+    assert encode_aggregate3(calls) == FIXTURE["calldata"]
+
+
+def test_decode_aggregate3():
+    assert decode_aggregate3(FIXTURE["return_data"]) == [
+        (True, result) for result in FIXTURE["results"]
+    ]
+
+
+def test_decode_aggregate3_invalid():
+    with pytest.raises(ProviderError):
+        decode_aggregate3("0x" + word(0x20) + word(2))
+
+
+def result_for(calldata: str, answers: dict[str, str]) -> str:
+    """
+    Decodes the targets of an aggregate3 calldata, and packs the answer of each target.
+    """
+    raw = calldata.removeprefix("0x82ad56cb")
+    count = int(raw[64:128], 16)
+    targets = []
+    for idx in range(count):
+        entry = 64 + int(raw[128 + idx * 64 : 192 + idx * 64], 16)
+        targets.append("0x" + raw[2 * entry + 24 : 2 * entry + 64])
+
+    encoded = [word(1) + word(0x40) + word(32) + answers[target.lower()] for target in targets]
+    offsets, position = [], 32 * count
+    for tuple_data in encoded:
+        offsets.append(word(position))
+        position += len(tuple_data) // 2
+
+    return "0x" + word(0x20) + word(count) + "".join(offsets) + "".join(encoded)
+
+
+@pytest.mark.asyncio
+async def test_gather_one_call_per_endpoint(mocker):
+    answers = {
+        HOPRBalance.token_contract.lower(): word(1),
+        wxHOPRBalance.token_contract.lower(): word(2),
+        xHOPRBalance.token_contract.lower(): word(3),
+    }
+    sent = []
+
+    async def get(self, to: str, data: str, timeout: int = 30):
+        sent.append((self.url, to))
+        return result_for(data, answers)
+
+    providers = [
+        HOPRBalance("http://mainnet"),
+        wxHOPRBalance("http://gnosis"),
+        xHOPRBalance("http://gnosis"),
+    ]
+    addresses = [f"0x{idx:040x}" for idx in range(1, 4)]
+
+    mocker.patch.object(MulticallProvider, "get", autospec=True, side_effect=get)
+    results = await MulticallProvider.gather(
+        [
+            (p, [(p.token_contract, p.balance_of_data(addr)) for addr in addresses])
+            for p in providers
+        ],
+        max_size=50,
+    )
+
+    assert sorted(url for url, _ in sent) == ["http://gnosis", "http://mainnet"]
+    assert all(to == MulticallProvider.contract for _, to in sent)
+    assert [providers[1].to_balance(addresses[0], r).amount for r in results[1]] == [
+        Balance("2 wei wxHOPR")
+    ] * 3
+    assert results[0] == ["0x" + word(1)] * 3
+    assert results[2] == ["0x" + word(3)] * 3
+
+
+@pytest.mark.asyncio
+async def test_aggregate_failed_call(mocker):
+    failed = "0x" + word(0x20) + word(1) + word(0x20) + word(0) + word(0x40) + word(0)
+    mocker.patch.object(MulticallProvider, "get", return_value=failed)
+
+    with pytest.raises(ProviderError, match="failed"):
+        await MulticallProvider("http://rpc").aggregate([("0x" + "11" * 20, "0x")], max_size=50)
@@ -0,0 +1,50 @@
+import asyncio
+import random
+
+import pytest
+
+from core.components.balance import Balance
+from core.components.http_session import PooledSession
+from core.rpc.providers import GnosisDistributor, wxHOPRBalance
+from core.rpc.query_provider import endpoint_label
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_keep_their_payload(monkeypatch):
+    provider = wxHOPRBalance("http://rpc")
+    rng = random.Random(42)
+
+    async def post(payload):
+        # concurrent calls interleave while the request is in flight
+        data = payload["params"][0]["data"]
+        await asyncio.sleep(rng.random() / 100)
+        return {"result": "0x" + data[-64:]}, 200
+
+    monkeypatch.setattr(provider, "_post", post)
+    addresses = [f"0x{idx:040x}" for idx in range(1, 50)]
+
+    balances = await asyncio.gather(*[provider.balance_of(address) for address in addresses])
+
+    assert [balance.amount for balance in balances] == [
+        Balance(f"{idx} wei wxHOPR") for idx in range(1, 50)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_providers_share_session():
+    pool = PooledSession()
+    providers = [wxHOPRBalance("http://rpc", pool), GnosisDistributor("http://rpc", pool)]
+    assert all(provider.session is pool for provider in providers)
+
+    # a shared session is closed by its owner, not by the providers
+    _ = pool.session
+    for provider in providers:
+        await provider.close()
+    assert not pool.closed
+
+    await pool.close()
+
+
+def test_endpoint_label_hides_api_key():
+    assert endpoint_label("https://rpc.example.com/v2/secret-key") == "rpc.example.com"
+    assert endpoint_label("not a url") == "unknown"
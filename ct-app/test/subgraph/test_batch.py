@@ -0,0 +1,100 @@
+import re
+from typing import Any, Optional
+
+import pytest
+
+from core.components.config_parser import SubgraphEndpointParams
+from core.subgraph import URL, GraphQLBatch, Mode
+from core.subgraph.batch import alias_query
+from core.subgraph.graphql_provider import PAGE_SIZE
+from core.subgraph.providers import Rewards, Safes
+
+
+def url(query_id: str) -> URL:
+    return URL("user", "key", SubgraphEndpointParams({"query_id": query_id, "slug": "slug"}))
+
+
+def safes(count: int) -> list[dict]:
+    return [{"id": f"0x{idx:040x}", "registeredNodesInSafeRegistry": []} for idx in range(count)]
+
+
+def accounts(count: int) -> list[dict]:
+    return [{"id": f"0x{idx:040x}", "redeemedValue": "1"} for idx in range(count)]
+
+
+class FakeSubgraph:
+    def __init__(self, datasets: dict[str, list[dict]], block: int = 100):
+        self.datasets = datasets
+        self.block = block
+        self.calls: list[tuple[str, dict]] = []
+
+    async def execute(
+        self, query: str, variable_values: dict, mode: Optional[Mode] = None
+    ) -> tuple[dict, Optional[dict]]:
+        self.calls.append((query, variable_values))
+
+        data: dict[str, Any] = {"_meta": {"block": {"number": self.block}}}
+        for alias, name in re.findall(r"(\w+): (\w+)\(", query):
+            data[alias] = [
+                entry
+                for entry in self.datasets[name]
+                if entry["id"] > variable_values[f"{alias}_lastId"]
+            ][: variable_values[f"{alias}_first"]]
+        return {"data": data}, None
+
+
+def test_alias_query():
+    body = "accounts(first: $first, where: {id_gt: $lastId}) {\n    id\n}"
+
+    assert (
+        alias_query(body, "q1")
+        == "q1: accounts(first: $q1_first, where: {id_gt: $q1_lastId}) {\n    id\n}"
+    )
+    assert alias_query(body, "q1", pinned=True).startswith(
+        "q1: accounts(block: {number: $q1_block}, first: $q1_first"
+    )
+
+
+@pytest.mark.asyncio
+async def test_batched_fetch(monkeypatch):
+    subgraph = FakeSubgraph({"safes": safes(PAGE_SIZE + 5), "accounts": accounts(10)})
+    providers = [Safes(url("shared")), Rewards(url("shared"))]
+    for provider in providers:
+        monkeypatch.setattr(provider, "_execute", subgraph.execute)
+    batch = GraphQLBatch(providers)
+
+    assert await batch.get(providers[0]) == safes(PAGE_SIZE + 5)
+    assert len(subgraph.calls) == 2
+
+    # the second round only queries the dataset with more pages, at the first round block
+    query, variables = subgraph.calls[1]
+    assert "q0: safes(block: {number: $q0_block}" in query
+    assert "q1:" not in query
+    assert variables["q0_block"] == 100
+
+    # the other dataset was fetched along, without an other request
+    assert await batch.get(providers[1]) == accounts(10)
+    assert len(subgraph.calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_not_batched_across_endpoints():
+    providers = [Safes(url("safes")), Rewards(url("rewards"))]
+    batch = GraphQLBatch(providers)
+
+    assert batch.group(providers[0]) == [providers[0]]
+    assert await batch.get(providers[0]) is None
+
+
+@pytest.mark.asyncio
+async def test_batched_fetch_failure(monkeypatch):
+    async def unreachable(
+        query: str, variable_values: dict, mode: Optional[Mode] = None
+    ) -> tuple[dict, Optional[dict]]:
+        return {}, None
+
+    providers = [Safes(url("shared")), Rewards(url("shared"))]
+    for provider in providers:
+        monkeypatch.setattr(provider, "_execute", unreachable)
+
+    assert await GraphQLBatch(providers).get(providers[1]) is None
@@ -0,0 +1,335 @@
+import asyncio
+import random
+from typing import Any, Awaitable, Callable, Optional
+
+import pytest
+
+from core.components.config_parser import SubgraphEndpointParams
+from core.subgraph import URL, Mode, ResponseCache, response_cache
+from core.subgraph.graphql_provider import PAGE_SIZE, Probe, id_bounds, rank
+from core.subgraph.entries import Account
+from core.subgraph.providers import Rewards
+
+
+Execute = Callable[[str, dict, Optional[Mode]], Awaitable[tuple[dict, Optional[dict]]]]
+
+
+def accounts(count: int) -> list[dict]:
+    rng = random.Random(42)
+    ids = {f"0x{rng.getrandbits(160):040x}" for _ in range(count)}
+    return [{"id": address, "redeemedValue": "1"} for address in sorted(ids)]
+
+
+class FakeSubgraph:
+    def __init__(self, entries: list[dict], delay: float = 0.0, block: Optional[int] = None):
+        self.entries = entries
+        self.delay = delay
+        self.block = block
+        # id -> block the entry last changed at
+        self.changes: dict[str, int] = {}
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def execute(
+        self, query: str, variable_values: dict, mode: Optional[Mode] = None
+    ) -> tuple[dict, Optional[dict]]:
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+
+        page = [
+            entry
+            for entry in self.entries
+            if variable_values["lastId"] < entry["id"] < variable_values["upperId"]
+            and self.changes.get(entry["id"], 0) >= variable_values["changeBlock"]
+        ][: variable_values["first"]]
+
+        data: dict[str, Any] = {"accounts": page}
+        if self.block is not None:
+            data["_meta"] = {"block": {"number": self.block}}
+        return {"data": data}, None
+
+    def change(self, entry: dict):
+        self.entries = sorted(
+            [e for e in self.entries if e["id"] != entry["id"]] + [entry], key=lambda e: e["id"]
+        )
+        self.changes[entry["id"]] = self.block
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    """
+    Build rewards providers sending their queries to a fake subgraph instead of the network.
+    """
+
+    def make(
+        subgraph: FakeSubgraph,
+        ranges: int = 1,
+        full_sync_interval: float = 0,
+        cache: Optional[ResponseCache] = None,
+        execute: Optional[Execute] = None,
+    ) -> Rewards:
+        url = URL("user", "key", SubgraphEndpointParams({"query_id": "id", "slug": "rewards"}))
+        rewards = Rewards(
+            url, prefetch_ranges=ranges, full_sync_interval=full_sync_interval, cache=cache
+        )
+        monkeypatch.setattr(rewards, "_execute", execute or subgraph.execute)
+        return rewards
+
+    return make
+
+
+def test_query_uses_cursor(provider):
+    rewards = provider(FakeSubgraph([]))
+
+    assert "$lastId: ID!" in rewards._sku_query
+    assert "id_gt: $lastId" in rewards._sku_query
+    assert "skip" not in rewards._sku_query
+    assert "_change_block: {number_gte: $changeBlock}" in rewards._sku_query
+    assert "_meta { block { number } }" in rewards._sku_query
+
+
+def test_id_bounds():
+    assert id_bounds(1) == ["0x", "0x" + "ff" * 32]
+    assert id_bounds(4)[1:-1] == ["0x40", "0x80", "0xc0"]
+    assert len(id_bounds(1000)) == 257
+
+
+@pytest.mark.asyncio
+async def test_get_sequential_pages(provider):
+    entries = accounts(2 * PAGE_SIZE + 10)
+    subgraph = FakeSubgraph(entries)
+
+    assert await provider(subgraph).get() == entries
+    assert subgraph.calls == 3
+
+
+@pytest.mark.asyncio
+async def test_get_parallel_ranges(provider):
+    entries = accounts(2 * PAGE_SIZE + 10)
+    subgraph = FakeSubgraph(entries, delay=0.01)
+
+    assert await provider(subgraph, ranges=8).get() == entries
+    assert subgraph.max_in_flight == 8
+
+
+@pytest.mark.asyncio
+async def test_get_incremental(provider):
+    entries = accounts(10)
+    subgraph = FakeSubgraph(entries, block=100)
+    rewards = provider(subgraph, full_sync_interval=3600)
+
+    assert await rewards.get() == entries
+    assert subgraph.calls == 1
+
+    subgraph.block = 110
+    changed = {"id": entries[3]["id"], "redeemedValue": "2"}
+    added = {"id": "0x" + "0" * 40, "redeemedValue": "3"}
+    subgraph.change(changed)
+    subgraph.change(added)
+
+    synced = await rewards.get()
+    assert len(synced) == 11
+    assert changed in synced and added in synced
+    assert entries[3] not in synced
+
+    # the change filter only returned the changed entities
+    assert subgraph.calls == 2
+    assert rewards._block == 110
+
+
+@pytest.mark.asyncio
+async def test_get_resyncs_when_block_goes_backwards(provider):
+    entries = accounts(10)
+    subgraph = FakeSubgraph(entries, block=100)
+    rewards = provider(subgraph, full_sync_interval=3600)
+    await rewards.get()
+
+    subgraph.block = 90
+    subgraph.entries = entries[:5]
+
+    assert await rewards.get() == entries[:5]
+    assert subgraph.calls == 3
+    assert rewards._block == 90
+
+
+@pytest.mark.asyncio
+async def test_get_serves_fresh_cache(tmp_path, provider):
+    entries = accounts(10)
+    subgraph = FakeSubgraph(entries, block=100)
+    cache = ResponseCache(tmp_path, ttl=60, max_stale=3600)
+
+    assert await provider(subgraph, cache=cache).get() == entries
+    assert subgraph.calls == 1
+
+    # cold start: served from disk, without querying the subgraph
+    restarted = provider(subgraph, cache=ResponseCache(tmp_path, ttl=60, max_stale=3600))
+    assert await restarted.get() == entries
+    assert subgraph.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_get_revalidates_stale_cache(tmp_path, provider, mocker):
+    now = mocker.patch.object(response_cache.time, "time", return_value=1000.0)
+    entries = accounts(10)
+    subgraph = FakeSubgraph(entries, block=100)
+    rewards = provider(subgraph, cache=ResponseCache(tmp_path, ttl=20, max_stale=600))
+    await rewards.get()
+
+    now.return_value += 300
+    subgraph.block = 110
+    subgraph.change({"id": entries[0]["id"], "redeemedValue": "2"})
+
+    # the stale result is served while the refresh runs
+    assert await rewards.get() == entries
+    await rewards._refresh
+    assert subgraph.calls == 2
+
+    synced = await rewards.get()
+    assert {"id": entries[0]["id"], "redeemedValue": "2"} in synced
+
+
+@pytest.mark.asyncio
+async def test_get_refreshes_cache_past_max_stale(tmp_path, provider, mocker):
+    now = mocker.patch.object(response_cache.time, "time", return_value=1000.0)
+    entries = accounts(10)
+    subgraph = FakeSubgraph(entries, block=100)
+    await provider(subgraph, cache=ResponseCache(tmp_path, ttl=20, max_stale=600)).get()
+
+    now.return_value += 700
+    subgraph.block = 120
+    subgraph.change({"id": entries[1]["id"], "redeemedValue": "3"})
+
+    # cold start: the entry is too old to be served, but seeds an incremental sync
+    restarted = provider(subgraph, cache=ResponseCache(tmp_path, ttl=20, max_stale=600))
+    synced = await restarted.get()
+    assert restarted._refresh is None
+    assert subgraph.calls == 2
+    assert {"id": entries[1]["id"], "redeemedValue": "3"} in synced
+    assert len(synced) == len(entries)
+
+
+@pytest.mark.asyncio
+async def test_get_falls_back_to_cache(tmp_path, provider):
+    entries = accounts(10)
+    subgraph = FakeSubgraph(entries, block=100)
+    await provider(subgraph, cache=ResponseCache(tmp_path, ttl=0, max_stale=0)).get()
+
+    async def unreachable(
+        query: str, variable_values: dict, mode: Optional[Mode] = None
+    ) -> tuple[dict, Optional[dict]]:
+        return {}, None
+
+    rewards = provider(
+        subgraph, cache=ResponseCache(tmp_path, ttl=0, max_stale=0), execute=unreachable
+    )
+    assert await rewards.get() == entries
+
+
+@pytest.mark.asyncio
+async def test_stream_typed_entries(provider):
+    entries = accounts(2 * PAGE_SIZE + 10)
+    subgraph = FakeSubgraph(entries, delay=0.01)
+
+    streamed = [account async for account in provider(subgraph, ranges=4).stream()]
+
+    assert all(isinstance(account, Account) for account in streamed)
+    assert sorted(account.address for account in streamed) == [e["id"] for e in entries]
+    assert subgraph.max_in_flight == 4
+
+
+@pytest.mark.asyncio
+async def test_stream_stops_early(provider):
+    subgraph = FakeSubgraph(accounts(3 * PAGE_SIZE))
+
+    async for _ in provider(subgraph).stream():
+        break
+
+    assert subgraph.calls <= 2
+
+
+@pytest.mark.asyncio
+async def test_stream_explicit_key(provider):
+    entries = accounts(10)
+    rewards = provider(FakeSubgraph(entries))
+
+    assert await rewards.get("accounts") == entries
+    assert [account.address async for account in rewards.stream("accounts")] == [
+        e["id"] for e in entries
+    ]
+
+
+@pytest.mark.asyncio
+async def test_stream_bypasses_cache(tmp_path, provider):
+    entries = accounts(2 * PAGE_SIZE + 10)
+    subgraph = FakeSubgraph(entries, block=100)
+    rewards = provider(subgraph, ranges=4, cache=ResponseCache(tmp_path, ttl=60, max_stale=600))
+
+    streamed = [account.address async for account in rewards.stream()]
+    calls = subgraph.calls
+
+    # every stream queries the subgraph, and nothing is held for the cache
+    assert sorted([account.address async for account in rewards.stream()]) == sorted(streamed)
+    assert subgraph.calls == 2 * calls
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_rank():
+    probes = [
+        Probe(Mode.DEFAULT, True, 0.5, 100),
+        Probe(Mode.BACKUP, True, 0.1, 100),
+    ]
+    assert rank(probes) == [Mode.BACKUP, Mode.DEFAULT]
+
+    # a lagging endpoint comes last, even if faster
+    probes[1] = Probe(Mode.BACKUP, True, 0.1, 50)
+    assert rank(probes) == [Mode.DEFAULT, Mode.BACKUP]
+
+    probes[0] = Probe(Mode.DEFAULT, False, None, None)
+    assert rank(probes) == [Mode.BACKUP]
+
+
+@pytest.mark.asyncio
+async def test_probe_endpoints_concurrently(provider):
+    delays = {Mode.DEFAULT: 0.05, Mode.BACKUP: 0.01}
+    in_flight = []
+
+    async def execute(
+        query: str, variable_values: dict, mode: Optional[Mode] = None
+    ) -> tuple[dict, Optional[dict]]:
+        in_flight.append(mode)
+        await asyncio.sleep(delays[mode])
+        return {"data": {"accounts": [], "_meta": {"block": {"number": 100}}}}, None
+
+    rewards = provider(FakeSubgraph([]), execute=execute)
+
+    assert await rewards.test("auto") == Mode.BACKUP
+    assert rewards.ranking == [Mode.BACKUP, Mode.DEFAULT]
+    assert sorted(in_flight, key=lambda mode: mode.value) == [Mode.BACKUP, Mode.DEFAULT]
+
+
+@pytest.mark.asyncio
+async def test_hedged_request(provider):
+    entries = accounts(10)
+    subgraph = FakeSubgraph(entries)
+    calls = []
+
+    async def execute(
+        query: str, variable_values: dict, mode: Optional[Mode] = None
+    ) -> tuple[dict, Optional[dict]]:
+        calls.append(mode)
+        # the primary is stuck, well past its p95
+        await asyncio.sleep(1 if mode == Mode.DEFAULT else 0)
+        return await subgraph.execute(query, variable_values)
+
+    rewards = provider(subgraph, execute=execute)
+    rewards.url.mode = Mode.DEFAULT
+    rewards.ranking = [Mode.DEFAULT, Mode.BACKUP]
+    for _ in range(20):
+        rewards.latencies[Mode.DEFAULT].add(0.01)
+
+    assert await rewards.get() == entries
+    assert calls == [Mode.DEFAULT, Mode.BACKUP]
@@ -0,0 +1,47 @@
+import pytest
+
+from core.subgraph import ResponseCache
+
+
+@pytest.mark.asyncio
+async def test_store_and_load(tmp_path):
+    cache = ResponseCache(tmp_path, ttl=60, max_stale=3600)
+    key = cache.key("slug", "query", {"first": 1})
+
+    assert await cache.load(key) is None
+
+    await cache.store(key, [{"id": "0x01"}], 100)
+    entry = await cache.load(key)
+    assert entry.data == [{"id": "0x01"}]
+    assert entry.block == 100
+    assert entry.age < 60
+
+
+@pytest.mark.asyncio
+async def test_cold_start_reads_from_disk(tmp_path):
+    cache = ResponseCache(tmp_path, ttl=60, max_stale=3600)
+    key = cache.key("slug", "query", {"first": 1})
+    await cache.store(key, [{"id": "0x01"}], 100)
+
+    restarted = ResponseCache(tmp_path, ttl=60, max_stale=3600)
+    entry = await restarted.load(key)
+    assert entry.data == [{"id": "0x01"}]
+    assert entry.block == 100
+
+
+def test_key_depends_on_variables():
+    assert ResponseCache.key("slug", "query", {"a": 1, "b": 2}) == ResponseCache.key(
+        "slug", "query", {"b": 2, "a": 1}
+    )
+    assert ResponseCache.key("slug", "query", {"a": 1}) != ResponseCache.key(
+        "slug", "query", {"a": 2}
+    )
+
+
+@pytest.mark.asyncio
+async def test_unreadable_entry(tmp_path):
+    cache = ResponseCache(tmp_path, ttl=60, max_stale=3600)
+    key = cache.key("slug", "query", {})
+    tmp_path.joinpath(f"{key}.json").write_text("{not json")
+
+    assert await cache.load(key) is None
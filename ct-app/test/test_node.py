@@ -1,7 +1,15 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+
 import pytest
+from prometheus_client import REGISTRY
 
-from core.api.response_objects import Channels
+from core.api.response_objects import Channels, TicketPrice
 from core.components.balance import Balance
+from core.components.peer_history import PeerHistory
+from core.rpc import CallCache
+from core.rpc.query_provider import BlockNumberProvider, ETHCallRPCProvider, ProviderError
+from core.subgraph import entries as sg_entries
 
 from .conftest import Node, Peer
 
@@ -34,11 +42,11 @@ async def test_retrieve_balances(node: Node):
 @pytest.mark.asyncio
 async def test_retrieve_peers(node: Node, peers: list[Peer]):
     node.peers = set()
-    node.peer_history = dict()
+    node.peer_history = PeerHistory()
     await node.retrieve_peers()
 
     assert len(node.peers) == len(peers) - 1
-    assert node.peer_history != dict()
+    assert len(node.peer_history) == len(peers) - 1
 
 
 @pytest.mark.asyncio
@@ -58,3 +66,183 @@ async def test_get_total_channel_funds(node: Node, channels: Channels):
     total_funds_from_fixture = sum([c.balance for c in channels.outgoing], Balance.zero("wxHOPR"))
 
     assert total_funds_from_fixture == total_funds_from_node
+
+
+@pytest.mark.asyncio
+async def test_close_old_channels(node: Node, mocker):
+    await node.retrieve_channels()
+    add = mocker.patch("core.mixins.channel.AsyncLoop.add")
+
+    await node.close_old_channels()
+    add.assert_not_called()
+    assert set(node.peer_history) == set(node.address_to_open_channel)
+
+    aged = next(iter(node.address_to_open_channel))
+    node.peer_history.update(
+        {aged: datetime.now() - timedelta(days=1), "gone": datetime(2000, 1, 1)}
+    )
+
+    await node.close_old_channels()
+    add.assert_called_once()
+    assert add.call_args.args[2] == node.address_to_open_channel[aged]
+    assert "gone" not in node.peer_history
+
+
+@pytest.mark.asyncio
+async def test_apply_economic_model(node: Node):
+    await node.retrieve_peers()
+    await node.retrieve_channels()
+
+    node.registered_nodes_data = [
+        sg_entries.Node(
+            peer.address.native,
+            sg_entries.Safe(f"safe_{peer.address.native}", f"{10 * idx}", "10", []),
+        )
+        for idx, peer in enumerate(node.peers)
+    ]
+    node.ticket_price = TicketPrice({"price": "0.0001 wxHOPR"})
+
+    await node.apply_economic_model()
+
+    model = node.params.economic_model
+    stakes = [p.split_stake for p in node.peers]
+    xs = [
+        sum(stakes, Balance.zero("wxHOPR")) / model.sigmoid.total_token_supply,
+        Decimal(len(stakes) / model.sigmoid.network_capacity),
+    ]
+
+    for peer in node.peers:
+        expected = model.legacy.yearly_message_count(
+            peer.split_stake, node.ticket_price
+        ) + model.sigmoid.yearly_message_count(peer.split_stake, node.ticket_price, xs)
+
+        assert peer.yearly_message_count == pytest.approx(expected, rel=1e-9)
+
+
+@pytest.mark.asyncio
+async def test_apply_economic_model_publishes_peer_metrics(node: Node):
+    await node.retrieve_peers()
+    await node.retrieve_channels()
+
+    node.registered_nodes_data = [
+        sg_entries.Node(
+            peer.address.native,
+            sg_entries.Safe(f"safe_{peer.address.native}", f"{10 * idx}", "10", []),
+        )
+        for idx, peer in enumerate(node.peers)
+    ]
+    node.ticket_price = TicketPrice({"price": "0.0001 wxHOPR"})
+
+    await node.apply_economic_model()
+
+    for peer in node.peers:
+        delay = REGISTRY.get_sample_value("ct_peer_delay", {"address": peer.address.native})
+        assert delay == peer.message_delay
+
+
+@pytest.mark.asyncio
+async def test_apply_economic_model_recomputes_changed_peers(node: Node, mocker):
+    await node.retrieve_peers()
+    await node.retrieve_channels()
+
+    node.registered_nodes_data = [
+        sg_entries.Node(
+            peer.address.native,
+            sg_entries.Safe(f"safe_{peer.address.native}", f"{10 * idx}", "10", []),
+        )
+        for idx, peer in enumerate(node.peers)
+    ]
+    node.ticket_price = TicketPrice({"price": "0.0001 wxHOPR"})
+
+    spy = mocker.spy(node.params.economic_model, "yearly_message_counts")
+
+    await node.apply_economic_model()
+    eligible = [p for p in node.peers if p.yearly_message_count is not None]
+    counts = {p.address.native: p.yearly_message_count for p in eligible}
+
+    assert len(spy.call_args.args[0]) == len(eligible)
+
+    # nothing changed, the model is not evaluated
+    await node.apply_economic_model()
+    assert spy.call_count == 1
+    assert {p.address.native: p.yearly_message_count for p in eligible} == counts
+
+    # redeemed rewards only affect the peer they belong to
+    node.peers_rewards_data = {eligible[0].address.native: Balance("1 wxHOPR")}
+    await node.apply_economic_model()
+    assert spy.call_count == 1
+
+    node.model_trigger.mark("peers_rewards")
+    await node.apply_economic_model()
+    assert spy.call_count == 2
+    assert len(spy.call_args.args[0]) == 1
+
+
+@pytest.mark.asyncio
+async def test_eoa_balances_served_from_block_cache(node: Node, mocker):
+    node.params.investors.addresses = ["0x" + "11" * 20, "0x" + "22" * 20]
+    node.rpc_cache = CallCache({"gnosis": 0, "mainnet": 0})
+    head = mocker.patch.object(BlockNumberProvider, "block_number", return_value=100)
+    get_batch = mocker.patch.object(
+        ETHCallRPCProvider,
+        "get_batch",
+        side_effect=lambda calls, max_size: ["0x" + "0" * 63 + "1"] * len(calls),
+    )
+
+    await node.eoa_balances()
+    assert get_batch.call_count == 3
+    assert len(node.eoa_balances_data) == 6
+
+    # same head: every call is skipped
+    await node.eoa_balances()
+    assert get_batch.call_count == 3
+    assert len(node.eoa_balances_data) == 6
+
+    head.return_value = 101
+    await node.eoa_balances()
+    assert get_batch.call_count == 6
+
+
+@pytest.mark.asyncio
+async def test_eoa_balances_marked_only_on_change(node: Node, mocker):
+    node.params.investors.addresses = ["0x" + "11" * 20, "0x" + "22" * 20]
+    node.rpc_cache = CallCache({"gnosis": -1, "mainnet": -1})
+    mocker.patch.object(BlockNumberProvider, "block_number", return_value=100)
+    value = "0x" + "0" * 63 + "1"
+    get_batch = mocker.patch.object(
+        ETHCallRPCProvider, "get_batch", side_effect=lambda calls, max_size: [value] * len(calls)
+    )
+    node.model_trigger.consume()
+
+    await node.eoa_balances()
+    balances = node.eoa_balances_data
+    assert len(balances) == 6
+    assert node.model_trigger.consume() == {"eoa_balances"}
+
+    # same values: the snapshot is kept as is and the model is not triggered
+    await node.eoa_balances()
+    assert node.eoa_balances_data is balances
+    assert node.model_trigger.pending == frozenset()
+
+    value = "0x" + f"{10**18:064x}"
+    await node.eoa_balances()
+    assert node.eoa_balances_data is not balances
+    assert node.model_trigger.consume() == {"eoa_balances"}
+
+    # failures keep the previous snapshot and do not trigger the model
+    balances = node.eoa_balances_data
+    get_batch.side_effect = ProviderError("unreachable")
+    await node.eoa_balances()
+    assert node.eoa_balances_data is balances
+    assert node.model_trigger.pending == frozenset()
+
+
+@pytest.mark.asyncio
+async def test_apply_economic_model_keeps_pending_sources_without_data(node: Node):
+    node.model_trigger.consume()
+    node.registered_nodes_data = []
+
+    node.model_trigger.mark("peers_rewards")
+    await node.apply_economic_model()
+
+    assert node.model_trigger.pending == {"peers_rewards"}